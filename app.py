@@ -1,11 +1,84 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from typing import Optional
+import asyncio
+import json
+import os
+
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
-import subprocess
 import aiohttp
-import asyncio
 
-app = FastAPI()
+from web_scraper_project.engine import CrawlEngine
+from web_scraper_project.export import (
+    MEDIA_TYPES,
+    csv_chunks,
+    default_jsonl_path,
+    gzip_chunks,
+    json_array_chunks,
+    jsonl_file_chunks,
+    jsonl_file_lines,
+    ndjson_chunks,
+)
+from web_scraper_project.fetch import fetch_many, fetch_status
+from web_scraper_project.httpcache import ResponseCache, cached_get
+from web_scraper_project.jobs import JobQueue, WorkerPool, stream_events
+from web_scraper_project import settings as project_settings
+from web_scraper_project.sessions import SessionPool
+from web_scraper_project.store import ItemStore
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # One pooled HTTP session and one crawl engine live for the whole
+    # process: fetches reuse connections and DNS results, and /scrape does
+    # not fork a `scrapy crawl` subprocess per request.
+    session_pool = SessionPool()
+    await session_pool.start()
+    engine = CrawlEngine(session_pool=session_pool)
+    await engine.start()
+    app.state.session_pool = session_pool
+    app.state.crawl_engine = engine
+    app.state.item_store = ItemStore()
+    app.state.response_cache = (
+        ResponseCache().open() if project_settings.HTTP_CACHE_ENABLED else None
+    )
+    # `/start-scraping` jobs are queued on disk and crawled by worker
+    # processes, independently of this process's event loop.
+    app.state.job_queue = JobQueue().open()
+    app.state.worker_pool = WorkerPool(path=app.state.job_queue.path).start()
+    try:
+        yield
+    finally:
+        await asyncio.to_thread(app.state.worker_pool.stop)
+        app.state.job_queue.close()
+        await engine.stop()
+        await session_pool.close()
+        if app.state.response_cache is not None:
+            app.state.response_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+
+def http_session(request: Request) -> aiohttp.ClientSession:
+    return request.app.state.session_pool.session
+
+
+def crawl_engine(request: Request) -> CrawlEngine:
+    return request.app.state.crawl_engine
+
+
+def item_store(request: Request) -> ItemStore:
+    return request.app.state.item_store
+
+
+def response_cache(request: Request) -> Optional[ResponseCache]:
+    return request.app.state.response_cache
+
+
+def job_queue(request: Request) -> JobQueue:
+    return request.app.state.job_queue
 
 class URLRequest(BaseModel):
     url: str
@@ -13,78 +86,213 @@ class URLRequest(BaseModel):
 class ScrapeRequest(BaseModel):
     url: str
 
+class JobRequest(BaseModel):
+    url: str
+    priority: int = 0
+
 @app.get("/")
 async def root():
     return {"message": "Welcome to the Web Scraper API!"}
 
-@app.post("/start-scraping")
-async def start_scraping(request: URLRequest):
-    # Placeholder for starting the scraping process with the provided URL
-    url = request.url
-    return {"message": f"Scraping started for {url}!"}
+@app.post("/start-scraping", status_code=202)
+def start_scraping(request: JobRequest, queue: JobQueue = Depends(job_queue)):
+    # Only queues the crawl; worker processes pick it up by priority.
+    job = queue.submit(request.url, priority=request.priority)
+    return {"message": f"Scraping queued for {job['url']}!", **job}
+
+@app.get("/jobs")
+def list_jobs(
+    state: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    queue: JobQueue = Depends(job_queue),
+):
+    return {"jobs": queue.recent(state=state, limit=limit)}
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, queue: JobQueue = Depends(job_queue)):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+def job_events(
+    job_id: str,
+    after: int = Query(0, ge=0),
+    last_event_id: Optional[int] = Header(None),
+    queue: JobQueue = Depends(job_queue),
+):
+    # Server-Sent Events: `progress` (counters and rates), `items` (items
+    # scraped since the previous report) and `state`, ending with the job's
+    # final state. Reconnecting EventSources resume after Last-Event-ID.
+    if queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    after = last_event_id if last_event_id is not None else after
+    return StreamingResponse(
+        stream_events(queue, job_id, after=after),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str, queue: JobQueue = Depends(job_queue)):
+    if not queue.cancel(job_id):
+        raise HTTPException(
+            status_code=404, detail=f"No pending or running job {job_id}"
+        )
+    return queue.get(job_id)
 
 @app.get("/data")
-async def get_data():
-    # Return scraped data
-    return JSONResponse(content={"data": data})
+def get_data(
+    table: str = "products",
+    cursor: Optional[int] = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=1000),
+    fields: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_rating: Optional[int] = None,
+    max_rating: Optional[int] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    store: ItemStore = Depends(item_store),
+):
+    # Keyset-paginated page of scraped items; pass `next_cursor` back as
+    # `cursor` for the next page. `format=ndjson` streams every matching
+    # row from `cursor` onwards instead of a single page.
+    query = dict(
+        table=table,
+        after=cursor,
+        fields=[name for name in fields.split(",") if name] if fields else None,
+        category=category,
+        min_price=min_price,
+        max_price=max_price,
+        min_rating=min_rating,
+        max_rating=max_rating,
+    )
+    try:
+        if format == "ndjson":
+            lines = (json.dumps(row) + "\n" for row in store.iter_rows(**query))
+            return StreamingResponse(lines, media_type="application/x-ndjson")
+        rows, next_cursor = store.page(limit=limit, **query)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    return {"data": rows, "next_cursor": next_cursor}
 
 @app.get("/download")
-async def download_data():
-    # Placeholder for downloading data as CSV or JSON
-    return {"message": "Download endpoint (to be implemented)"}
+def download_data(
+    format: str = Query("ndjson", pattern="^(csv|json|ndjson)$"),
+    gzip: bool = False,
+    source: str = Query("db", pattern="^(db|jsonl)$"),
+    table: str = "products",
+    fields: Optional[str] = None,
+    store: ItemStore = Depends(item_store),
+):
+    # Stream the dataset as CSV, a JSON array or NDJSON with constant memory,
+    # either from a table in items.db or straight from items.jl.
+    if source == "jsonl":
+        if format == "csv":
+            raise HTTPException(status_code=400, detail="CSV export requires source=db")
+        path = default_jsonl_path()
+        if not os.path.exists(path):
+            raise HTTPException(status_code=404, detail="No items.jl export available")
+        filename = f"items.{format}"
+        if format == "ndjson":
+            chunks = jsonl_file_chunks(path)
+        else:
+            chunks = json_array_chunks(jsonl_file_lines(path), raw=True)
+    else:
+        field_list = [name for name in fields.split(",") if name] if fields else None
+        try:
+            columns = store.selected_columns(table, field_list)
+            rows = store.iter_rows(table=table, fields=field_list)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e)) from e
+        filename = f"{table}.{format}"
+        if format == "csv":
+            chunks = csv_chunks(rows, columns)
+        elif format == "json":
+            chunks = json_array_chunks(rows)
+        else:
+            chunks = ndjson_chunks(rows)
+
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        chunks = gzip_chunks(chunks)
+        media_type = "application/gzip"
+        filename += ".gz"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @app.post("/download")
-async def download_url(request: URLRequest):
+async def download_url(
+    request: URLRequest,
+    session: aiohttp.ClientSession = Depends(http_session),
+    cache: Optional[ResponseCache] = Depends(response_cache),
+):
     url = request.url
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.get(url) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    # Process content if needed
-                    return JSONResponse(content={"status": "success", "url": url})
-                else:
-                    raise HTTPException(status_code=response.status, detail=f"Failed to download {url}")
+        response = await cached_get(session, url, cache)
+    except aiohttp.ClientResponseError as e:
+        raise HTTPException(
+            status_code=e.status, detail=f"Failed to download {url}"
+        ) from e
     except aiohttp.ClientError as e:
         raise HTTPException(status_code=500, detail=f"HTTP error: {str(e)}") from e
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}") from e
+    if response.status != 200:
+        raise HTTPException(
+            status_code=response.status, detail=f"Failed to download {url}"
+        )
+    return JSONResponse(
+        content={"status": "success", "url": url, "not_modified": response.not_modified}
+    )
 
 @app.post("/download-multiple")
-async def download_multiple_urls(urls: list[URLRequest]):
+async def download_multiple_urls(
+    urls: list[URLRequest],
+    concurrency: Optional[int] = Query(None, ge=1),
+    per_host: Optional[int] = Query(None, ge=1),
+    timeout: Optional[float] = Query(None, gt=0),
+    session: aiohttp.ClientSession = Depends(http_session),
+    cache: Optional[ResponseCache] = Depends(response_cache),
+):
+    # Results are streamed as NDJSON in completion order, one line per URL,
+    # with at most `concurrency` fetches (and `per_host` per host) in flight.
     async def fetch_url(url):
-        try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url.url) as response:
-                    if response.status == 200:
-                        return {"url": url.url, "status": "success"}
-                    else:
-                        return {"url": url.url, "status": "failed", "reason": response.status}
-        except aiohttp.ClientError as e:
-            return {"url": url.url, "status": "error", "reason": str(e)}
-        except Exception as e:
-            return {"url": url.url, "status": "error", "reason": str(e)}
-
-    tasks = [fetch_url(url) for url in urls]
-    results = await asyncio.gather(*tasks)
-    return results
-
-@app.post("/scrape")
-async def scrape_url(request: ScrapeRequest):
-    url = request.url
-    try:
-        process = subprocess.run(
-            ["scrapy", "crawl", "book_spider", "-a", f"start_url={url}"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
+        return await fetch_status(session, url, cache)
 
-        if process.returncode == 0:
-            return {"status": "success", "url": url}
-        else:
-            raise HTTPException(status_code=500, detail=process.stderr)
-    except subprocess.CalledProcessError as e:
-        raise HTTPException(status_code=500, detail=f"Scrapy process error: {e.stderr}") from e
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}") from e
\ No newline at end of file
+    async def lines():
+        async for result in fetch_many(
+            (url.url for url in urls),
+            fetch_url,
+            concurrency=concurrency,
+            per_host=per_host,
+            timeout=timeout,
+        ):
+            yield json.dumps(result) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.post("/scrape", status_code=202)
+async def scrape_url(
+    request: ScrapeRequest, engine: CrawlEngine = Depends(crawl_engine)
+):
+    job = engine.submit(request.url)
+    return {"status": "accepted", "job_id": job.id, "url": job.url}
+
+@app.get("/scrape/{job_id}")
+async def get_scrape_job(job_id: str, engine: CrawlEngine = Depends(crawl_engine)):
+    job = engine.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
+@app.delete("/scrape/{job_id}")
+async def cancel_scrape_job(job_id: str, engine: CrawlEngine = Depends(crawl_engine)):
+    if not engine.cancel(job_id):
+        raise HTTPException(status_code=404, detail=f"No running job {job_id}")
+    return {"status": "cancelling", "job_id": job_id}
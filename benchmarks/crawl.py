@@ -0,0 +1,483 @@
+"""Crawl throughput benchmarks against a local `SyntheticSite`.
+
+Usage:
+    python -m benchmarks.crawl
+    python -m benchmarks.crawl --pages 200 --latency 0.02 --error-rate 0.01
+    python -m benchmarks.crawl --targets async,scrapy \
+        --compare benchmarks/results/before.json
+
+Targets:
+    scrapy             the Scrapy `BookSpider` (via `CrawlerProcess`)
+    async              `AsyncBookSpider` on a pooled `SessionPool` session
+    download           ``POST /download`` once per product URL
+    download_multiple  one ``POST /download-multiple`` of every product URL
+
+Each target runs in a fresh Python process against the same site (served
+from this process), with a temporary data directory, the item pipelines
+enabled (unless ``--no-pipelines``) and the per-host rate limiter and
+politeness delays off, so the numbers measure the crawler rather than the
+configured crawl rate. Per target the results hold pages/sec, items/sec,
+p50/p99 fetch latency (time to response headers, per attempt), CPU seconds
+of the target process and its children, and peak RSS. They are written as
+JSON to ``benchmarks/results/`` for later ``--compare`` runs.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from benchmarks.site import SyntheticSite, product_urls
+
+TARGETS = ("scrapy", "async", "download", "download_multiple")
+RESULTS_DIR = Path(__file__).parent / "results"
+COMPARED_METRICS = (
+    "pages_per_second",
+    "items_per_second",
+    "latency_p50",
+    "latency_p99",
+    "cpu_seconds",
+    "peak_rss_mb",
+)
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of `values`, or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+
+def _cpu_seconds():
+    usage = [
+        resource.getrusage(who)
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    ]
+    return sum(u.ru_utime + u.ru_stime for u in usage)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    usage = [
+        resource.getrusage(who)
+        for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN)
+    ]
+    return max(u.ru_maxrss for u in usage) / 1024
+
+
+class Measurement:
+    """Wall-clock and CPU time of a block, plus the latencies recorded in it."""
+
+    def __init__(self):
+        self.latencies = []
+        self.elapsed = 0.0
+        self.cpu_seconds = 0.0
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        self._cpu = _cpu_seconds()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.elapsed = time.perf_counter() - self._started
+        self.cpu_seconds = _cpu_seconds() - self._cpu
+
+    def result(self, pages, items):
+        elapsed = self.elapsed or float("nan")
+        p50, p99 = percentile(self.latencies, 50), percentile(self.latencies, 99)
+        return {
+            "pages": pages,
+            "items": items,
+            "elapsed": round(self.elapsed, 4),
+            "pages_per_second": round(pages / elapsed, 2),
+            "items_per_second": round(items / elapsed, 2),
+            "latency_p50": round(p50, 6) if p50 is not None else None,
+            "latency_p99": round(p99, 6) if p99 is not None else None,
+            "cpu_seconds": round(self.cpu_seconds, 3),
+            "cpu_percent": round(100 * self.cpu_seconds / elapsed, 1),
+            "peak_rss_mb": round(_peak_rss_mb(), 1),
+        }
+
+
+def _prepare(data_dir):
+    from web_scraper_project import pipelines
+    from web_scraper_project import settings as project_settings
+
+    pipelines.DATA_DIR = data_dir
+    project_settings.RATE_LIMIT_ENABLED = False
+    project_settings.JOB_QUEUE_WORKERS = 0
+
+
+def run_scrapy(config):
+    from scrapy import signals
+    from scrapy.crawler import CrawlerProcess
+    from scrapy.utils.project import get_project_settings
+
+    from scraper.spiders.book_spider import BookSpider
+
+    os.environ.setdefault("SCRAPY_SETTINGS_MODULE", "web_scraper_project.settings")
+    settings = get_project_settings()
+    overrides = {
+        "ROBOTSTXT_OBEY": False,
+        "DOWNLOAD_DELAY": 0,
+        "AUTOTHROTTLE_ENABLED": False,
+        "CONCURRENT_REQUESTS": config["concurrency"],
+        "CONCURRENT_REQUESTS_PER_DOMAIN": config["concurrency"],
+        "LOG_LEVEL": "WARNING",
+        "TELNETCONSOLE_ENABLED": False,
+    }
+    if not config["pipelines"]:
+        overrides["ITEM_PIPELINES"] = {}
+    settings.setdict(overrides, priority="cmdline")
+
+    measurement = Measurement()
+    counts = {"pages": 0, "items": 0}
+
+    def response_received(response, request, spider):
+        counts["pages"] += 1
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            measurement.latencies.append(latency)
+
+    def item_scraped(item, response, spider):
+        counts["items"] += 1
+
+    process = CrawlerProcess(settings, install_root_handler=False)
+    crawler = process.create_crawler(BookSpider)
+    crawler.signals.connect(response_received, signal=signals.response_received)
+    crawler.signals.connect(item_scraped, signal=signals.item_scraped)
+    process.crawl(
+        crawler,
+        start_urls=[config["start_url"]],
+        allowed_domains=[urlsplit(config["start_url"]).hostname],
+    )
+    with measurement:
+        process.start()
+    return measurement.result(counts["pages"], counts["items"])
+
+
+def run_async(config):
+    from scraper.spiders.book_spider import AsyncBookSpider
+    from web_scraper_project.engine import load_pipelines, process_item
+    from web_scraper_project.sessions import SessionPool
+
+    measurement = Measurement()
+
+    class TimedSessionPool(SessionPool):
+        @property
+        def middlewares(self):
+            # Innermost, so every retry attempt is timed on its own.
+            return (*super().middlewares, self.time_request)
+
+        async def time_request(self, request, handler):
+            started = time.perf_counter()
+            response = await handler(request)
+            measurement.latencies.append(time.perf_counter() - started)
+            return response
+
+    async def crawl():
+        pipelines = load_pipelines() if config["pipelines"] else []
+        for pipeline in pipelines:
+            if hasattr(pipeline, "open_spider"):
+                pipeline.open_spider(None)
+        spider = AsyncBookSpider(
+            start_urls=[config["start_url"]], concurrency=config["concurrency"]
+        )
+        items = 0
+        async with TimedSessionPool() as session:
+            with measurement:
+                async for item in spider.crawl(session=session):
+                    # Handled as the engine, the job workers and the CLI do:
+                    # a dropped or failing item is counted, not fatal.
+                    if process_item(pipelines, item, spider) is not None:
+                        items += 1
+                for pipeline in pipelines:
+                    if hasattr(pipeline, "close_spider"):
+                        pipeline.close_spider(None)
+        return spider.stats["pages_fetched"], items
+
+    pages, items = asyncio.run(crawl())
+    return measurement.result(pages, items)
+
+
+def _api_client():
+    import httpx
+
+    import app as app_module
+
+    transport = httpx.ASGITransport(app=app_module.app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://api", timeout=None)
+    return app_module.app, client
+
+
+def run_download(config):
+    urls = product_urls(config["base_url"], config["pages"], config["per_page"])
+    measurement = Measurement()
+
+    async def download():
+        app, client = _api_client()
+        slots = asyncio.Semaphore(config["concurrency"])
+        pages = 0
+
+        async def fetch(url):
+            nonlocal pages
+            async with slots:
+                started = time.perf_counter()
+                response = await client.post("/download", json={"url": url})
+                measurement.latencies.append(time.perf_counter() - started)
+                pages += response.status_code == 200
+
+        async with app.router.lifespan_context(app), client:
+            with measurement:
+                await asyncio.gather(*(fetch(url) for url in urls))
+        return pages
+
+    return measurement.result(asyncio.run(download()), 0)
+
+
+def run_download_multiple(config):
+    urls = product_urls(config["base_url"], config["pages"], config["per_page"])
+    measurement = Measurement()
+
+    async def download():
+        app, client = _api_client()
+        pages = 0
+        params = {
+            "concurrency": config["concurrency"],
+            "per_host": config["concurrency"],
+        }
+        async with app.router.lifespan_context(app), client:
+            with measurement:
+                async with client.stream(
+                    "POST",
+                    "/download-multiple",
+                    params=params,
+                    json=[{"url": url} for url in urls],
+                ) as response:
+                    async for line in response.aiter_lines():
+                        if line and json.loads(line)["status"] == "success":
+                            pages += 1
+        return pages
+
+    # Results arrive as one stream, so there is no per-URL latency here.
+    return measurement.result(asyncio.run(download()), 0)
+
+
+RUNNERS = {
+    "scrapy": run_scrapy,
+    "async": run_async,
+    "download": run_download,
+    "download_multiple": run_download_multiple,
+}
+
+
+def run_child(target, config):
+    with tempfile.TemporaryDirectory(prefix="scraper-bench-") as data_dir:
+        _prepare(data_dir)
+        return RUNNERS[target](config)
+
+
+def run_target(target, site, config):
+    """Benchmark `target` in a fresh process against the running `site`."""
+    config = dict(
+        config,
+        start_url=site.start_url,
+        base_url=site.base_url,
+        pages=site.pages,
+        per_page=site.per_page,
+    )
+    requests, errors = site.requests, site.errors
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.crawl",
+            "--child",
+            target,
+            json.dumps(config),
+        ],
+        cwd=Path(__file__).parent.parent,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark {target} failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["requests"] = site.requests - requests
+    result["server_errors"] = site.errors - errors
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent.parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    targets,
+    pages,
+    per_page,
+    latency=0.0,
+    error_rate=0.0,
+    seed=0,
+    concurrency=16,
+    pipelines=True,
+):
+    site_config = {
+        "pages": pages,
+        "per_page": per_page,
+        "latency": latency,
+        "error_rate": error_rate,
+        "seed": seed,
+    }
+    config = {"concurrency": concurrency, "pipelines": pipelines}
+    results = {}
+    with SyntheticSite(**site_config) as site:
+        for target in targets:
+            results[target] = run_target(target, site, config)
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "site": site_config,
+            **config,
+        },
+        "results": results,
+    }
+
+
+def format_results(report):
+    lines = [
+        f"{'target':<18} {'pages/s':>9} {'items/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+        f"{'cpu s':>7} {'rss MB':>7}"
+    ]
+    for target, result in report["results"].items():
+        p50, p99 = result["latency_p50"], result["latency_p99"]
+        lines.append(
+            f"{target:<18} {result['pages_per_second']:>9.1f} "
+            f"{result['items_per_second']:>9.1f} "
+            f"{p50 * 1000 if p50 is not None else float('nan'):>8.2f} "
+            f"{p99 * 1000 if p99 is not None else float('nan'):>8.2f} "
+            f"{result['cpu_seconds']:>7.2f} {result['peak_rss_mb']:>7.1f}"
+        )
+    return "\n".join(lines)
+
+
+def compare(report, baseline):
+    """Per target and metric: ``(baseline, current, relative change)``."""
+    changes = {}
+    for target, result in report["results"].items():
+        before = baseline["results"].get(target)
+        if before is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = before.get(metric), result.get(metric)
+            if old is None or new is None:
+                continue
+            changes[(target, metric)] = (old, new, (new - old) / old if old else None)
+    return changes
+
+
+def format_comparison(changes):
+    lines = [
+        f"{'target':<18} {'metric':<17} {'baseline':>10} {'current':>10} {'change':>8}"
+    ]
+    for (target, metric), (old, new, change) in changes.items():
+        change = f"{change:+.1%}" if change is not None else "n/a"
+        lines.append(f"{target:<18} {metric:<17} {old:>10.4g} {new:>10.4g} {change:>8}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--targets", default=",".join(TARGETS), help="comma-separated targets"
+    )
+    parser.add_argument(
+        "--pages", type=int, default=50, help="listing pages on the site"
+    )
+    parser.add_argument(
+        "--per-page", type=int, default=20, help="products per listing page"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="seconds added to each response"
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="fraction of 500 responses"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument(
+        "--no-pipelines", action="store_true", help="skip the item pipelines"
+    )
+    parser.add_argument(
+        "--output", help="results file (default: benchmarks/results/crawl-<time>.json)"
+    )
+    parser.add_argument(
+        "--compare", metavar="BASELINE", help="results file to compare against"
+    )
+    parser.add_argument(
+        "--child", nargs=2, metavar=("TARGET", "CONFIG"), help=argparse.SUPPRESS
+    )
+    args = parser.parse_args(argv)
+
+    if args.child:
+        target, config = args.child
+        print(json.dumps(run_child(target, json.loads(config))))
+        return 0
+
+    targets = [target for target in args.targets.split(",") if target]
+    unknown = set(targets) - set(TARGETS)
+    if unknown:
+        parser.error(f"unknown targets: {', '.join(sorted(unknown))}")
+
+    report = run_benchmarks(
+        targets,
+        pages=args.pages,
+        per_page=args.per_page,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        concurrency=args.concurrency,
+        pipelines=not args.no_pipelines,
+    )
+    print(format_results(report))
+
+    output = (
+        Path(args.output)
+        if args.output
+        else RESULTS_DIR / f"crawl-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print(format_comparison(compare(report, baseline)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
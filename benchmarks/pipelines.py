@@ -0,0 +1,329 @@
+"""Item pipeline micro-benchmarks with regression gating.
+
+Usage:
+    python -m benchmarks.pipelines
+    python -m benchmarks.pipelines --scales 10000,100000 --cases jsonlines,sqlite
+    python -m benchmarks.pipelines --update-baseline
+    python -m benchmarks.pipelines --threshold 0.15
+
+Cases, each fed freshly generated `ProductItem` instances:
+    validate       the pipelines' batched validation (`validate_items`, in
+                   batches of ``VALIDATION_BATCH_SIZE``)
+    serialize      `SerializationPipeline` (validation plus JSON encoding)
+    jsonlines      `JsonLinesPipeline` on its own, writing items.jl
+    sqlite         `SQLitePipeline` on its own, writing items.db
+
+Every case runs at each scale (10k, 100k and 1M items by default) in a
+temporary data directory and reports items/sec and the bytes written. The
+time includes building each item and closing the pipeline, so buffered
+writes are counted. Allocations are measured in a second, smaller pass under
+`tracemalloc`, which would skew the timings: peak traced memory and the
+memory still held after the pipeline closes, per item.
+
+Results are compared against the baseline file (by default the committed
+``benchmarks/baselines/pipelines.json``; rewrite it with
+``--update-baseline`` on the machine that will run the comparison). The exit
+status is 1 when any case's throughput falls more than ``--threshold`` below
+its baseline, and also when the baseline file is missing or has no entry
+for a measured case and scale, so a CI job running this fails rather than
+silently passing; ``--allow-missing-baseline`` makes a missing baseline a
+warning instead.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.crawl import git_commit
+
+CASES = ("validate", "serialize", "jsonlines", "sqlite")
+SCALES = (10_000, 100_000, 1_000_000)
+BASELINE_PATH = Path(__file__).parent / "baselines" / "pipelines.json"
+RESULTS_DIR = Path(__file__).parent / "results"
+DEFAULT_THRESHOLD = 0.2
+ALLOCATION_SAMPLE = 10_000
+
+CATEGORIES = ("Fiction", "Poetry", "History", "Science", "Travel")
+
+
+def make_item(i):
+    """A valid, unique `ProductItem` for index `i`.
+
+    Its fields have the types `extract_product` produces (float prices, an
+    int availability, the review count as the scraped digit string), so the
+    validation cases measure the path real crawls take.
+    """
+    from web_scraper_project.items import ProductItem
+
+    price = 10 + i % 50 + (i % 100) / 100
+    return ProductItem(
+        url=f"http://books.toscrape.com/catalogue/book-{i}/index.html",
+        scrape_date="2025-11-06T10:00:00.000000",
+        category=CATEGORIES[i % len(CATEGORIES)],
+        title=f"Book {i}",
+        star_rating=i % 5 + 1,
+        description=f"Description of book {i}. " * 8,
+        upc=f"{i:016x}",
+        product_type="Books",
+        price_excl_tax=price,
+        price_incl_tax=price,
+        tax=0.0,
+        availability=i % 20,
+        number_of_reviews=str(i % 7),
+        price=price,
+        image_url=f"http://books.toscrape.com/media/cache/{i}.jpg",
+        content_hash=f"{i:032x}",
+    )
+
+
+class ValidateCase:
+    """Validate items in batches, as the buffered pipelines do."""
+
+    def __init__(self):
+        from web_scraper_project import settings as project_settings
+        from web_scraper_project.serialization import validate_items
+
+        self.validate_items = validate_items
+        self.batch_size = project_settings.VALIDATION_BATCH_SIZE
+        self.pending = []
+
+    def process(self, item):
+        self.pending.append(item)
+        if len(self.pending) >= self.batch_size:
+            self.close()
+
+    def close(self):
+        if self.pending:
+            self.validate_items(self.pending)
+            self.pending = []
+
+    def bytes_written(self):
+        return 0
+
+
+class PipelineCase:
+    """Drive one item pipeline, reporting the size of the files it writes."""
+
+    def __init__(self, pipeline, data_dir, files=()):
+        self.pipeline = pipeline
+        self.data_dir = data_dir
+        self.files = files
+        if hasattr(pipeline, "open_spider"):
+            pipeline.open_spider(None)
+
+    def process(self, item):
+        self.pipeline.process_item(item, None)
+
+    def close(self):
+        if hasattr(self.pipeline, "close_spider"):
+            self.pipeline.close_spider(None)
+
+    def bytes_written(self):
+        paths = (os.path.join(self.data_dir, name) for name in self.files)
+        return sum(os.path.getsize(path) for path in paths if os.path.exists(path))
+
+
+def make_case(name, data_dir):
+    from web_scraper_project import pipelines
+
+    if name == "validate":
+        return ValidateCase()
+    if name == "serialize":
+        return PipelineCase(pipelines.SerializationPipeline(), data_dir)
+    if name == "jsonlines":
+        return PipelineCase(pipelines.JsonLinesPipeline(), data_dir, ["items.jl"])
+    if name == "sqlite":
+        return PipelineCase(
+            pipelines.SQLitePipeline(), data_dir, ["items.db", "items.db-wal"]
+        )
+    raise ValueError(f"Unknown case: {name}")
+
+
+@contextmanager
+def temporary_data_dir():
+    """A temporary directory the pipelines write to for the duration."""
+    from web_scraper_project import pipelines
+
+    previous = pipelines.DATA_DIR
+    with tempfile.TemporaryDirectory(prefix="pipeline-bench-") as path:
+        pipelines.DATA_DIR = path
+        try:
+            yield path
+        finally:
+            pipelines.DATA_DIR = previous
+
+
+def _drive(case, count):
+    for i in range(count):
+        case.process(make_item(i))
+    case.close()
+
+
+def time_case(name, count):
+    with temporary_data_dir() as path:
+        case = make_case(name, path)
+        started = time.perf_counter()
+        _drive(case, count)
+        elapsed = time.perf_counter() - started
+        written = case.bytes_written()
+    return {
+        "items": count,
+        "elapsed": round(elapsed, 4),
+        "items_per_second": round(count / elapsed, 1),
+        "bytes_written": written,
+        "bytes_per_item": round(written / count, 1),
+    }
+
+
+def measure_allocations(name, count):
+    with temporary_data_dir() as path:
+        case = make_case(name, path)
+        tracemalloc.start()
+        try:
+            before, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            _drive(case, count)
+            after, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return {
+        "alloc_sample": count,
+        "alloc_peak_bytes": peak - before,
+        "alloc_retained_bytes_per_item": round((after - before) / count, 1),
+    }
+
+
+def run_benchmarks(cases, scales, allocation_sample=ALLOCATION_SAMPLE):
+    results = {}
+    for name in cases:
+        results[name] = {}
+        for count in scales:
+            result = time_case(name, count)
+            result.update(measure_allocations(name, min(count, allocation_sample)))
+            results[name][str(count)] = result
+            print(
+                f"{name:<10} {count:>9} items "
+                f"{result['items_per_second']:>10.0f} items/s "
+                f"{result['bytes_written']:>12} bytes "
+                f"{result['alloc_peak_bytes'] / 1024:>9.0f} KiB peak",
+                flush=True,
+            )
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat() + "Z",
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def missing_baselines(report, baseline):
+    """``(case, scale)`` pairs measured in `report` that `baseline` lacks."""
+    known = baseline.get("results", {})
+    return [
+        (name, scale)
+        for name, by_scale in report["results"].items()
+        for scale in by_scale
+        if scale not in known.get(name, {})
+    ]
+
+
+def regressions(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """``(case, scale, baseline, current)`` for throughput drops beyond `threshold`."""
+    found = []
+    for name, by_scale in report["results"].items():
+        for scale, result in by_scale.items():
+            before = baseline.get("results", {}).get(name, {}).get(scale)
+            if before is None:
+                continue
+            old, new = before["items_per_second"], result["items_per_second"]
+            if new < old * (1 - threshold):
+                found.append((name, scale, old, new))
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--cases", default=",".join(CASES), help="comma-separated cases"
+    )
+    parser.add_argument(
+        "--scales",
+        default=",".join(map(str, SCALES)),
+        help="comma-separated item counts",
+    )
+    parser.add_argument("--allocation-sample", type=int, default=ALLOCATION_SAMPLE)
+    parser.add_argument("--baseline", default=str(BASELINE_PATH))
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--allow-missing-baseline",
+        action="store_true",
+        help=(
+            "exit 0 rather than 1 when a case or scale has no baseline to "
+            "compare against"
+        ),
+    )
+    parser.add_argument(
+        "--output",
+        help="results file (default: benchmarks/results/pipelines-<time>.json)",
+    )
+    args = parser.parse_args(argv)
+
+    cases = [name for name in args.cases.split(",") if name]
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+    scales = [int(scale) for scale in args.scales.split(",") if scale]
+
+    report = run_benchmarks(cases, scales, args.allocation_sample)
+    output = (
+        Path(args.output)
+        if args.output
+        else RESULTS_DIR / f"pipelines-{time.strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    print(f"Results written to {output}")
+
+    baseline_path = Path(args.baseline)
+    if args.update_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(
+            f"No baseline at {baseline_path}; run with --update-baseline to create one"
+        )
+        return 0 if args.allow_missing_baseline else 1
+
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    missing = missing_baselines(report, baseline)
+    for name, scale in missing:
+        print(f"NO BASELINE for {name} at {scale} items in {baseline_path}")
+    found = regressions(report, baseline, args.threshold)
+    for name, scale, old, new in found:
+        print(
+            f"REGRESSION {name} at {scale} items: "
+            f"{new:.0f} items/s vs {old:.0f} baseline "
+            f"({new / old - 1:+.1%}, threshold -{args.threshold:.0%})"
+        )
+    if found or (missing and not args.allow_missing_baseline):
+        return 1
+    print(f"No throughput regressions beyond {args.threshold:.0%} of {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+"""A synthetic books.toscrape-shaped site for benchmarks.
+
+`SyntheticSite` serves ``pages`` listing pages of ``per_page`` products each
+from ``/catalogue/page-N.html``, plus a product page per book at
+``/catalogue/book-N-I/index.html`` in the markup the extraction code
+expects. Every response is delayed by ``latency`` seconds and a fraction
+``error_rate`` of requests fails with a 500 (transiently: retries of the
+same URL draw again), using a seeded RNG so runs are comparable.
+
+The server runs on its own event loop in a background thread, so it can
+serve Scrapy, asyncio and ASGI clients alike and its CPU time is kept out
+of the measurements of client processes.
+"""
+
+import asyncio
+import random
+import threading
+
+from aiohttp import web
+
+RATINGS = ("One", "Two", "Three", "Four", "Five")
+CATEGORIES = ("Fiction", "Poetry", "History", "Science", "Travel")
+
+
+def listing_html(page, pages, per_page):
+    articles = "".join(
+        f"""
+      <article class="product_pod">
+        <div class="image_container">
+          <a href="book-{page}-{i}/index.html">
+            <img src="../media/cache/{page}-{i}.jpg" alt="Book {page}-{i}">
+          </a>
+        </div>
+        <p class="star-rating {RATINGS[(page + i) % 5]}"></p>
+        <h3>
+          <a href="book-{page}-{i}/index.html" title="Book {page}-{i}"
+            >Book {page}-{i}</a>
+        </h3>
+        <div class="product_price">
+          <p class="price_color">£{10 + (page * per_page + i) % 50}.{i % 100:02d}</p>
+          <p class="instock availability">In stock</p>
+        </div>
+      </article>"""
+        for i in range(per_page)
+    )
+    pager = (
+        f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+        if page < pages
+        else ""
+    )
+    return (
+        "<!DOCTYPE html><html>"
+        "<head><title>All products | Books to Scrape</title></head>"
+        f'<body><section><ol class="row">{articles}</ol>'
+        f'<ul class="pager"><li class="current">Page {page} of {pages}</li>'
+        f"{pager}</ul>"
+        "</section></body></html>"
+    )
+
+
+def product_html(page, i, per_page):
+    n = page * per_page + i
+    price = f"{10 + n % 50}.{i % 100:02d}"
+    category = CATEGORIES[n % len(CATEGORIES)]
+    description = " ".join(f"Sentence {k} about book {page}-{i}." for k in range(20))
+    return f"""<!DOCTYPE html>
+<html>
+  <head><title>Book {page}-{i} | Books to Scrape</title></head>
+  <body>
+    <ul class="breadcrumb">
+      <li><a href="/">Home</a></li>
+      <li><a href="/catalogue/">Books</a></li>
+      <li><a href="/catalogue/category/{category.lower()}/">{category}</a></li>
+      <li class="active">Book {page}-{i}</li>
+    </ul>
+    <div class="product_main">
+      <h1>Book {page}-{i}</h1>
+      <p class="price_color">£{price}</p>
+      <p class="instock availability">In stock ({n % 20 + 1} available)</p>
+      <p class="star-rating {RATINGS[n % 5]}"></p>
+    </div>
+    <div class="item active">
+      <img src="/media/cache/{page}-{i}.jpg" alt="Book {page}-{i}">
+    </div>
+    <div id="product_description" class="sub-header">
+      <h2>Product Description</h2>
+    </div>
+    <p>{description}</p>
+    <table class="table table-striped">
+      <tr><th>UPC</th><td>{n:016x}</td></tr>
+      <tr><th>Product Type</th><td>Books</td></tr>
+      <tr><th>Price (excl. tax)</th><td>£{price}</td></tr>
+      <tr><th>Price (incl. tax)</th><td>£{price}</td></tr>
+      <tr><th>Tax</th><td>£0.00</td></tr>
+      <tr><th>Availability</th><td>In stock ({n % 20 + 1} available)</td></tr>
+      <tr><th>Number of reviews</th><td>{n % 7}</td></tr>
+    </table>
+  </body>
+</html>"""
+
+
+def product_urls(base_url, pages, per_page):
+    """The URL of every product page of a site of this shape."""
+    return [
+        f"{base_url}/catalogue/book-{page}-{i}/index.html"
+        for page in range(1, pages + 1)
+        for i in range(per_page)
+    ]
+
+
+class SyntheticSite:
+    """Serve a synthetic catalogue from a background thread."""
+
+    def __init__(
+        self,
+        pages=50,
+        per_page=20,
+        latency=0.0,
+        error_rate=0.0,
+        seed=0,
+        host="127.0.0.1",
+    ):
+        self.pages = pages
+        self.per_page = per_page
+        self.latency = latency
+        self.error_rate = error_rate
+        self.host = host
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self.port = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def start_url(self):
+        return f"{self.base_url}/catalogue/page-1.html"
+
+    @property
+    def expected_items(self):
+        return self.pages * self.per_page
+
+    def product_urls(self):
+        return product_urls(self.base_url, self.pages, self.per_page)
+
+    async def _respond(self, render):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=500, text="synthetic error")
+        return web.Response(text=render(), content_type="text/html")
+
+    async def listing(self, request):
+        page = int(request.match_info["page"])
+        if not 1 <= page <= self.pages:
+            raise web.HTTPNotFound()
+        return await self._respond(
+            lambda: listing_html(page, self.pages, self.per_page)
+        )
+
+    async def product(self, request):
+        page, i = int(request.match_info["page"]), int(request.match_info["i"])
+        if not (1 <= page <= self.pages and 0 <= i < self.per_page):
+            raise web.HTTPNotFound()
+        return await self._respond(lambda: product_html(page, i, self.per_page))
+
+    async def _start(self):
+        app = web.Application()
+        app.router.add_get("/catalogue/page-{page:\\d+}.html", self.listing)
+        app.router.add_get(
+            "/catalogue/book-{page:\\d+}-{i:\\d+}/index.html", self.product
+        )
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, 0, backlog=1024)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self._start())
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="synthetic-site", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
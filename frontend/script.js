@@ -1,41 +1,198 @@
-document.getElementById('start-scraping').addEventListener('click', async () => {
-    const response = await fetch('http://127.0.0.1:8000/start-scraping', {
-        method: 'POST'
-    });
-    const result = await response.json();
-    alert(result.message);
-});
+const API_BASE = 'http://127.0.0.1:8000';
+const TERMINAL_STATES = ['finished', 'failed', 'cancelled'];
 
-async function fetchData() {
-    const response = await fetch('http://127.0.0.1:8000/data');
-    const data = await response.json();
+// Results are paged from /data and rendered as a virtual list: only the rows
+// in view (plus OVERSCAN above and below) exist in the DOM.
+const PAGE_SIZE = 200;
+const PAGE_FIELDS = 'title,price,category,star_rating';
+const ROW_HEIGHT = 36;  // must match `#data-list .list-group-item` in index.html
+const OVERSCAN = 10;
 
-    const dataList = document.getElementById('data-list');
-    dataList.innerHTML = '';
+const inputsDiv = document.getElementById('inputs');
+const addUrlButton = document.getElementById('add-url');
+const startScrapingButton = document.getElementById('start-scraping');
+const statusList = document.getElementById('status-list');
+const dataViewport = document.getElementById('data-viewport');
+const dataSpacer = document.getElementById('data-spacer');
+const dataList = document.getElementById('data-list');
+const itemCount = document.getElementById('item-count');
 
-    data.data.forEach(item => {
+const rows = [];
+let lastId = null;  // id of the last loaded row: the cursor for the next page
+let hasMore = true;
+let loading = null;
+let newRows = false;  // jobs stored rows past `lastId` since the last request
+let renderQueued = false;
+let renderedRange = [-1, -1];
+
+function describeItem(item) {
+    if (!item.title) {
+        return JSON.stringify(item);
+    }
+    const details = [
+        item.price != null ? `£${item.price}` : null,
+        item.category,
+        item.star_rating ? `${item.star_rating}★` : null,
+    ];
+    return [item.title, ...details.filter(Boolean)].join(' · ');
+}
+
+function render() {
+    renderQueued = false;
+    const first = Math.max(0, Math.floor(dataViewport.scrollTop / ROW_HEIGHT) - OVERSCAN);
+    const visible = Math.ceil(dataViewport.clientHeight / ROW_HEIGHT) + 2 * OVERSCAN;
+    const last = Math.min(rows.length, first + visible);
+    dataSpacer.style.height = `${rows.length * ROW_HEIGHT}px`;
+    itemCount.textContent = hasMore ? `${rows.length}+` : rows.length;
+    if (first === renderedRange[0] && last === renderedRange[1]) {
+        return;
+    }
+    renderedRange = [first, last];
+
+    const fragment = document.createDocumentFragment();
+    for (let i = first; i < last; i++) {
         const li = document.createElement('li');
-        li.textContent = JSON.stringify(item);
-        dataList.appendChild(li);
-    });
+        li.className = 'list-group-item';
+        li.textContent = describeItem(rows[i]);
+        fragment.appendChild(li);
+    }
+    dataList.style.transform = `translateY(${first * ROW_HEIGHT}px)`;
+    dataList.replaceChildren(fragment);
+}
+
+function scheduleRender() {
+    if (!renderQueued) {
+        renderQueued = true;
+        requestAnimationFrame(render);
+    }
+}
+
+function appendItems(items) {
+    rows.push(...items);
+    scheduleRender();
+}
+
+// Fetch the next page of /data, one request at a time.
+function fetchPage() {
+    if (!loading && hasMore) {
+        const params = new URLSearchParams({ limit: PAGE_SIZE, fields: PAGE_FIELDS });
+        if (lastId !== null) {
+            params.set('cursor', lastId);
+        }
+        newRows = false;
+        loading = fetch(`${API_BASE}/data?${params}`)
+            .then(response => response.json())
+            .then(page => {
+                if (page.data.length) {
+                    lastId = page.data[page.data.length - 1].id;
+                }
+                hasMore = page.next_cursor !== null || newRows;
+                appendItems(page.data);
+                loading = null;
+                fillViewport();
+            })
+            .catch(() => {
+                // Retried on the next scroll.
+                loading = null;
+            });
+    }
+    return loading;
 }
 
-// Fetch data on page load
-fetchData();
+// Load further pages while fewer than two screens of rows remain below.
+function fillViewport() {
+    const remaining = rows.length * ROW_HEIGHT - dataViewport.scrollTop - dataViewport.clientHeight;
+    if (hasMore && remaining < 2 * dataViewport.clientHeight) {
+        fetchPage();
+    }
+}
+
+dataViewport.addEventListener('scroll', () => {
+    scheduleRender();
+    fillViewport();
+}, { passive: true });
 
-document.getElementById('scraping-form').addEventListener('submit', async (event) => {
-    event.preventDefault();
+function describeJob(job) {
+    return `${job.url}: ${job.state}, ${job.pages_fetched} pages (${job.pages_per_second}/s), `
+        + `${job.items_scraped} items (${job.items_per_second}/s), ${job.errors} errors`;
+}
 
-    const urlInput = document.getElementById('url-input').value;
+// A job stored new rows: page on from the last loaded one. Rows are keyed by
+// id, which upserts keep, so nothing is listed twice and items left out of a
+// capped event (`dropped`) are still reached.
+function refreshData() {
+    newRows = true;
+    hasMore = true;
+    scheduleRender();
+    fillViewport();
+}
 
-    const response = await fetch('http://127.0.0.1:8000/start-scraping', {
-        method: 'POST',
-        headers: {
-            'Content-Type': 'application/json',
-        },
-        body: JSON.stringify({ url: urlInput }),
+// Follow a queued job over Server-Sent Events until it reaches a final state.
+function watchJob(job, listItem) {
+    const source = new EventSource(`${API_BASE}/jobs/${job.job_id}/events`);
+    const update = event => {
+        const current = JSON.parse(event.data);
+        listItem.textContent = describeJob(current);
+        return current;
+    };
+
+    source.addEventListener('progress', update);
+    // The event's items are a capped sample; the stored rows are the truth.
+    source.addEventListener('items', refreshData);
+    source.addEventListener('state', event => {
+        const current = update(event);
+        if (TERMINAL_STATES.includes(current.state)) {
+            source.close();
+            // The worker flushes its pipelines before the final state.
+            refreshData();
+            listItem.classList.add(
+                current.state === 'finished' ? 'list-group-item-success' : 'list-group-item-danger'
+            );
+        }
     });
+}
+
+async function startScraping(url) {
+    const listItem = document.createElement('li');
+    listItem.className = 'list-group-item';
+    listItem.textContent = `Queueing: ${url}`;
+    statusList.appendChild(listItem);
+
+    try {
+        const response = await fetch(`${API_BASE}/start-scraping`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ url }),
+        });
+        if (!response.ok) {
+            listItem.textContent = `Failed: ${url}`;
+            listItem.classList.add('list-group-item-danger');
+            return;
+        }
+        const job = await response.json();
+        listItem.textContent = describeJob(job);
+        watchJob(job, listItem);
+    } catch (error) {
+        listItem.textContent = `Error: ${url}`;
+        listItem.classList.add('list-group-item-warning');
+    }
+}
+
+addUrlButton.addEventListener('click', () => {
+    const input = document.createElement('input');
+    input.type = 'text';
+    input.placeholder = 'Enter URL';
+    input.className = 'form-control mb-2 url-input';
+    inputsDiv.appendChild(input);
+});
+
+startScrapingButton.addEventListener('click', () => {
+    const urls = Array.from(document.querySelectorAll('.url-input'))
+        .map(input => input.value.trim())
+        .filter(url => url);
+    statusList.innerHTML = '';
+    urls.forEach(startScraping);
+});
 
-    const result = await response.json();
-    alert(result.message);
-});
\ No newline at end of file
+// Page in existing results on load; new items arrive as job events.
+fetchPage();
@@ -7,4 +7,4 @@ imports elsewhere in the repository.
 
 from web_scraper_project.middlewares import *  # noqa: F401,F403
 
-__all__ = ["ProxyMiddleware"]
+__all__ = ["HttpCacheMiddleware", "ProxyMiddleware"]
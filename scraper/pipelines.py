@@ -7,4 +7,4 @@ backwards compatibility for imports in tests and other modules.
 
 from web_scraper_project.pipelines import *  # noqa: F401,F403
 
-__all__ = ["JsonLinesPipeline", "SQLitePipeline"]
+__all__ = ["SerializationPipeline", "JsonLinesPipeline", "SQLitePipeline"]
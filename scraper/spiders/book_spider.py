@@ -5,91 +5,501 @@ including description, availability, ISBN, and more. It handles both catalog
 listing pages and individual product pages.
 """
 
+import argparse
 import asyncio
-import aiohttp
-from aiohttp import ClientSession
+import itertools
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-from books.items import ProductItem
+import scrapy
+
+from scraper.items import ProductItem
+from web_scraper_project import pipelines
+from web_scraper_project import settings as project_settings
+from web_scraper_project.checkpoint import CrawlCheckpoint
+from web_scraper_project.dedup import SQLiteSeenSet, make_seen_set
+from web_scraper_project.engine import load_pipelines, process_item
+from web_scraper_project.extraction import extract_listing, extract_product
+from web_scraper_project.httpcache import ResponseCache, cached_get
+from web_scraper_project.incremental import ContentIndex, content_hash
+from web_scraper_project.middlewares import HttpCacheMiddleware
+from web_scraper_project.sessions import SessionPool
+
+logger = logging.getLogger(__name__)
+
+
+# Parse pools shared by every crawl in this process, by worker count.
+_parse_executors = {}
+
+
+def parse_executor(workers):
+    """Return this process's pool of `workers` parse processes.
+
+    The pool is created on first use and reused by later crawls, so they do
+    not pay for starting workers. Its processes are spawned rather than
+    forked, as the API process runs threads a forked child must not
+    inherit.
+    """
+    executor = _parse_executors.get(workers)
+    # A pool whose worker died is unusable; replace it.
+    if executor is None or executor._broken:
+        executor = _parse_executors[workers] = ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return executor
+
+
+def _flag(value):
+    if isinstance(value, str):
+        return value.lower() in ("1", "true", "yes")
+    return bool(value)
+
+
+class BookSpider(scrapy.Spider):
+    """Scrapy spider following listing pages to their product pages.
+
+    Run with ``-a incremental=1`` to skip product pages whose content has
+    not changed since the last crawl (see `web_scraper_project.incremental`).
+    """
+
+    name = "book_spider"
+    allowed_domains = ["books.toscrape.com"]
+    start_urls = ["http://books.toscrape.com/"]
+
+    def __init__(self, *args, incremental=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if incremental is None:
+            incremental = project_settings.INCREMENTAL_CRAWL
+        self.incremental = _flag(incremental)
+        self._content_index = None
+
+    @property
+    def content_index(self):
+        if self._content_index is None:
+            self._content_index = ContentIndex().open()
+        return self._content_index
+
+    def closed(self, reason):
+        if self._content_index is not None:
+            self._content_index.close()
+
+    def parse(self, response):
+        listing = extract_listing(
+            response.body, response.url, encoding=response.encoding
+        )
+        for product in listing["products"]:
+            if product["url"]:
+                meta = {
+                    "listing_price": product["listing_price"],
+                    "image_url": product["image_url"],
+                }
+                yield scrapy.Request(
+                    product["url"], callback=self.parse_product, meta=meta
+                )
+            else:
+                # Nothing to follow: keep what the listing itself shows.
+                yield ProductItem(
+                    title=product["title"], price=product["listing_price"]
+                )
+        for next_url in listing["next_pages"]:
+            yield scrapy.Request(next_url, callback=self.parse)
+
+    def parse_product(self, response):
+        if self.incremental and HttpCacheMiddleware.FLAG in response.flags:
+            # Unchanged since the last crawl; its item is already stored.
+            # Other crawls rewrite their output, so they re-parse the body.
+            self.content_index.seen(response.url)
+            return
+        digest = content_hash(response.body)
+        if self.incremental and self.content_index.unchanged(response.url, digest):
+            self.content_index.seen(response.url)
+            return
+        try:
+            meta = response.meta
+        except AttributeError:
+            # Responses built outside the engine are not tied to a request.
+            meta = {}
+        fields = extract_product(
+            response.body, response.url, meta, encoding=response.encoding
+        )
+        yield ProductItem(content_hash=digest, **fields)
 
 
 class AsyncBookSpider:
-    def __init__(self):
-        self.start_urls = ["http://books.toscrape.com/"]
+    """Crawl listing pages and their product pages with a pool of workers.
 
-    async def fetch(self, url, session):
-        async with session.get(url) as response:
-            return await response.text()
+    URLs wait in a priority frontier where product pages outrank listing
+    pages, so workers drain the products of a listing before paginating
+    further and the frontier stays around one listing's worth of URLs.
+    Scraped items are handed to the consumer of `crawl()` through a queue of
+    `item_buffer` entries, which pushes back on the workers when the
+    consumer (e.g. the item pipelines) falls behind.
 
-    async def parse_listing(self, html, session):
-        """Parse the listing page and extract product URLs."""
-        # Example: Use BeautifulSoup or another parser to extract links
-        pass
+    With `parse_workers` set, page bodies are parsed in a process pool of
+    that many workers instead of on the event loop; at most `parse_backlog`
+    pages wait for a parse worker at a time, so fetch workers block rather
+    than pile up bodies when parsing falls behind. The pool is shared by
+    every crawl in the process (see `parse_executor`) unless `executor`
+    is given.
 
-    async def parse_product(self, html):
-        """Parse the product page and extract details."""
-        item = ProductItem()
-
-        # Basic Information
-        item['title'] = response.css(".product_main h1::text").get()
-        item['price'] = response.meta.get('listing_price')
-        item['description'] = response.css("#product_description + p::text").get()
-        item['url'] = response.url
-        item['image_url'] = response.meta.get('image_url')
-        item['scrape_date'] = datetime.utcnow().isoformat()
-
-        # Extract product information from table
-        rows = response.css("table tr")
-        info_map = {
-            'UPC': 'upc',
-            'Product Type': 'product_type',
-            'Price (excl. tax)': 'price_excl_tax',
-            'Price (incl. tax)': 'price_incl_tax',
-            'Tax': 'tax',
-            'Availability': 'availability',
-            'Number of reviews': 'number_of_reviews'
+    Pages are fetched through a `ResponseCache` (the shared on-disk one
+    unless `cache` is given, and none with ``HTTP_CACHE_ENABLED`` off).
+    Pages the server reports as unchanged are parsed from the cached body.
+
+    With `incremental` set, unchanged product pages are only recorded as
+    seen instead, as are product pages whose content hash matches the one
+    stored for their URL (`stats["unchanged"]`).
+
+    Scheduled URLs are deduplicated through `seen`, any seen-set from
+    `web_scraper_project.dedup`; by default one of the configured
+    ``SEEN_SET`` kind is built for each crawl.
+
+    With a `job_dir`, the frontier is checkpointed there (see
+    `web_scraper_project.checkpoint`) and deduplicated through an on-disk
+    seen-set; `resume` picks an interrupted crawl up where it stopped.
+    A page counts as finished once its links are scheduled or its item has
+    been taken by the consumer, so nothing in flight is lost on a crash.
+    A consumer that buffers items passes `flush` to `crawl`; product pages
+    then count as finished only once `flush` has stored their items.
+    """
+
+    name = "async_book_spider"
+
+    PRODUCT = 0
+    LISTING = 1
+
+    def __init__(
+        self,
+        start_urls=None,
+        concurrency=None,
+        max_pages=None,
+        item_buffer=None,
+        parse_workers=None,
+        parse_backlog=None,
+        executor=None,
+        cache=None,
+        incremental=None,
+        seen=None,
+        job_dir=None,
+        resume=False,
+    ):
+        self.start_urls = list(start_urls or ["http://books.toscrape.com/"])
+        self.concurrency = concurrency or project_settings.ASYNC_SPIDER_CONCURRENCY
+        self.max_pages = max_pages
+        self.item_buffer = item_buffer or project_settings.ASYNC_SPIDER_ITEM_BUFFER
+        if parse_workers is None:
+            parse_workers = project_settings.ASYNC_SPIDER_PARSE_WORKERS
+        self.parse_workers = parse_workers
+        self.parse_backlog = (
+            parse_backlog
+            or project_settings.ASYNC_SPIDER_PARSE_BACKLOG
+            or 2 * max(parse_workers, 1)
+        )
+        self.executor = executor
+        self.cache = cache
+        self.incremental = (
+            incremental
+            if incremental is not None
+            else project_settings.INCREMENTAL_CRAWL
+        )
+        self.seen = seen
+        self.job_dir = job_dir
+        self.resume = resume
+        self.stats = {
+            "pages_fetched": 0,
+            "items_scraped": 0,
+            "errors": 0,
+            "not_modified": 0,
+            "unchanged": 0,
+            "items_dropped": 0,
+            "item_errors": 0,
+            "elapsed": 0.0,
+            "pages_per_second": 0.0,
         }
-        
-        for row in rows:
-            header = row.css("th::text").get()
-            if header in info_map:
-                item[info_map[header]] = row.css("td::text").get()
-
-        # Categories
-        breadcrumbs = response.css(".breadcrumb li:not(:first-child) a::text").getall()
-        item['category'] = breadcrumbs[-1] if breadcrumbs else None
-
-        # Star Rating
-        star_class = response.css(".star-rating::attr(class)").get()
-        if star_class:
-            rating_text = star_class.split()[-1]
-            item['star_rating'] = self.RATINGS_MAP.get(rating_text)
-
-        # Clean up availability to extract number
-        if item.get('availability'):
-            stock_text = item['availability']
-            stock_match = re.search(r'\d+', stock_text)
-            if stock_match:
-                item['availability'] = int(stock_match.group())
-
-        # Clean up prices to remove currency symbols and convert to float
-        for price_field in ['price', 'price_excl_tax', 'price_incl_tax', 'tax']:
-            if item.get(price_field):
-                price_str = item[price_field]
-                price_match = re.search(r'[\d.]+', price_str)
-                if price_match:
-                    item[price_field] = float(price_match.group())
-
-        yield item
 
-    async def scrape(self):
-        async with ClientSession() as session:
-            tasks = []
+    async def fetch(self, url, session, cache=None):
+        """Return a `CachedResponse`; ``not_modified`` is set on a 304."""
+        return await cached_get(session, url, cache)
+
+    def parse_listing(self, body, url):
+        """Parse a listing page.
+
+        Returns ``(products, next_pages)`` where `products` is a list of
+        ``(product_url, meta)`` pairs carrying the listing price and image.
+        """
+        return self.listing_links(extract_listing(body, url))
+
+    @staticmethod
+    def listing_links(listing):
+        """Turn an `extract_listing` result into ``(products, next_pages)``."""
+        products = []
+        for product in listing["products"]:
+            if product["url"]:
+                meta = {
+                    "listing_price": product["listing_price"],
+                    "image_url": product["image_url"],
+                }
+                products.append((product["url"], meta))
+        return products, listing["next_pages"]
+
+    def parse_product(self, body, url, meta=None):
+        """Parse the product page and extract details."""
+        return ProductItem(**extract_product(body, url, meta))
+
+    async def crawl(self, session=None, flush=None):
+        """Yield items scraped from the start URLs and everything they link to.
+
+        Pass the application's shared session to reuse its pooled
+        connections; when `session` is omitted a `SessionPool` is opened for
+        the duration of the crawl.
+
+        When checkpointing, `flush` is called with no arguments to make the
+        items consumed so far durable (every ``CHECKPOINT_INTERVAL`` seconds
+        and once the crawl completes) before their pages are logged as done.
+        """
+        pool = None
+        if session is None:
+            pool = SessionPool()
+            session = await pool.start()
+
+        cache = self.cache
+        if cache is None and project_settings.HTTP_CACHE_ENABLED:
+            cache = ResponseCache().open()
+        index = ContentIndex().open() if self.incremental else None
+
+        executor = self.executor
+        if executor is None and self.parse_workers:
+            executor = parse_executor(self.parse_workers)
+        parse_slots = asyncio.Semaphore(self.parse_backlog)
+        loop = asyncio.get_running_loop()
+
+        async def parse(extract, *args):
+            if executor is None:
+                return extract(*args)
+            async with parse_slots:
+                return await loop.run_in_executor(executor, extract, *args)
+
+        checkpoint = None
+        seen = self.seen
+        if self.job_dir:
+            checkpoint = CrawlCheckpoint(self.job_dir).open(resume=self.resume)
+            if seen is None:
+                seen = SQLiteSeenSet(path=checkpoint.seen_path, resume=self.resume)
+        if seen is None:
+            seen = make_seen_set()
+
+        frontier = asyncio.PriorityQueue()
+        items = asyncio.Queue(maxsize=self.item_buffer)
+        scheduled = len(seen)
+        order = itertools.count()
+        done = object()
+
+        def finish(url):
+            if checkpoint is not None:
+                checkpoint.done(url)
+                checkpoint.maybe_snapshot(self.stats)
+
+        # Pages whose items the consumer took but may not have stored yet.
+        unflushed = []
+        last_flush = time.monotonic()
+
+        def flush_items():
+            nonlocal last_flush
+            flush()
+            last_flush = time.monotonic()
+            for url in unflushed:
+                checkpoint.done(url)
+            unflushed.clear()
+            checkpoint.maybe_snapshot(self.stats)
+
+        def consumed(url):
+            if checkpoint is None or flush is None:
+                finish(url)
+                return
+            unflushed.append(url)
+            if time.monotonic() - last_flush >= checkpoint.interval:
+                flush_items()
+
+        def schedule(priority, url, meta=None):
+            nonlocal scheduled
+            if self.max_pages is not None and scheduled >= self.max_pages:
+                return
+            if not seen.add(url):
+                return
+            scheduled += 1
+            frontier.put_nowait((priority, next(order), url, meta))
+            if checkpoint is not None:
+                checkpoint.add(priority, url, meta)
+
+        async def worker():
+            while True:
+                priority, _seq, url, meta = await frontier.get()
+                handed_off = False
+                try:
+                    response = await self.fetch(url, session, cache)
+                    self.stats["pages_fetched"] += 1
+                    if response.not_modified:
+                        self.stats["not_modified"] += 1
+                    if priority == self.LISTING:
+                        listing = await parse(extract_listing, response.body, url)
+                        products, next_pages = self.listing_links(listing)
+                        for product_url, product_meta in products:
+                            schedule(self.PRODUCT, product_url, product_meta)
+                        for next_url in next_pages:
+                            schedule(self.LISTING, next_url)
+                    elif response.not_modified and index is not None:
+                        index.seen(url)
+                    else:
+                        digest = content_hash(response.body)
+                        if index is not None and index.unchanged(url, digest):
+                            self.stats["unchanged"] += 1
+                            index.seen(url)
+                        else:
+                            fields = await parse(
+                                extract_product, response.body, url, meta
+                            )
+                            await items.put(
+                                (url, ProductItem(content_hash=digest, **fields))
+                            )
+                            handed_off = True
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    self.stats["errors"] += 1
+                    logger.exception("Failed to crawl %s", url)
+                finally:
+                    frontier.task_done()
+                if not handed_off:
+                    finish(url)
+
+        async def watch():
+            await frontier.join()
+            await items.put(done)
+
+        if checkpoint is not None and checkpoint.resumed:
+            for key in (
+                "pages_fetched",
+                "items_scraped",
+                "errors",
+                "not_modified",
+                "unchanged",
+            ):
+                self.stats[key] = checkpoint.stats.get(key, 0)
+            for url, (priority, meta) in checkpoint.pending.items():
+                # Pages added since the last seen-set commit are marked again.
+                seen.add(url)
+                frontier.put_nowait((priority, next(order), url, meta))
+            logger.info("Resuming crawl with %d pending pages", len(checkpoint.pending))
+        else:
             for url in self.start_urls:
-                tasks.append(self.fetch(url, session))
-            responses = await asyncio.gather(*tasks)
-            for html in responses:
-                await self.parse_listing(html, session)
+                schedule(self.LISTING, url)
+
+        started = time.monotonic()
+        completed = False
+        tasks = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        tasks.append(asyncio.create_task(watch()))
+        try:
+            while True:
+                entry = await items.get()
+                if entry is done:
+                    completed = True
+                    break
+                url, item = entry
+                self.stats["items_scraped"] += 1
+                yield item
+                consumed(url)
+            if unflushed:
+                flush_items()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            self._finish_stats(started)
+            if cache is not None and cache is not self.cache:
+                cache.close()
+            if index is not None:
+                index.close()
+            if seen is not self.seen:
+                seen.close()
+            if checkpoint is not None:
+                checkpoint.close(self.stats, finished=completed)
+            if pool is not None:
+                await pool.close()
+
+    def _finish_stats(self, started):
+        elapsed = time.monotonic() - started
+        self.stats["elapsed"] = elapsed
+        self.stats["pages_per_second"] = (
+            self.stats["pages_fetched"] / elapsed if elapsed else 0.0
+        )
+        logger.info(
+            "Crawled %d pages (%d items, %d errors) in %.2fs: %.1f pages/s",
+            self.stats["pages_fetched"],
+            self.stats["items_scraped"],
+            self.stats["errors"],
+            elapsed,
+            self.stats["pages_per_second"],
+        )
+
+    async def scrape(self):
+        return [item async for item in self.crawl()]
+
+    async def run(self, item_pipelines=None):
+        """Crawl, feeding every item through `item_pipelines`.
+
+        `item_pipelines` defaults to the project's ``ITEM_PIPELINES``, opened
+        for this crawl and closed when it ends. Items are handled as the
+        `CrawlEngine` handles them (see `engine.process_item`); returns the
+        number that made it through every pipeline.
+        """
+        if item_pipelines is None:
+            item_pipelines = load_pipelines()
+        for pipeline in item_pipelines:
+            if hasattr(pipeline, "open_spider"):
+                pipeline.open_spider(self)
+        def flush():
+            for pipeline in item_pipelines:
+                if hasattr(pipeline, "flush"):
+                    pipeline.flush()
+
+        stored = 0
+        try:
+            async for item in self.crawl(flush=flush):
+                if process_item(item_pipelines, item, self) is not None:
+                    stored += 1
+        finally:
+            for pipeline in item_pipelines:
+                if hasattr(pipeline, "close_spider"):
+                    pipeline.close_spider(self)
+        return stored
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Crawl books.toscrape.com with AsyncBookSpider."
+    )
+    parser.add_argument("start_urls", nargs="*", help="listing pages to start from")
+    parser.add_argument(
+        "--job-dir",
+        help="directory the crawl is checkpointed to (default: data/jobs/<spider>)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the crawl checkpointed in --job-dir",
+    )
+    args = parser.parse_args(argv)
+    job_dir = args.job_dir or os.path.join(
+        pipelines.DATA_DIR, "jobs", AsyncBookSpider.name
+    )
+    spider = AsyncBookSpider(
+        start_urls=args.start_urls, job_dir=job_dir, resume=args.resume
+    )
+    asyncio.run(spider.run())
+
 
 if __name__ == "__main__":
-    spider = AsyncBookSpider()
-    asyncio.run(spider.scrape())
+    main()
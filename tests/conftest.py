@@ -0,0 +1,17 @@
+import pytest
+
+from web_scraper_project import settings as project_settings
+
+
+@pytest.fixture(autouse=True)
+def no_rate_limit(monkeypatch):
+    # Crawls against the local test sites would otherwise be paced at the
+    # production start rate; tests exercising the limiter build their own.
+    monkeypatch.setattr(project_settings, "RATE_LIMIT_ENABLED", False)
+
+
+@pytest.fixture(autouse=True)
+def no_job_workers(monkeypatch):
+    # The API would otherwise spawn crawl worker processes on startup; tests
+    # of the job queue start their own pool.
+    monkeypatch.setattr(project_settings, "JOB_QUEUE_WORKERS", 0)
@@ -0,0 +1,126 @@
+"""Tests for the FastAPI endpoints."""
+
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as app_module
+from web_scraper_project.pipelines import SQLitePipeline
+
+from .test_store import make_product
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    pipeline = SQLitePipeline()
+    pipeline.open_spider(None)
+    for i in range(5):
+        pipeline.process_item(make_product(i), None)
+    pipeline.close_spider(None)
+    with TestClient(app_module.app) as client:
+        yield client
+
+
+def test_data_pages_with_cursor(client):
+    first = client.get("/data", params={"limit": 3}).json()
+    assert len(first["data"]) == 3
+    second = client.get(
+        "/data", params={"limit": 3, "cursor": first["next_cursor"]}
+    ).json()
+    assert len(second["data"]) == 2
+    assert second["next_cursor"] is None
+
+
+def test_data_filters_and_fields(client):
+    response = client.get("/data", params={"category": "Poetry", "fields": "upc"})
+    assert response.status_code == 200
+    assert response.json()["data"] == [
+        {"id": 2, "upc": "UPC0001"},
+        {"id": 4, "upc": "UPC0003"},
+    ]
+
+
+def test_data_ndjson(client):
+    response = client.get("/data", params={"format": "ndjson", "fields": "title"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["title"] for line in lines] == [f"Book {i}" for i in range(5)]
+
+
+def test_data_rejects_unknown_fields(client):
+    assert client.get("/data", params={"fields": "secret"}).status_code == 400
+
+
+def test_download_csv(client):
+    response = client.get("/download", params={"format": "csv", "fields": "upc,price"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert 'filename="products.csv"' in response.headers["content-disposition"]
+    lines = response.text.splitlines()
+    assert lines[0] == "id,upc,price"
+    assert len(lines) == 6
+
+
+def test_download_gzip_json(client):
+    response = client.get("/download", params={"format": "json", "gzip": "true"})
+    assert response.headers["content-type"] == "application/gzip"
+    rows = json.loads(gzip.decompress(response.content))
+    assert [row["upc"] for row in rows] == [f"UPC{i:04d}" for i in range(5)]
+
+
+def test_download_rejects_csv_from_jsonl(client):
+    response = client.get("/download", params={"format": "csv", "source": "jsonl"})
+    assert response.status_code == 400
+
+
+def test_start_scraping_queues_jobs(client):
+    response = client.post(
+        "/start-scraping", json={"url": "http://example.com/", "priority": 2}
+    )
+    assert response.status_code == 202
+    job = response.json()
+    assert job["state"] == "pending"
+    assert job["priority"] == 2
+
+    status = client.get(f"/jobs/{job['job_id']}").json()
+    assert status["url"] == "http://example.com/"
+    assert status["pages_per_second"] == 0.0
+    assert [
+        j["job_id"]
+        for j in client.get("/jobs", params={"state": "pending"}).json()["jobs"]
+    ] == [job["job_id"]]
+
+    assert client.delete(f"/jobs/{job['job_id']}").json()["state"] == "cancelled"
+    assert client.delete(f"/jobs/{job['job_id']}").status_code == 404
+    assert client.get("/jobs/missing").status_code == 404
+
+
+def test_job_events_stream(client):
+    job = client.post("/start-scraping", json={"url": "http://example.com/"}).json()
+    client.delete(f"/jobs/{job['job_id']}")
+    with client.stream("GET", f"/jobs/{job['job_id']}/events") as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+    assert body.count("event: state") == 2
+    assert '"state": "cancelled"' in body
+
+    with client.stream(
+        "GET", f"/jobs/{job['job_id']}/events", headers={"Last-Event-ID": "1"}
+    ) as response:
+        assert "".join(response.iter_text()).count("event: state") == 1
+    assert client.get("/jobs/missing/events").status_code == 404
+
+
+def test_data_serves_frontend_pages(client):
+    # frontend/script.js pages through /data with these fields.
+    params = {"limit": 2, "fields": "title,price,category,star_rating"}
+    page = client.get("/data", params=params).json()
+    assert list(page["data"][0]) == ["id", "title", "price", "category", "star_rating"]
+    rest = client.get(
+        "/data", params={**params, "cursor": page["next_cursor"], "limit": 200}
+    ).json()
+    assert len(page["data"]) + len(rest["data"]) == 5
+    assert rest["next_cursor"] is None
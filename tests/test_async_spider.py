@@ -0,0 +1,226 @@
+"""Tests for the AsyncBookSpider crawl loop against a local site."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from aiohttp import web
+
+from scraper.spiders.book_spider import AsyncBookSpider, parse_executor
+from web_scraper_project import settings as project_settings
+from web_scraper_project.dedup import BloomSeenSet
+from web_scraper_project.items import ProductItem
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PRODUCT_HTML = (FIXTURES / "product.html").read_text(encoding="utf-8")
+
+ETAG = '"v1"'
+
+PAGES = 3
+PER_PAGE = 4
+
+
+def listing_html(page):
+    articles = "".join(
+        f"""
+        <article class="product_pod">
+          <h3><a href="book-{page}-{i}/index.html" title="Book">Book</a></h3>
+          <div class="image_container"><img src="/media/{page}-{i}.jpg" /></div>
+          <p class="price_color">£{page}.{i}0</p>
+        </article>
+        """
+        for i in range(PER_PAGE)
+    )
+    pager = (
+        f'<li class="next"><a href="page-{page + 1}.html">next</a></li>'
+        if page < PAGES
+        else ""
+    )
+    # Every listing links back to page 1 to exercise dedup.
+    articles += (
+        '<article class="product_pod">'
+        '<h3><a href="book-1-0/index.html">Dup</a></h3></article>'
+    )
+    return f"<html><body>{articles}<ul class='pager'>{pager}</ul></body></html>"
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    # Keep the spider's response cache out of the project's data directory.
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+
+
+async def start_site():
+    hits = []
+
+    async def listing(request):
+        hits.append(request.path)
+        page = int(request.match_info.get("page", 1))
+        return web.Response(text=listing_html(page), content_type="text/html")
+
+    async def product(request):
+        hits.append(request.path)
+        await asyncio.sleep(0.001)
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(
+            text=PRODUCT_HTML, content_type="text/html", headers={"ETag": ETAG}
+        )
+
+    app = web.Application()
+    app.router.add_get("/catalogue/page-1.html", listing)
+    app.router.add_get("/catalogue/page-{page}.html", listing)
+    app.router.add_get("/catalogue/{slug}/index.html", product)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/catalogue/page-1.html", hits
+
+
+def test_crawl_follows_pagination_and_products():
+    async def run():
+        runner, start_url, hits = await start_site()
+        try:
+            spider = AsyncBookSpider(start_urls=[start_url], concurrency=4)
+            items = await spider.scrape()
+        finally:
+            await runner.cleanup()
+        return spider, items, hits
+
+    spider, items, hits = asyncio.run(run())
+
+    assert len(items) == PAGES * PER_PAGE
+    assert all(isinstance(item, ProductItem) for item in items)
+    assert len(hits) == len(set(hits)) == PAGES + PAGES * PER_PAGE
+    assert spider.stats["pages_fetched"] == len(hits)
+    assert spider.stats["errors"] == 0
+    assert spider.stats["pages_per_second"] > 0
+
+    urls = {item["url"] for item in items}
+    assert any(url.endswith("/catalogue/book-2-3/index.html") for url in urls)
+    item = next(item for item in items if item["url"].endswith("book-1-2/index.html"))
+    assert item["price"] == 1.2
+    assert item["image_url"].endswith("/media/1-2.jpg")
+    assert item["upc"] == "A123456789"
+    assert item["availability"] == 5
+    assert item["star_rating"] == 3
+    assert item["category"] == "Fiction"
+
+
+def test_max_pages_caps_the_crawl():
+    async def run():
+        runner, start_url, hits = await start_site()
+        try:
+            spider = AsyncBookSpider(start_urls=[start_url], concurrency=2, max_pages=3)
+            items = await spider.scrape()
+        finally:
+            await runner.cleanup()
+        return items, hits
+
+    items, hits = asyncio.run(run())
+    assert len(hits) == 3
+    assert len(items) == 2
+
+
+def test_parse_in_process_pool():
+    async def run():
+        runner, start_url, hits = await start_site()
+        try:
+            spider = AsyncBookSpider(
+                start_urls=[start_url], concurrency=4, parse_workers=2, parse_backlog=1
+            )
+            items = await spider.scrape()
+        finally:
+            await runner.cleanup()
+        return spider, items
+
+    spider, items = asyncio.run(run())
+    assert len(items) == PAGES * PER_PAGE
+    assert spider.stats["errors"] == 0
+    item = next(item for item in items if item["url"].endswith("book-3-1/index.html"))
+    assert item["price"] == 3.1
+    assert item["category"] == "Fiction"
+
+
+def test_parse_pool_is_shared_across_crawls(monkeypatch):
+    monkeypatch.setattr(project_settings, "HTTP_CACHE_ENABLED", False)
+
+    executor = parse_executor(2)
+    assert parse_executor(2) is executor
+    assert executor._mp_context.get_start_method() == "spawn"
+
+    async def run():
+        runner, start_url, _hits = await start_site()
+        try:
+            for _ in range(2):
+                spider = AsyncBookSpider(
+                    start_urls=[start_url], concurrency=4, parse_workers=2
+                )
+                assert len(await spider.scrape()) == PAGES * PER_PAGE
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
+    assert parse_executor(2) is executor
+
+
+@pytest.mark.parametrize("incremental", [False, True])
+def test_recrawl_of_unchanged_products(incremental):
+    async def run():
+        runner, start_url, hits = await start_site()
+        try:
+            first = AsyncBookSpider(start_urls=[start_url], concurrency=4)
+            first_items = await first.scrape()
+            second = AsyncBookSpider(
+                start_urls=[start_url], concurrency=4, incremental=incremental
+            )
+            second_items = await second.scrape()
+        finally:
+            await runner.cleanup()
+        return first_items, second, second_items
+
+    first_items, second, second_items = asyncio.run(run())
+    assert len(first_items) == PAGES * PER_PAGE
+    # Listings carry no validators and are re-parsed; products all 304.
+    assert second.stats["not_modified"] == PAGES * PER_PAGE
+    assert second.stats["pages_fetched"] == PAGES + PAGES * PER_PAGE
+    if incremental:
+        assert second_items == []
+    else:
+        # A full crawl rewrites its output, so it re-parses cached bodies.
+        assert sorted(item["url"] for item in second_items) == sorted(
+            item["url"] for item in first_items
+        )
+
+
+def test_crawl_with_bloom_seen_set():
+    async def run():
+        runner, start_url, hits = await start_site()
+        try:
+            spider = AsyncBookSpider(
+                start_urls=[start_url], concurrency=4, seen=BloomSeenSet(capacity=1000)
+            )
+            items = await spider.scrape()
+        finally:
+            await runner.cleanup()
+        return items, hits
+
+    items, hits = asyncio.run(run())
+    assert len(items) == PAGES * PER_PAGE
+    assert len(hits) == len(set(hits))
+
+
+def test_run_feeds_items_through_the_pipelines(tmp_path):
+    async def run():
+        runner, start_url, _hits = await start_site()
+        try:
+            spider = AsyncBookSpider(start_urls=[start_url], concurrency=4)
+            return await spider.run()
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()) == PAGES * PER_PAGE
+    lines = (tmp_path / "items.jl").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == PAGES * PER_PAGE
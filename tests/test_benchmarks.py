@@ -0,0 +1,214 @@
+"""Tests for the crawl and pipeline benchmark harnesses and the synthetic site."""
+
+import pytest
+
+from benchmarks.crawl import compare, percentile, run_async
+from benchmarks.pipelines import main as pipelines_main
+from benchmarks.pipelines import regressions, run_benchmarks
+from benchmarks.site import SyntheticSite, listing_html, product_html
+from web_scraper_project.extraction import extract_listing, extract_product
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+
+
+def test_synthetic_pages_parse():
+    listing = extract_listing(
+        listing_html(2, 3, 4).encode(), "http://127.0.0.1/catalogue/page-2.html"
+    )
+    assert len(listing["products"]) == 4
+    assert (
+        listing["products"][0]["url"]
+        == "http://127.0.0.1/catalogue/book-2-0/index.html"
+    )
+    assert listing["next_pages"] == ["http://127.0.0.1/catalogue/page-3.html"]
+    assert (
+        extract_listing(listing_html(3, 3, 4).encode(), "http://127.0.0.1/")[
+            "next_pages"
+        ]
+        == []
+    )
+
+    product = extract_product(
+        product_html(2, 1, 4).encode(), "http://127.0.0.1/catalogue/book-2-1/index.html"
+    )
+    assert product["title"] == "Book 2-1"
+    assert product["upc"] == f"{9:016x}"
+    assert product["availability"] == 10
+
+
+def test_percentile():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([0.5], 99) == 0.5
+    assert percentile([], 50) is None
+
+
+def test_async_benchmark_crawls_whole_site():
+    with SyntheticSite(pages=3, per_page=5, error_rate=0.1, seed=1) as site:
+        result = run_async(
+            {"start_url": site.start_url, "concurrency": 4, "pipelines": False}
+        )
+        assert site.errors > 0
+    assert result["items"] == 15
+    assert result["pages"] == 18
+    assert result["pages_per_second"] > 0
+    assert 0 < result["latency_p50"] <= result["latency_p99"]
+    assert result["peak_rss_mb"] > 0
+
+
+class DropOddPipeline:
+    def process_item(self, item, spider):
+        from scrapy.exceptions import DropItem
+
+        if item["url"].endswith(("1/index.html", "3/index.html")):
+            raise DropItem("odd")
+        return item
+
+
+def test_async_benchmark_survives_dropped_items(monkeypatch):
+    monkeypatch.setattr(
+        "web_scraper_project.settings.ITEM_PIPELINES",
+        {"tests.test_benchmarks.DropOddPipeline": 100},
+    )
+    with SyntheticSite(pages=2, per_page=5, seed=1) as site:
+        result = run_async(
+            {"start_url": site.start_url, "concurrency": 4, "pipelines": True}
+        )
+    assert result["pages"] == 12
+    assert result["items"] == 6
+
+
+def test_compare_reports_relative_change():
+    baseline = {"results": {"async": {"pages_per_second": 100.0, "latency_p50": None}}}
+    report = {
+        "results": {
+            "async": {"pages_per_second": 80.0, "latency_p50": 0.01},
+            "scrapy": {},
+        }
+    }
+    assert compare(report, baseline) == {
+        ("async", "pages_per_second"): (100.0, 80.0, -0.2)
+    }
+
+
+def test_pipeline_benchmarks_report_each_case():
+    report = run_benchmarks(
+        ["validate", "jsonlines", "sqlite"], [50], allocation_sample=10
+    )
+    results = report["results"]
+    assert results["validate"]["50"]["bytes_written"] == 0
+    assert results["jsonlines"]["50"]["bytes_written"] > 0
+    assert results["sqlite"]["50"]["bytes_written"] > 0
+    for result in (by_scale["50"] for by_scale in results.values()):
+        assert result["items_per_second"] > 0
+        assert result["alloc_sample"] == 10
+        assert result["alloc_peak_bytes"] > 0
+
+
+def test_pipeline_regressions_respect_threshold():
+    baseline = {"results": {"sqlite": {"1000": {"items_per_second": 100.0}}}}
+    report = {
+        "results": {
+            "sqlite": {
+                "1000": {"items_per_second": 85.0},
+                "10000": {"items_per_second": 1.0},
+            }
+        }
+    }
+    assert regressions(report, baseline, threshold=0.2) == []
+    assert regressions(report, baseline, threshold=0.1) == [
+        ("sqlite", "1000", 100.0, 85.0)
+    ]
+
+
+def test_pipeline_benchmark_gates_on_baseline(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    args = [
+        "--cases",
+        "validate",
+        "--scales",
+        "20",
+        "--allocation-sample",
+        "5",
+        "--baseline",
+        str(baseline),
+    ]
+    # Without a baseline there is nothing to gate on, which is a failure.
+    assert pipelines_main(args + ["--output", str(tmp_path / "none.json")]) == 1
+    assert (
+        pipelines_main(
+            args + ["--output", str(tmp_path / "none.json"), "--allow-missing-baseline"]
+        )
+        == 0
+    )
+    assert (
+        pipelines_main(
+            args + ["--output", str(tmp_path / "a.json"), "--update-baseline"]
+        )
+        == 0
+    )
+    assert baseline.exists()
+    assert (
+        pipelines_main(
+            args + ["--output", str(tmp_path / "b.json"), "--threshold", "1.0"]
+        )
+        == 0
+    )
+    assert (
+        pipelines_main(
+            args + ["--output", str(tmp_path / "c.json"), "--threshold", "-1000"]
+        )
+        == 1
+    )
+    # A scale the baseline has no entry for is not a pass either.
+    other_scale = [
+        "--cases",
+        "validate",
+        "--scales",
+        "30",
+        "--allocation-sample",
+        "5",
+        "--baseline",
+        str(baseline),
+    ]
+    assert (
+        pipelines_main(
+            other_scale + ["--output", str(tmp_path / "d.json"), "--threshold", "1.0"]
+        )
+        == 1
+    )
+    assert (
+        pipelines_main(
+            other_scale
+            + [
+                "--output",
+                str(tmp_path / "e.json"),
+                "--threshold",
+                "1.0",
+                "--allow-missing-baseline",
+            ]
+        )
+        == 0
+    )
+
+
+def test_benchmark_items_take_the_validation_fast_path():
+    from benchmarks.pipelines import make_item
+    from web_scraper_project import schemas
+
+    schemas._fast_product(dict(make_item(7)))  # raises _Slow otherwise
+
+
+def test_committed_pipeline_baseline_covers_every_case():
+    import json
+
+    from benchmarks.pipelines import BASELINE_PATH, CASES, SCALES
+
+    results = json.loads(BASELINE_PATH.read_text(encoding="utf-8"))["results"]
+    assert sorted(results) == sorted(CASES)
+    for by_scale in results.values():
+        assert sorted(by_scale, key=int) == [str(scale) for scale in SCALES]
@@ -0,0 +1,124 @@
+"""Tests for crawl checkpoints and resumable crawls."""
+
+import asyncio
+import json
+
+from scraper.spiders.book_spider import AsyncBookSpider
+from web_scraper_project import settings as project_settings
+from web_scraper_project.checkpoint import CrawlCheckpoint
+
+from .test_async_spider import PAGES, PER_PAGE, start_site
+
+
+def test_replay_snapshot_and_log(tmp_path):
+    checkpoint = CrawlCheckpoint(str(tmp_path), interval=3600).open()
+    checkpoint.add(1, "http://x/page-1")
+    checkpoint.add(0, "http://x/a", {"listing_price": "£1.00"})
+    checkpoint.snapshot({"pages_fetched": 1})
+    checkpoint.done("http://x/page-1")
+    checkpoint.add(0, "http://x/b")
+    # Simulate a crash: the log is left as is, with a torn final line.
+    checkpoint._log.write('{"op": "do')
+    checkpoint._log.close()
+
+    resumed = CrawlCheckpoint(str(tmp_path)).open(resume=True)
+    assert resumed.resumed
+    assert resumed.pending == {
+        "http://x/a": (0, {"listing_price": "£1.00"}),
+        "http://x/b": (0, None),
+    }
+    assert resumed.stats == {"pages_fetched": 1}
+    resumed.close(finished=True)
+
+    with open(tmp_path / "snapshot.json", encoding="utf-8") as f:
+        assert json.load(f)["finished"] is True
+    assert (tmp_path / "frontier.log").read_text() == ""
+
+    fresh = CrawlCheckpoint(str(tmp_path)).open()
+    assert not fresh.resumed and fresh.pending == {}
+    fresh.close()
+
+
+def test_interrupted_crawl_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(project_settings, "HTTP_CACHE_ENABLED", False)
+    job_dir = str(tmp_path / "job")
+
+    async def run():
+        runner, start_url, hits = await start_site()
+        try:
+            spider = AsyncBookSpider(
+                start_urls=[start_url], concurrency=2, item_buffer=1, job_dir=job_dir
+            )
+            first = []
+            crawl = spider.crawl()
+            async for item in crawl:
+                first.append(item["url"])
+                if len(first) == 5:
+                    break
+            await crawl.aclose()
+            first_hits = len(hits)
+
+            resumed = AsyncBookSpider(
+                start_urls=[start_url], concurrency=2, job_dir=job_dir, resume=True
+            )
+            second = [item["url"] for item in await resumed.scrape()]
+            again = AsyncBookSpider(
+                start_urls=[start_url], job_dir=job_dir, resume=True
+            )
+            third = await again.scrape()
+        finally:
+            await runner.cleanup()
+        return first, second, third, resumed, hits[first_hits:]
+
+    first, second, third, resumed, resumed_hits = asyncio.run(run())
+    # The item being handled when the crawl stopped is delivered again.
+    assert first[-1] in second
+    assert len(set(first) | set(second)) == PAGES * PER_PAGE
+    assert len(second) == PAGES * PER_PAGE - len(first) + 1
+    assert len(resumed_hits) == len(set(resumed_hits))
+    assert resumed.stats["items_scraped"] == PAGES * PER_PAGE + 1
+    # A finished crawl has nothing left to resume.
+    assert third == []
+
+
+def test_unflushed_items_are_crawled_again_on_resume(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(project_settings, "HTTP_CACHE_ENABLED", False)
+    monkeypatch.setattr(project_settings, "CHECKPOINT_INTERVAL", 3600)
+    job_dir = str(tmp_path / "job")
+    flushes = []
+
+    async def run():
+        runner, start_url, _hits = await start_site()
+        try:
+            spider = AsyncBookSpider(
+                start_urls=[start_url], concurrency=2, item_buffer=1, job_dir=job_dir
+            )
+            first = []
+            crawl = spider.crawl(flush=lambda: flushes.append(len(first)))
+            async for item in crawl:
+                first.append(item["url"])
+                if len(first) == 5:
+                    break
+            # Stopped before the consumer flushed: nothing it took is done.
+            await crawl.aclose()
+
+            resumed = AsyncBookSpider(
+                start_urls=[start_url], concurrency=2, job_dir=job_dir, resume=True
+            )
+            second = []
+            async for item in resumed.crawl(flush=lambda: flushes.append(len(second))):
+                second.append(item["url"])
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert set(first) <= set(second)
+    assert len(set(second)) == PAGES * PER_PAGE
+    # Only the completed crawl flushed, once, after its last item.
+    assert flushes == [len(second)]
+    with open(f"{job_dir}/snapshot.json", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    assert snapshot["finished"] is True and snapshot["pending"] == []
@@ -0,0 +1,90 @@
+"""Tests for the frontier seen-sets."""
+
+import pytest
+from scrapy import Request
+from scrapy.utils.request import RequestFingerprinter
+
+from web_scraper_project.dedup import (
+    BloomSeenSet,
+    MemorySeenSet,
+    SeenSetDupeFilter,
+    SQLiteSeenSet,
+    make_seen_set,
+)
+
+
+@pytest.fixture(params=["memory", "bloom", "sqlite"])
+def seen(request, tmp_path):
+    if request.param == "sqlite":
+        seen = SQLiteSeenSet(path=str(tmp_path / "seen.db"), batch_size=3)
+    elif request.param == "bloom":
+        seen = BloomSeenSet(capacity=1000, error_rate=0.001)
+    else:
+        seen = MemorySeenSet()
+    yield seen
+    seen.close()
+
+
+def test_add_reports_new_keys(seen):
+    urls = [f"http://books.toscrape.com/page-{i}.html" for i in range(10)]
+    assert all(seen.add(url) for url in urls)
+    assert not any(seen.add(url) for url in urls)
+    assert urls[3] in seen
+    assert "http://books.toscrape.com/other.html" not in seen
+    assert len(seen) == 10
+
+
+def test_bloom_false_positive_rate():
+    seen = BloomSeenSet(capacity=20000, error_rate=0.01)
+    for i in range(20000):
+        seen.add(f"http://example.com/{i}")
+    false_positives = sum(f"http://other.example/{i}" in seen for i in range(20000))
+    assert false_positives / 20000 < 0.02
+    # Sized by the standard formula: about 9.6 bits per key at 1%.
+    assert seen.nbytes == pytest.approx(20000 * 9.585 / 8, rel=0.01)
+    assert seen.num_hashes == 7
+
+
+def test_sqlite_seen_set_resume(tmp_path):
+    path = str(tmp_path / "seen.db")
+    seen = SQLiteSeenSet(path=path)
+    seen.add("http://example.com/a")
+    seen.close()
+
+    resumed = SQLiteSeenSet(path=path, resume=True)
+    assert "http://example.com/a" in resumed and len(resumed) == 1
+    resumed.close()
+
+    fresh = SQLiteSeenSet(path=path)
+    assert len(fresh) == 0
+    fresh.close()
+
+
+def test_sqlite_seen_sets_without_a_path_are_per_crawl(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    first, second = SQLiteSeenSet(), SQLiteSeenSet()
+    assert first.path != second.path
+    first.add("http://example.com/a")
+    second.close()
+    # Opening (and closing) another crawl's set leaves this one intact.
+    assert "http://example.com/a" in first
+    first.close()
+    assert list(tmp_path.iterdir()) == []
+    with pytest.raises(ValueError):
+        SQLiteSeenSet(resume=True)
+
+
+def test_make_seen_set_rejects_unknown_kind():
+    assert isinstance(make_seen_set("memory"), MemorySeenSet)
+    with pytest.raises(ValueError):
+        make_seen_set("nope")
+
+
+def test_dupefilter_filters_repeated_requests():
+    dupefilter = SeenSetDupeFilter(
+        seen=BloomSeenSet(capacity=100), fingerprinter=RequestFingerprinter()
+    )
+    assert not dupefilter.request_seen(Request("http://books.toscrape.com/a"))
+    assert dupefilter.request_seen(Request("http://books.toscrape.com/a"))
+    assert not dupefilter.request_seen(Request("http://books.toscrape.com/b"))
+    dupefilter.close("finished")
@@ -0,0 +1,163 @@
+"""Tests for the in-process crawl engine."""
+
+import asyncio
+
+from web_scraper_project.engine import CANCELLED, FAILED, FINISHED, CrawlEngine
+
+
+class RecordingPipeline:
+    def __init__(self):
+        self.items = []
+        self.opened = False
+        self.closed = False
+
+    def open_spider(self, spider):
+        self.opened = True
+
+    def close_spider(self, spider):
+        self.closed = True
+
+    def process_item(self, item, spider):
+        self.items.append(item)
+        return item
+
+
+class FakeSpider:
+    def __init__(self, url, count=2, delay=0, fail=False):
+        self.url = url
+        self.count = count
+        self.delay = delay
+        self.fail = fail
+
+    async def crawl(self, session=None):
+        for i in range(self.count):
+            await asyncio.sleep(self.delay)
+            yield {"url": self.url, "n": i}
+        if self.fail:
+            raise RuntimeError("boom")
+
+
+def test_jobs_run_through_shared_pipelines():
+    pipeline = RecordingPipeline()
+
+    async def run():
+        engine = CrawlEngine(spider_factory=FakeSpider, pipelines=[pipeline])
+        await engine.start()
+        jobs = [engine.submit(f"http://example.com/{i}") for i in range(3)]
+        for job in jobs:
+            await engine.wait(job.id)
+        await engine.stop()
+        return jobs
+
+    jobs = asyncio.run(run())
+
+    assert pipeline.opened and pipeline.closed
+    assert len(pipeline.items) == 6
+    assert all(job.state == FINISHED for job in jobs)
+    assert all(job.items_scraped == 2 for job in jobs)
+
+
+def test_concurrency_is_bounded():
+    running = []
+    peak = []
+
+    class CountingSpider(FakeSpider):
+        async def crawl(self, session=None):
+            running.append(self.url)
+            peak.append(len(running))
+            await asyncio.sleep(0.01)
+            running.remove(self.url)
+            yield {"url": self.url}
+
+    async def run():
+        engine = CrawlEngine(
+            spider_factory=CountingSpider, pipelines=[], max_concurrent_jobs=2
+        )
+        await engine.start()
+        jobs = [engine.submit(f"http://example.com/{i}") for i in range(6)]
+        await asyncio.gather(*(engine.wait(job.id) for job in jobs))
+        await engine.stop()
+
+    asyncio.run(run())
+    assert max(peak) == 2
+
+
+def test_failed_and_cancelled_jobs():
+    async def run():
+        engine = CrawlEngine(
+            spider_factory=lambda url: FakeSpider(
+                url, fail=url.endswith("bad"), delay=0.05
+            ),
+            pipelines=[],
+        )
+        await engine.start()
+        bad = engine.submit("http://example.com/bad")
+        slow = engine.submit("http://example.com/slow")
+        queued = engine.submit("http://example.com/queued")
+        assert engine.cancel(queued.id)
+        await asyncio.sleep(0.01)
+        assert engine.cancel(slow.id)
+        await engine.wait(bad.id)
+        await engine.wait(slow.id)
+        await engine.wait(queued.id)
+        await engine.stop()
+        return bad, slow, queued
+
+    bad, slow, queued = asyncio.run(run())
+    assert bad.state == FAILED and bad.error == "boom"
+    assert slow.state == CANCELLED
+    assert queued.state == CANCELLED
+    assert bad.to_dict()["items_scraped"] == 2
+
+
+def test_failing_items_do_not_fail_the_job():
+    from scrapy.exceptions import DropItem
+
+    class PickyPipeline:
+        def process_item(self, item, spider):
+            if item["n"] == 1:
+                raise ValueError("invalid item")
+            if item["n"] == 2:
+                raise DropItem("duplicate")
+            return item
+
+    class StatsSpider(FakeSpider):
+        def __init__(self, url):
+            super().__init__(url, count=4)
+            self.stats = {}
+
+    recording = RecordingPipeline()
+
+    async def run():
+        engine = CrawlEngine(
+            spider_factory=StatsSpider, pipelines=[PickyPipeline(), recording]
+        )
+        await engine.start()
+        job = engine.submit("http://example.com/")
+        await engine.wait(job.id)
+        await engine.stop()
+        return job
+
+    job = asyncio.run(run())
+    assert job.state == FINISHED
+    assert job.items_scraped == 2
+    assert [item["n"] for item in recording.items] == [0, 3]
+    assert job.spider.stats == {"item_errors": 1, "items_dropped": 1}
+
+
+def test_engine_appends_to_shared_item_files(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    (tmp_path / "items.jl").write_text('{"from": "a worker"}\n', encoding="utf-8")
+    pipelines = {"web_scraper_project.pipelines.JsonLinesPipeline": 100}
+    monkeypatch.setattr("web_scraper_project.settings.ITEM_PIPELINES", pipelines)
+
+    async def run():
+        engine = CrawlEngine(spider_factory=FakeSpider)
+        await engine.start()
+        await engine.wait(engine.submit("http://example.com/").id)
+        await engine.stop()
+
+    asyncio.run(run())
+    lines = (tmp_path / "items.jl").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == '{"from": "a worker"}'
+    assert len(lines) == 3
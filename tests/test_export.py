@@ -0,0 +1,48 @@
+"""Tests for the streaming exporters."""
+
+import csv
+import gzip
+import io
+import json
+
+from web_scraper_project.export import (
+    csv_chunks,
+    gzip_chunks,
+    json_array_chunks,
+    ndjson_chunks,
+)
+
+ROWS = [{"id": i, "title": f"Book {i}", "price": 1.5 * i} for i in range(200)]
+
+
+def test_ndjson_chunks_are_bounded():
+    chunks = list(ndjson_chunks(iter(ROWS), chunk_size=256))
+    assert len(chunks) > 1
+    assert all(len(chunk) < 512 for chunk in chunks)
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert [json.loads(line) for line in lines] == ROWS
+
+
+def test_json_array_chunks():
+    assert json.loads(b"".join(json_array_chunks(iter(ROWS), chunk_size=128))) == ROWS
+    assert json.loads(b"".join(json_array_chunks(iter([])))) == []
+    raw = ['{"a": 1}', '{"a": 2}']
+    assert json.loads(b"".join(json_array_chunks(raw, raw=True))) == [
+        {"a": 1},
+        {"a": 2},
+    ]
+
+
+def test_csv_chunks():
+    data = b"".join(csv_chunks(iter(ROWS), ["id", "title"], chunk_size=64)).decode(
+        "utf-8"
+    )
+    rows = list(csv.DictReader(io.StringIO(data)))
+    assert len(rows) == len(ROWS)
+    assert rows[3] == {"id": "3", "title": "Book 3"}
+
+
+def test_gzip_chunks_round_trip():
+    payload = b"".join(ndjson_chunks(iter(ROWS)))
+    compressed = b"".join(gzip_chunks(ndjson_chunks(iter(ROWS), chunk_size=100)))
+    assert gzip.decompress(compressed) == payload
@@ -0,0 +1,66 @@
+"""Tests for the lxml page extractors."""
+
+from pathlib import Path
+
+from web_scraper_project.extraction import extract_listing, extract_product
+
+FIXTURES = Path(__file__).parent / "fixtures"
+PRODUCT_URL = "http://books.toscrape.com/catalogue/sample-book_1/index.html"
+
+
+def test_extract_listing():
+    body = (FIXTURES / "listing.html").read_bytes()
+    listing = extract_listing(body, "http://books.toscrape.com/")
+
+    assert listing["products"] == [
+        {
+            "url": PRODUCT_URL,
+            "title": "Sample Book",
+            "listing_price": "£9.99",
+            "image_url": "http://books.toscrape.com/media/cache/sample.jpg",
+        }
+    ]
+    assert listing["next_pages"] == ["http://books.toscrape.com/page-2.html"]
+
+
+def test_extract_product():
+    body = (FIXTURES / "product.html").read_bytes()
+    item = extract_product(body, PRODUCT_URL)
+
+    assert item["title"] == "Sample Book"
+    assert item["price"] == 9.99
+    assert item["price_excl_tax"] == 8.99
+    assert item["price_incl_tax"] == 9.99
+    assert item["tax"] == 1.0
+    assert item["upc"] == "A123456789"
+    assert item["product_type"] == "Books"
+    assert item["availability"] == 5
+    assert item["number_of_reviews"] == "10"
+    assert item["star_rating"] == 3
+    assert item["category"] == "Fiction"
+    assert item["description"] == "Short description of the sample book."
+    assert item["image_url"] == "http://books.toscrape.com/media/cache/sample.jpg"
+    assert item["url"] == PRODUCT_URL
+
+
+def test_listing_meta_takes_precedence():
+    body = (FIXTURES / "product.html").read_bytes()
+    meta = {"listing_price": "£12.50", "image_url": "http://example.com/cover.jpg"}
+    item = extract_product(body, PRODUCT_URL, meta)
+
+    assert item["price"] == 12.5
+    assert item["image_url"] == "http://example.com/cover.jpg"
+
+
+def test_missing_fields_and_empty_pages():
+    item = extract_product(
+        b"<html><body><h1>Only a title</h1></body></html>", PRODUCT_URL
+    )
+    assert item["title"] == "Only a title"
+    assert item["category"] is None and item["price"] is None
+    assert "upc" not in item
+
+    assert extract_listing(b"", "http://books.toscrape.com/") == {
+        "products": [],
+        "next_pages": [],
+    }
@@ -0,0 +1,105 @@
+"""Tests for the bounded-concurrency fetch helpers."""
+
+import asyncio
+
+from web_scraper_project.fetch import HostScheduler, fetch_many
+
+
+def _collect(agen):
+    async def run():
+        return [result async for result in agen]
+
+    return asyncio.run(run())
+
+
+def test_fetch_many_bounds_global_and_per_host_concurrency():
+    in_flight = {"total": 0, "a": 0}
+    peaks = {"total": 0, "a": 0}
+
+    async def fetch_one(url):
+        host = "a" if "//a." in url else None
+        in_flight["total"] += 1
+        if host:
+            in_flight[host] += 1
+        peaks["total"] = max(peaks["total"], in_flight["total"])
+        peaks["a"] = max(peaks["a"], in_flight["a"])
+        await asyncio.sleep(0.005)
+        in_flight["total"] -= 1
+        if host:
+            in_flight[host] -= 1
+        return {"url": url, "status": "success"}
+
+    urls = [f"http://a.example/{i}" for i in range(20)]
+    urls += [f"http://b{i}.example/" for i in range(20)]
+    results = _collect(fetch_many(urls, fetch_one, concurrency=8, per_host=2))
+
+    assert sorted(r["url"] for r in results) == sorted(urls)
+    assert peaks["total"] <= 8
+    assert peaks["a"] == 2
+
+
+def test_fetch_many_yields_in_completion_order_and_times_out():
+    async def fetch_one(url):
+        delays = {"http://x/slow": 0.05, "http://x/fast": 0.0, "http://x/hang": 5}
+        await asyncio.sleep(delays[url])
+        return {"url": url, "status": "success"}
+
+    results = _collect(
+        fetch_many(
+            ["http://x/slow", "http://x/fast", "http://x/hang"],
+            fetch_one,
+            concurrency=3,
+            per_host=3,
+            timeout=0.2,
+        )
+    )
+
+    assert [r["url"] for r in results] == [
+        "http://x/fast",
+        "http://x/slow",
+        "http://x/hang",
+    ]
+    assert results[-1] == {
+        "url": "http://x/hang",
+        "status": "error",
+        "reason": "timeout",
+    }
+
+
+def test_fetch_many_converts_exceptions():
+    async def fetch_one(url):
+        raise ValueError("bad url")
+
+    results = _collect(fetch_many(["http://x/"], fetch_one, concurrency=1, per_host=1))
+    assert results == [{"url": "http://x/", "status": "error", "reason": "bad url"}]
+
+
+def test_busy_host_does_not_hold_up_other_hosts():
+    async def fetch_one(url):
+        await asyncio.sleep(0.05 if "//a." in url else 0)
+        return {"url": url, "status": "success"}
+
+    urls = [f"http://a.example/{i}" for i in range(6)]
+    urls += [f"http://b{i}.example/" for i in range(6)]
+    results = _collect(fetch_many(urls, fetch_one, concurrency=4, per_host=1))
+
+    assert sorted(r["url"] for r in results) == sorted(urls)
+    assert all("//b" in r["url"] for r in results[:6])
+
+
+def test_host_scheduler_drops_idle_hosts():
+    hosts = HostScheduler(["http://a/1", "http://a/2"], limit=1, backlog=4)
+
+    async def run():
+        host, url = await hosts.acquire()
+        assert (host, url) == ("a", "http://a/1")
+        second = asyncio.ensure_future(hosts.acquire())
+        await asyncio.sleep(0)
+        assert not second.done() and len(hosts) == 1
+        hosts.release(host)
+        assert await second == ("a", "http://a/2")
+        hosts.release(host)
+        assert await hosts.acquire() is None
+        assert len(hosts) == 0
+
+    asyncio.run(run())
@@ -0,0 +1,133 @@
+"""Tests for the on-disk HTTP response cache."""
+
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import web
+from scrapy import Request
+from scrapy.http import HtmlResponse, Response
+
+from web_scraper_project.httpcache import ResponseCache, cached_get
+from web_scraper_project.middlewares import HttpCacheMiddleware
+
+ETAG = '"abc"'
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with ResponseCache(path=str(tmp_path / "httpcache.db"), max_bytes=1000) as cache:
+        yield cache
+
+
+def test_store_requires_a_validator(cache):
+    assert not cache.store("http://x/a", 200, {"Content-Type": "text/html"}, b"body")
+    assert cache.store("http://x/b", 200, {"ETag": ETAG}, b"body")
+    entry = cache.get("http://x/b")
+    assert entry.body == b"body"
+    assert entry.conditional_headers() == {"If-None-Match": ETAG}
+    assert cache.get("http://x/a") is None
+
+
+def test_lru_eviction_bounds_size(cache):
+    for name in "abc":
+        cache.store(
+            f"http://x/{name}", 200, {"Last-Modified": LAST_MODIFIED}, b"x" * 400
+        )
+    # Inserting "c" pushed the total past 1000 bytes and evicted "a".
+    assert cache.get("http://x/a") is None
+    assert cache.size == 800
+
+    cache.get("http://x/b")  # "b" is now more recently used than "c"
+    cache.store("http://x/d", 200, {"ETag": ETAG}, b"x" * 400)
+    assert cache.get("http://x/c") is None
+    assert cache.get("http://x/b") is not None
+    assert len(cache) == 2
+
+
+def test_size_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "httpcache.db")
+    with (
+        ResponseCache(path=path, max_bytes=1000) as first,
+        ResponseCache(path=path, max_bytes=1000) as second,
+    ):
+        first.store("http://x/a", 200, {"ETag": ETAG}, b"x" * 400)
+        second.store("http://x/b", 200, {"ETag": ETAG}, b"x" * 400)
+        assert first.size == second.size == 800
+        # Either instance evicts against the combined size.
+        first.store("http://x/a", 200, {"ETag": ETAG}, b"x" * 700)
+        assert second.size == 700
+        assert second.get("http://x/b") is None
+
+
+def test_get_batches_access_times(tmp_path):
+    path = str(tmp_path / "httpcache.db")
+    with ResponseCache(path=path, max_bytes=1000, touch_batch=2) as cache:
+        cache.store("http://x/a", 200, {"ETag": ETAG}, b"a")
+        cache.store("http://x/b", 200, {"ETag": ETAG}, b"b")
+        changes = cache._conn.total_changes
+        cache.get("http://x/a")
+        cache.get("http://x/a")
+        assert cache._conn.total_changes == changes
+        cache.get("http://x/b")
+        assert cache._conn.total_changes == changes + 2
+
+
+def test_cached_get_revalidates(cache):
+    seen = []
+
+    async def handler(request):
+        seen.append(dict(request.headers))
+        if request.headers.get("If-None-Match") == ETAG:
+            return web.Response(status=304, headers={"ETag": ETAG})
+        return web.Response(
+            body=b"<html>hi</html>", content_type="text/html", headers={"ETag": ETAG}
+        )
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/page", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/page"
+        try:
+            async with aiohttp.ClientSession() as session:
+                return [await cached_get(session, url, cache) for _ in range(2)]
+        finally:
+            await runner.cleanup()
+
+    first, second = asyncio.run(run())
+    assert not first.not_modified and first.body == b"<html>hi</html>"
+    assert second.not_modified and second.body == first.body
+    assert "If-None-Match" not in seen[0]
+    assert seen[1]["If-None-Match"] == ETAG
+
+
+def test_middleware_serves_304_from_cache(cache):
+    middleware = HttpCacheMiddleware(cache=cache)
+    url = "http://books.toscrape.com/catalogue/x/index.html"
+
+    request = Request(url)
+    assert middleware.process_request(request, None) is None
+    assert "If-None-Match" not in request.headers
+    fresh = HtmlResponse(
+        url,
+        body=b"<html>book</html>",
+        headers={"ETag": ETAG, "Content-Type": "text/html"},
+        request=request,
+    )
+    assert middleware.process_response(request, fresh, None) is fresh
+
+    request = Request(url)
+    middleware.process_request(request, None)
+    assert request.headers["If-None-Match"] == ETAG.encode()
+    response = middleware.process_response(
+        request, Response(url, status=304, request=request), None
+    )
+    assert isinstance(response, HtmlResponse)
+    assert response.status == 200
+    assert response.body == b"<html>book</html>"
+    assert HttpCacheMiddleware.FLAG in response.flags
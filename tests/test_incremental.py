@@ -0,0 +1,91 @@
+"""Tests for content hashes and incremental re-crawls."""
+
+import asyncio
+import json
+import sqlite3
+
+from scraper.spiders.book_spider import AsyncBookSpider
+from web_scraper_project import settings as project_settings
+from web_scraper_project.incremental import ContentIndex, content_hash
+from web_scraper_project.pipelines import JsonLinesPipeline, SQLitePipeline
+from web_scraper_project.store import create_tables
+
+from .test_async_spider import PAGES, PER_PAGE, start_site
+from .test_store import make_product
+
+
+def test_pipeline_records_page_hashes(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    pipeline = SQLitePipeline()
+    pipeline.open_spider(None)
+    pipeline.process_item(make_product(1, content_hash=content_hash(b"v1")), None)
+    pipeline.process_item(make_product(2), None)
+    pipeline.close_spider(None)
+
+    with ContentIndex() as index:
+        assert index.unchanged("http://example.com/book-1", content_hash(b"v1"))
+        assert not index.unchanged("http://example.com/book-1", content_hash(b"v2"))
+        assert index.stored_hash("http://example.com/book-2") is None
+        index.seen("http://example.com/book-1")
+
+    conn = sqlite3.connect(tmp_path / "items.db")
+    row = conn.execute(
+        "SELECT content_hash FROM products WHERE upc = 'UPC0001'"
+    ).fetchone()
+    assert row == (content_hash(b"v1"),)
+    (last_seen,) = conn.execute("SELECT last_seen FROM crawl_pages").fetchone()
+    assert last_seen.endswith("Z")
+
+
+def test_create_tables_adds_new_columns(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.execute(
+        "CREATE TABLE products (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT)"
+    )
+    create_tables(conn)
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(products)")}
+    assert {"content_hash", "upc", "created_at", "updated_at"} <= columns
+
+
+def test_jsonlines_append(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    for append in (False, True):
+        pipeline = JsonLinesPipeline(append=append)
+        pipeline.open_spider(None)
+        pipeline.process_item(make_product(1), None)
+        pipeline.close_spider(None)
+    lines = (tmp_path / "items.jl").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["upc"] for line in lines] == ["UPC0001", "UPC0001"]
+
+
+def test_incremental_crawl_skips_unchanged_products(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    # Without the response cache every product is re-downloaded and hashed.
+    monkeypatch.setattr(project_settings, "HTTP_CACHE_ENABLED", False)
+
+    async def crawl(start_url, incremental):
+        spider = AsyncBookSpider(
+            start_urls=[start_url], concurrency=4, incremental=incremental
+        )
+        pipeline = SQLitePipeline()
+        pipeline.open_spider(spider)
+        items = []
+        async for item in spider.crawl():
+            items.append(pipeline.process_item(item, spider))
+        pipeline.close_spider(spider)
+        return spider, items
+
+    async def run():
+        runner, start_url, _hits = await start_site()
+        try:
+            first = await crawl(start_url, incremental=False)
+            second = await crawl(start_url, incremental=True)
+        finally:
+            await runner.cleanup()
+        return first, second
+
+    (_, first_items), (second, second_items) = asyncio.run(run())
+    assert len(first_items) == PAGES * PER_PAGE
+    assert all(item["content_hash"] for item in first_items)
+    assert second_items == []
+    assert second.stats["unchanged"] == PAGES * PER_PAGE
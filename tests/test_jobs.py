@@ -0,0 +1,323 @@
+"""Tests for the persistent job queue and its worker processes."""
+
+import asyncio
+import json
+import threading
+import time
+
+from web_scraper_project.engine import CANCELLED, FAILED, FINISHED, PENDING, RUNNING
+from web_scraper_project.jobs import JobQueue, Worker, WorkerPool, stream_events
+
+
+class FakeSpider:
+    def __init__(self, url, count=3, delay=0.0):
+        self.url = url
+        self.count = count
+        self.delay = delay
+        self.stats = {"pages_fetched": 0, "errors": 0}
+
+    async def crawl(self, session=None):
+        if "fail" in self.url:
+            raise RuntimeError("boom")
+        for i in range(self.count):
+            await asyncio.sleep(self.delay)
+            self.stats["pages_fetched"] += 1
+            yield {"url": self.url, "n": i}
+
+
+def slow_spider(url):
+    return FakeSpider(url, count=1000, delay=0.01)
+
+
+def quick_spider(url):
+    return FakeSpider(url, count=5)
+
+
+def open_queue(tmp_path):
+    return JobQueue(str(tmp_path / "jobs.db")).open()
+
+
+def test_claims_by_priority_then_age(tmp_path):
+    queue = open_queue(tmp_path)
+    low = queue.submit("http://example.com/low")
+    high = queue.submit("http://example.com/high", priority=5)
+    later = queue.submit("http://example.com/later")
+    assert low["state"] == PENDING
+
+    claimed = [queue.claim("w")["job_id"] for _ in range(3)]
+    assert claimed == [high["job_id"], low["job_id"], later["job_id"]]
+    assert queue.claim("w") is None
+    assert queue.get(high["job_id"])["state"] == RUNNING
+    queue.close()
+
+
+def test_each_job_is_claimed_once(tmp_path):
+    queue = open_queue(tmp_path)
+    for i in range(50):
+        queue.submit(f"http://example.com/{i}")
+    others = [open_queue(tmp_path) for _ in range(4)]
+    claimed = []
+
+    def claim_all(q, name):
+        while (job := q.claim(name)) is not None:
+            claimed.append(job["job_id"])
+
+    threads = [
+        threading.Thread(target=claim_all, args=(q, f"w{i}"))
+        for i, q in enumerate(others)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(claimed) == len(set(claimed)) == 50
+    for q in [queue, *others]:
+        q.close()
+
+
+def test_cancel_and_requeue(tmp_path):
+    queue = open_queue(tmp_path)
+    pending = queue.submit("http://example.com/a")
+    running = queue.submit("http://example.com/b")
+    queue.claim("w")  # claims `pending`, the older job
+    queue.claim("w")
+
+    assert queue.cancel(pending["job_id"])
+    assert queue.cancel_requested(pending["job_id"])
+    assert queue.get(pending["job_id"])["state"] == RUNNING
+    queued = queue.submit("http://example.com/c")
+    assert queue.cancel(queued["job_id"])
+    assert queue.get(queued["job_id"])["state"] == CANCELLED
+    assert not queue.cancel(queued["job_id"])
+    assert not queue.cancel("missing")
+
+    assert queue.requeue() == 2
+    assert queue.get(running["job_id"])["state"] == PENDING
+    queue.close()
+
+
+def test_requeue_only_takes_back_orphaned_jobs(tmp_path, monkeypatch):
+    queue = open_queue(tmp_path)
+    live = queue.submit("http://example.com/live")
+    orphaned = queue.submit("http://example.com/orphaned")
+    queue.claim("w1")
+    queue.claim("w2")
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 60)
+    queue.progress(live["job_id"], 1, 1, 0)
+
+    # Another pool starting up leaves the job a live worker reports on.
+    WorkerPool(queue.path, workers=0, lease=30).start()
+    assert queue.get(live["job_id"])["state"] == RUNNING
+    assert queue.get(orphaned["job_id"])["state"] == PENDING
+    queue.close()
+
+
+def test_idle_worker_picks_up_orphaned_jobs(tmp_path):
+    queue = open_queue(tmp_path)
+    job = queue.submit("http://example.com/")
+    queue.claim("dead")
+    stop = threading.Event()
+    worker = Worker(
+        queue, "w", stop, spider_factory=quick_spider, poll_interval=0.01, lease=0.05
+    )
+
+    async def run():
+        task = asyncio.ensure_future(worker.run())
+        while queue.get(job["job_id"])["state"] != FINISHED:
+            await asyncio.sleep(0.01)
+        stop.set()
+        await task
+
+    asyncio.run(asyncio.wait_for(run(), 5))
+    assert queue.get(job["job_id"])["worker"] == "w"
+    queue.close()
+
+
+def test_progress_rates(tmp_path):
+    queue = open_queue(tmp_path)
+    job = queue.submit("http://example.com/")
+    queue.claim("w")
+    queue.progress(job["job_id"], pages_fetched=40, items_scraped=20, errors=1)
+    queue._conn.execute(
+        "UPDATE jobs SET started_at = ?, finished_at = ? WHERE id = ?",
+        (1000.0, 1010.0, job["job_id"]),
+    )
+    status = queue.get(job["job_id"])
+    assert status["elapsed"] == 10.0
+    assert status["pages_per_second"] == 4.0
+    assert status["items_per_second"] == 2.0
+    queue.close()
+
+
+def test_worker_runs_jobs_through_pipelines(tmp_path):
+    class Recorder:
+        def __init__(self):
+            self.items = []
+
+        def process_item(self, item, spider):
+            self.items.append(item)
+            return item
+
+    queue = open_queue(tmp_path)
+    ok = queue.submit("http://example.com/ok")
+    failing = queue.submit("http://example.com/fail")
+    recorder = Recorder()
+    stop = threading.Event()
+    worker = Worker(
+        queue,
+        "w",
+        stop,
+        spider_factory=quick_spider,
+        pipelines=[recorder],
+        poll_interval=0.01,
+    )
+
+    async def run():
+        task = asyncio.ensure_future(worker.run())
+        while queue.get(failing["job_id"])["state"] in (PENDING, RUNNING):
+            await asyncio.sleep(0.01)
+        stop.set()
+        await task
+
+    asyncio.run(run())
+    status = queue.get(ok["job_id"])
+    assert status["state"] == FINISHED
+    assert status["items_scraped"] == status["pages_fetched"] == 5
+    assert len(recorder.items) == 5
+    assert queue.get(failing["job_id"])["state"] == FAILED
+    assert queue.get(failing["job_id"])["error"] == "boom"
+    queue.close()
+
+
+def test_worker_skips_failing_items(tmp_path):
+    from scrapy.exceptions import DropItem
+
+    class PickyPipeline:
+        def process_item(self, item, spider):
+            if item["n"] == 1:
+                raise ValueError("invalid item")
+            if item["n"] == 2:
+                raise DropItem("duplicate")
+            return item
+
+    queue = open_queue(tmp_path)
+    job = queue.submit("http://example.com/ok")
+    worker = Worker(
+        queue,
+        "w",
+        threading.Event(),
+        spider_factory=quick_spider,
+        pipelines=[PickyPipeline()],
+    )
+    asyncio.run(worker.run_job(queue.claim("w")))
+    status = queue.get(job["job_id"])
+    assert status["state"] == FINISHED
+    assert status["items_scraped"] == 3
+    assert status["errors"] == 1
+    queue.close()
+
+
+def wait_for(predicate, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_worker_processes_cancel_and_requeue_on_stop(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    queue = JobQueue(path).open()
+    pool = WorkerPool(
+        path,
+        workers=2,
+        spider_factory="tests.test_jobs.slow_spider",
+        pipelines={},
+        poll_interval=0.05,
+        progress_interval=0.05,
+    ).start()
+    try:
+        cancelled = queue.submit("http://example.com/cancel")
+        kept = queue.submit("http://example.com/keep")
+        assert wait_for(lambda: queue.get(cancelled["job_id"])["items_scraped"] > 0)
+        assert queue.cancel(cancelled["job_id"])
+        assert wait_for(lambda: queue.get(cancelled["job_id"])["state"] == CANCELLED)
+        assert queue.get(kept["job_id"])["state"] == RUNNING
+        assert (
+            queue.get(kept["job_id"])["worker"]
+            != queue.get(cancelled["job_id"])["worker"]
+        )
+    finally:
+        pool.stop()
+    status = queue.get(kept["job_id"])
+    assert status["state"] == PENDING
+    assert status["items_per_second"] == 0.0
+    queue.close()
+
+
+def collect_events(queue, job_id, after=0):
+    async def run():
+        return [
+            chunk
+            async for chunk in stream_events(queue, job_id, after, poll_interval=0.01)
+        ]
+
+    return asyncio.run(run())
+
+
+def test_worker_publishes_progress_and_items(tmp_path):
+    queue = open_queue(tmp_path)
+    job = queue.submit("http://example.com/")
+    stop = threading.Event()
+    worker = Worker(queue, "w", stop, spider_factory=quick_spider, max_event_items=3)
+
+    async def run():
+        await worker.run_job(queue.claim("w"))
+
+    asyncio.run(run())
+    events = queue.events(job["job_id"])
+    types = [event_type for _, event_type, _ in events]
+    assert types == ["state", "state", "progress", "items", "state"]
+    items = json.loads(events[3][2])
+    assert [item["n"] for item in items["items"]] == [0, 1, 2]
+    assert items["dropped"] == 2
+    assert json.loads(events[-1][2])["state"] == FINISHED
+
+    chunks = collect_events(queue, job["job_id"], after=events[1][0])
+    assert chunks[0].startswith(f"id: {events[2][0]}\nevent: progress\ndata: {{")
+    assert chunks[-1].startswith(f"id: {events[-1][0]}\nevent: state\n")
+    assert len(chunks) == 3
+    queue.close()
+
+
+def test_stream_waits_for_new_events(tmp_path, monkeypatch):
+    queue = open_queue(tmp_path)
+    job = queue.submit("http://example.com/")
+
+    async def run():
+        chunks = []
+
+        async def consume():
+            async for chunk in stream_events(
+                queue, job["job_id"], poll_interval=0.01, keepalive=0.02
+            ):
+                chunks.append(chunk)
+
+        task = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.1)
+        queue.cancel(job["job_id"])
+        await asyncio.wait_for(task, 5)
+        return chunks
+
+    with monkeypatch.context() as patch:
+        # Streams read through their own connection, never the shared one.
+        patch.setattr(queue, "events", None)
+        chunks = asyncio.run(run())
+    assert "event: state" in chunks[0]
+    assert ": keepalive\n\n" in chunks
+    assert '"state": "cancelled"' in chunks[-1]
+    queue.prune_events(retention=-1)
+    assert queue.events(job["job_id"]) == []
+    queue.close()
@@ -5,9 +5,17 @@ import os
 import sqlite3
 from datetime import datetime, timezone
 import pytest
+from scrapy.exceptions import NotConfigured
 
 from web_scraper_project.items import ProductItem
-from web_scraper_project.pipelines import JsonLinesPipeline, SQLitePipeline, DATA_DIR
+from web_scraper_project.pipelines import (
+    JsonLinesPipeline,
+    ParquetPipeline,
+    SQLitePipeline,
+    SerializationPipeline,
+    DATA_DIR,
+)
+from web_scraper_project import serialization
 
 
 def _normalize_value(v):
@@ -59,6 +67,125 @@ def tmp_data_dir(tmp_path, monkeypatch):
     return data_dir
 
 
+class TestSerializationPipeline:
+    """Test suite for the shared serialization stage."""
+
+    def test_item_is_validated_once(self, sample_item, tmp_data_dir, monkeypatch):
+        """Test that downstream pipelines reuse the cached serialization."""
+        calls = []
+        model = serialization.SCHEMA_MAP["ProductItem"]
+
+        class CountingModel(model):
+            @classmethod
+            def parse_obj(cls, obj):
+                calls.append(obj)
+                return super().parse_obj(obj)
+
+        monkeypatch.setitem(serialization.SCHEMA_MAP, "ProductItem", CountingModel)
+
+        pipelines = [SerializationPipeline(), JsonLinesPipeline(), SQLitePipeline()]
+        for pipeline in pipelines[1:]:
+            pipeline.open_spider(None)
+        try:
+            for pipeline in pipelines:
+                pipeline.process_item(sample_item, None)
+        finally:
+            for pipeline in pipelines[1:]:
+                pipeline.close_spider(None)
+
+        assert len(calls) == 1
+        line = (tmp_data_dir / "items.jl").read_bytes().strip()
+        assert line == sample_item._serialized[1]
+
+    def test_encoders_agree(self, sample_item):
+        """Test that the stdlib and orjson encoders produce the same data."""
+        pytest.importorskip("orjson")
+        std = serialization.get_json_encoder("json")
+        fast = serialization.get_json_encoder("orjson")
+        data = (
+            serialization.SCHEMA_MAP["ProductItem"].parse_obj(dict(sample_item)).dict()
+        )
+        assert json.loads(std(data)) == json.loads(fast(data))
+
+    def test_lenient_mode_drops_invalid_items(self, sample_item, monkeypatch):
+        """Test that lenient validation turns errors into DropItem."""
+        from scrapy.exceptions import DropItem
+
+        monkeypatch.setattr("web_scraper_project.settings.VALIDATION_MODE", "lenient")
+        with pytest.raises(DropItem):
+            SerializationPipeline().process_item(
+                ProductItem(sample_item, star_rating=9), None
+            )
+
+    def test_unknown_encoder(self):
+        with pytest.raises(ValueError):
+            serialization.get_json_encoder("yaml")
+
+
+class TestParquetPipeline:
+    """Test suite for ParquetPipeline."""
+
+    def test_writes_typed_row_groups(self, sample_item, tmp_data_dir):
+        """Test that items land in typed row groups per item type."""
+        pq = pytest.importorskip("pyarrow.parquet")
+        import pyarrow as pa
+
+        pipeline = ParquetPipeline(row_group_size=2, compression="snappy", enabled=True)
+        pipeline.open_spider(None)
+        for i in range(5):
+            pipeline.process_item(ProductItem(sample_item, upc=f"UPC{i}"), None)
+        pipeline.process_item({"title": "untyped"}, None)
+        pipeline.close_spider(None)
+
+        partition = tmp_data_dir / "parquet" / "item_type=ProductItem"
+        files = list(partition.glob("*.parquet"))
+        assert len(files) == 1
+
+        parquet_file = pq.ParquetFile(str(files[0]))
+        assert parquet_file.metadata.num_rows == 5
+        assert parquet_file.metadata.num_row_groups == 3
+
+        schema = parquet_file.schema_arrow
+        assert schema.field("price").type == pa.float64()
+        assert schema.field("availability").type == pa.int64()
+        assert schema.field("scrape_date").type == pa.timestamp("us")
+        assert schema.field("url").type == pa.string()
+
+        table = parquet_file.read(columns=["upc", "price"])
+        assert table.column("upc").to_pylist() == [f"UPC{i}" for i in range(5)]
+        assert table.column("price").to_pylist() == [9.99] * 5
+
+    def test_flush_finishes_part_files(self, sample_item, tmp_data_dir):
+        """Test that each flush leaves a readable part file behind."""
+        pq = pytest.importorskip("pyarrow.parquet")
+
+        pipeline = ParquetPipeline(row_group_size=2, enabled=True)
+        pipeline.open_spider(None)
+        partition = tmp_data_dir / "parquet" / "item_type=ProductItem"
+        try:
+            for i in range(3):
+                pipeline.process_item(ProductItem(sample_item, upc=f"UPC{i}"), None)
+            assert list(partition.glob("*.parquet")) == []
+            assert len(list(partition.glob("*.inprogress"))) == 1
+
+            pipeline.flush()
+            files = sorted(partition.glob("*.parquet"))
+            assert len(files) == 1
+            assert pq.ParquetFile(str(files[0])).metadata.num_rows == 3
+
+            pipeline.process_item(ProductItem(sample_item, upc="UPC3"), None)
+        finally:
+            pipeline.close_spider(None)
+        files = sorted(partition.glob("*.parquet"))
+        assert [pq.ParquetFile(str(f)).metadata.num_rows for f in files] == [3, 1]
+        assert list(partition.glob("*.inprogress")) == []
+
+    def test_disabled(self):
+        """Test that the pipeline can be switched off."""
+        with pytest.raises(NotConfigured):
+            ParquetPipeline(enabled=False)
+
+
 class TestJsonLinesPipeline:
     """Test suite for JsonLinesPipeline."""
 
@@ -161,22 +288,27 @@ class TestSQLitePipeline:
 
             # Read and verify the contents
             conn = sqlite3.connect(str(db_path))
+            conn.row_factory = sqlite3.Row
             cursor = conn.cursor()
             
-            # Check table structure
-            table_info = cursor.execute("PRAGMA table_info(items)").fetchall()
-            assert len(table_info) == 4  # id, item_type, data, created_at
+            # Check table structure: typed columns plus bookkeeping
+            columns = {
+                col[1]: col[2]
+                for col in cursor.execute("PRAGMA table_info(products)").fetchall()
+            }
+            assert columns["upc"] == "TEXT"
+            assert columns["price"] == "REAL"
+            assert columns["star_rating"] == "INTEGER"
+            assert "created_at" in columns and "updated_at" in columns
             
             # Verify stored data
-            cursor.execute("SELECT item_type, data FROM items")
+            cursor.execute("SELECT * FROM products")
             row = cursor.fetchone()
             assert row is not None
+            saved_item = dict(row)
             
-            item_type, data = row
-            saved_item = json.loads(data)
-            
-            # Check item type
-            assert item_type == "ProductItem"
+            # Schema-backed items do not go to the generic JSON table
+            assert cursor.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
             
             # Check all fields were saved correctly (normalize types where necessary)
             fields = [
@@ -219,7 +351,7 @@ class TestSQLitePipeline:
             # Process multiple items
             items = [
                 dict(sample_item),
-                dict(sample_item, title="Another Book", price=19.99)
+                dict(sample_item, title="Another Book", price=19.99, upc="B987654321")
             ]
             
             for item in items:
@@ -233,16 +365,16 @@ class TestSQLitePipeline:
             cursor = conn.cursor()
             
             # Check number of items
-            cursor.execute("SELECT COUNT(*) FROM items")
+            cursor.execute("SELECT COUNT(*) FROM products")
             count = cursor.fetchone()[0]
             assert count == len(items)
             
             # Check individual items
-            cursor.execute("SELECT data FROM items ORDER BY id")
-            saved_items = [json.loads(row[0]) for row in cursor.fetchall()]
+            cursor.execute("SELECT title, price FROM products ORDER BY id")
+            saved_items = cursor.fetchall()
             
-            assert saved_items[0]["title"] == items[0]["title"]
-            assert saved_items[1]["title"] == items[1]["title"]
+            assert saved_items[0] == (items[0]["title"], items[0]["price"])
+            assert saved_items[1] == (items[1]["title"], items[1]["price"])
 
             conn.close()
 
@@ -250,6 +382,67 @@ class TestSQLitePipeline:
             if hasattr(pipeline, "conn"):
                 pipeline.conn.close()
 
+    def test_upsert_on_upc(self, sample_item, tmp_data_dir):
+        """Test that re-scraping a UPC updates the existing row."""
+        pipeline = SQLitePipeline(batch_size=1)
+        pipeline.open_spider(None)
+        pipeline.process_item(ProductItem(sample_item), None)
+        pipeline.process_item(
+            ProductItem(sample_item, title="Revised", price=7.5), None
+        )
+        pipeline.close_spider(None)
+
+        conn = sqlite3.connect(str(tmp_data_dir / "items.db"))
+        try:
+            rows = conn.execute(
+                "SELECT id, title, price, created_at, updated_at FROM products"
+            ).fetchall()
+        finally:
+            conn.close()
+
+        assert len(rows) == 1
+        _id, title, price, created_at, updated_at = rows[0]
+        assert (title, price) == ("Revised", 7.5)
+        assert updated_at >= created_at
+
+    def test_untyped_items_use_generic_table(self, tmp_data_dir):
+        """Test that items without a schema are stored as JSON."""
+        pipeline = SQLitePipeline()
+        pipeline.open_spider(None)
+        pipeline.process_item({"title": "Plain"}, None)
+        pipeline.close_spider(None)
+
+        conn = sqlite3.connect(str(tmp_data_dir / "items.db"))
+        try:
+            row = conn.execute("SELECT item_type, data FROM items").fetchone()
+        finally:
+            conn.close()
+
+        assert row[0] == "dict"
+        assert json.loads(row[1]) == {"title": "Plain"}
+
+    def test_lookup_indexes(self, tmp_data_dir):
+        """Test that product lookup columns are indexed."""
+        pipeline = SQLitePipeline()
+        pipeline.open_spider(None)
+
+        try:
+            indexes = {
+                row[1]: row[2]
+                for row in pipeline.conn.execute("PRAGMA index_list(products)")
+            }
+            indexed_columns = {
+                pipeline.conn.execute(f"PRAGMA index_info({name})").fetchone()[
+                    2
+                ]: unique
+                for name, unique in indexes.items()
+            }
+        finally:
+            pipeline.close_spider(None)
+
+        assert indexed_columns["upc"] == 1
+        assert {"category", "price", "star_rating"} <= set(indexed_columns)
+
     def test_database_schema(self, tmp_data_dir):
         """Test that the database schema is created correctly."""
         pipeline = SQLitePipeline()
@@ -273,4 +466,104 @@ class TestSQLitePipeline:
 
         finally:
             if hasattr(pipeline, "conn"):
-                pipeline.conn.close()
\ No newline at end of file
+                pipeline.conn.close()
+
+    def test_batched_writes(self, sample_item, tmp_data_dir):
+        """Test that rows are buffered until the batch size is reached."""
+        pipeline = SQLitePipeline(batch_size=3, flush_interval_ms=60_000)
+        pipeline.open_spider(None)
+        db_path = str(tmp_data_dir / "items.db")
+
+        def count():
+            conn = sqlite3.connect(db_path)
+            try:
+                return conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+            finally:
+                conn.close()
+
+        try:
+            for i in range(2):
+                pipeline.process_item(ProductItem(sample_item, upc=f"UPC{i}"), None)
+            assert count() == 0
+
+            pipeline.process_item(ProductItem(sample_item, upc="UPC2"), None)
+            assert count() == 3
+
+            # close_spider must flush a partial batch
+            pipeline.process_item(ProductItem(sample_item, upc="UPC3"), None)
+            pipeline.close_spider(None)
+            assert count() == 4
+
+        finally:
+            if hasattr(pipeline, "conn"):
+                pipeline.conn.close()
+
+    def test_flush_interval(self, sample_item, tmp_data_dir):
+        """Test that a zero flush interval writes every item immediately."""
+        pipeline = SQLitePipeline(batch_size=1000, flush_interval_ms=0)
+        pipeline.open_spider(None)
+
+        try:
+            pipeline.process_item(ProductItem(sample_item), None)
+            conn = sqlite3.connect(str(tmp_data_dir / "items.db"))
+            assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 1
+            conn.close()
+        finally:
+            pipeline.close_spider(None)
+
+    def test_lenient_validation_batches_at_flush(
+        self, sample_item, tmp_data_dir, monkeypatch
+    ):
+        """Test that lenient mode validates buffered items as one batch."""
+        batches = []
+        validate_items = serialization.validate_items
+
+        def recording(items):
+            batches.append(len(items))
+            return validate_items(items)
+
+        monkeypatch.setattr("web_scraper_project.pipelines.validate_items", recording)
+        pipeline = SQLitePipeline(
+            batch_size=3, flush_interval_ms=60_000, validation_mode="lenient"
+        )
+        pipeline.open_spider(None)
+        try:
+            pipeline.process_item(ProductItem(sample_item, upc="UPC0"), None)
+            pipeline.process_item(
+                ProductItem(sample_item, upc="UPC1", star_rating=9), None
+            )
+            pipeline.process_item(ProductItem(sample_item, upc="UPC2"), None)
+        finally:
+            pipeline.close_spider(None)
+
+        assert batches == [3]
+        conn = sqlite3.connect(str(tmp_data_dir / "items.db"))
+        upcs = [row[0] for row in conn.execute("SELECT upc FROM products ORDER BY upc")]
+        conn.close()
+        assert upcs == ["UPC0", "UPC2"]
+
+    def test_strict_validation_raises(self, sample_item, tmp_data_dir):
+        """Test that strict mode rejects an invalid item as it arrives."""
+        from pydantic import ValidationError
+
+        pipeline = SQLitePipeline(validation_mode="strict")
+        pipeline.open_spider(None)
+        try:
+            with pytest.raises(ValidationError):
+                pipeline.process_item(ProductItem(sample_item, star_rating=9), None)
+        finally:
+            pipeline.close_spider(None)
+
+    def test_pragmas(self, tmp_data_dir):
+        """Test that journal mode and synchronous pragmas are applied."""
+        pipeline = SQLitePipeline(journal_mode="wal", synchronous="off")
+        pipeline.open_spider(None)
+
+        try:
+            assert pipeline.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert pipeline.conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+        finally:
+            pipeline.close_spider(None)
+
+        with pytest.raises(ValueError):
+            SQLitePipeline(synchronous="sometimes")
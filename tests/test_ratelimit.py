@@ -0,0 +1,91 @@
+"""Tests for the adaptive per-host rate limiter."""
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from aiohttp import web
+
+from web_scraper_project.ratelimit import RateLimiter, parse_retry_after
+from web_scraper_project.sessions import SessionPool
+
+
+def test_parse_retry_after():
+    now = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    assert parse_retry_after("120") == 120.0
+    assert (
+        parse_retry_after(
+            format_datetime(now + timedelta(seconds=30), usegmt=True), now=now
+        )
+        == 30.0
+    )
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_rate_adapts_to_responses():
+    limiter = RateLimiter(
+        rate=4, min_rate=1, max_rate=5, increase=0.5, target_latency=1.0
+    ).host("a")
+    limiter.observe(200, 0.1)
+    assert limiter.rate == 4.5
+    limiter.observe(200, 0.1)
+    limiter.observe(200, 0.1)
+    assert limiter.rate == 5  # capped at max_rate
+
+    limiter.observe(429, 0.1, retry_after=2)
+    assert limiter.rate == 2.5
+    assert limiter.blocked_until - time.monotonic() > 1.9
+
+    limiter.observe(200, 10.0)  # slow response: smoothed latency over target
+    assert limiter.rate == 2.25
+    limiter.observe(404, 0.1)  # client errors leave the rate alone
+    assert limiter.rate == 2.25
+
+
+def test_token_bucket_paces_requests():
+    async def run():
+        limiter = RateLimiter(rate=20, burst=1, concurrency=2, increase=0).host("a")
+        started = time.monotonic()
+        for _ in range(5):
+            await limiter.acquire()
+            limiter.release()
+        return time.monotonic() - started
+
+    # One token up front, then one every 50ms.
+    assert 0.18 <= asyncio.run(run()) < 1.0
+
+
+def test_session_honors_retry_after():
+    times = []
+
+    async def handler(request):
+        times.append(time.monotonic())
+        if len(times) == 1:
+            return web.Response(status=429, headers={"Retry-After": "1"})
+        return web.Response(text="ok")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        url = f"http://127.0.0.1:{runner.addresses[0][1]}/"
+        limiter = RateLimiter(rate=100, burst=10)
+        try:
+            async with SessionPool(rate_limiter=limiter) as session:
+                statuses = []
+                for _ in range(2):
+                    async with session.get(url) as response:
+                        statuses.append(response.status)
+        finally:
+            await runner.cleanup()
+        return statuses, limiter
+
+    statuses, limiter = asyncio.run(run())
+    assert statuses == [429, 200]
+    assert times[1] - times[0] >= 0.95
+    assert limiter.stats()["127.0.0.1"]["rate"] < 100
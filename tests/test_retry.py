@@ -0,0 +1,168 @@
+"""Tests for async retries and the per-host circuit breaker."""
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+
+from web_scraper_project.retry import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    RetryMiddleware,
+)
+from web_scraper_project.sessions import SessionPool
+
+
+async def start_flaky_site(failures, status=503):
+    calls = []
+
+    async def handler(request):
+        calls.append(request.path)
+        if len(calls) <= failures:
+            return web.Response(status=status)
+        return web.Response(text="ok")
+
+    app = web.Application()
+    app.router.add_get("/", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{runner.addresses[0][1]}/", calls
+
+
+def fetch_statuses(failures, retry, requests=1, status=503, timeout=None):
+    async def run():
+        runner, url, calls = await start_flaky_site(failures, status)
+        statuses = []
+        try:
+            async with SessionPool(retry=retry, timeout=timeout) as session:
+                for _ in range(requests):
+                    try:
+                        async with session.get(url) as response:
+                            statuses.append(response.status)
+                    except CircuitOpenError:
+                        statuses.append("open")
+        finally:
+            await runner.cleanup()
+        return statuses, calls
+
+    return asyncio.run(run())
+
+
+def test_retries_until_success():
+    retry = RetryMiddleware(times=3, backoff_base=0.01)
+    statuses, calls = fetch_statuses(failures=2, retry=retry)
+    assert statuses == [200]
+    assert len(calls) == 3
+
+
+def test_gives_up_after_retry_times():
+    retry = RetryMiddleware(
+        times=1, backoff_base=0.01, breaker=CircuitBreaker(threshold=100)
+    )
+    statuses, calls = fetch_statuses(failures=10, retry=retry)
+    assert statuses == [503]
+    assert len(calls) == 2
+
+
+def test_status_outside_retry_codes_is_returned():
+    retry = RetryMiddleware(times=3, backoff_base=0.01)
+    statuses, calls = fetch_statuses(failures=1, retry=retry, status=404)
+    assert statuses == [404]
+    assert len(calls) == 1
+
+
+def test_deadline_bounds_total_time():
+    retry = RetryMiddleware(times=10, backoff_base=5, deadline=0.5)
+    started = time.monotonic()
+    statuses, calls = fetch_statuses(failures=10, retry=retry)
+    assert statuses == [503]
+    assert time.monotonic() - started < 5
+
+
+def test_retries_outlast_the_per_attempt_timeout():
+    retry = RetryMiddleware(
+        times=3, backoff_base=0.2, deadline=10, breaker=CircuitBreaker(threshold=100)
+    )
+    started = time.monotonic()
+    statuses, calls = fetch_statuses(failures=10, retry=retry, timeout=0.1)
+    # The last response comes back even though the retries took longer
+    # than HTTP_TIMEOUT in total.
+    assert statuses == [503]
+    assert len(calls) == 4
+    assert time.monotonic() - started > 0.1
+
+
+def test_deadline_abandons_a_running_attempt():
+    async def hang(request):
+        await asyncio.sleep(2)
+        return web.Response(text="late")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/", hang)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        retry = RetryMiddleware(times=3, backoff_base=0.01, deadline=0.3)
+        started = time.monotonic()
+        try:
+            async with SessionPool(retry=retry, timeout=10) as session:
+                with pytest.raises(asyncio.TimeoutError):
+                    await session.get(f"http://127.0.0.1:{runner.addresses[0][1]}/")
+        finally:
+            elapsed = time.monotonic() - started
+            await runner.cleanup()
+        return elapsed
+
+    assert asyncio.run(run()) < 1
+
+
+def test_backoff_is_jittered_and_capped():
+    retry = RetryMiddleware(backoff_base=1, backoff_max=4)
+    delays = [retry.backoff(10) for _ in range(200)]
+    assert all(0 <= delay <= 4 for delay in delays)
+    assert len(set(delays)) > 100
+
+
+def test_circuit_opens_and_fails_fast():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=60)
+    retry = RetryMiddleware(times=0, breaker=breaker)
+    statuses, calls = fetch_statuses(failures=10, retry=retry, requests=4)
+    assert statuses == [503, 503, "open", "open"]
+    assert len(calls) == 2
+    assert breaker.state("127.0.0.1") == OPEN
+
+
+def test_half_open_probe():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=0.05)
+    breaker.failure("a")
+    assert breaker.state("a") == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.check("a")
+    time.sleep(0.06)
+    assert breaker.state("a") == HALF_OPEN
+    breaker.check("a")  # the probe is let through
+    with pytest.raises(CircuitOpenError):
+        breaker.check("a")  # but only one at a time
+    breaker.success("a")
+    assert breaker.state("a") == CLOSED
+
+
+def test_connection_errors_are_retried():
+    async def run():
+        retry = RetryMiddleware(times=2, backoff_base=0.01)
+        async with SessionPool(retry=retry) as session:
+            with pytest.raises(aiohttp.ClientConnectionError):
+                # Nothing listens on port 9 (discard) locally.
+                await session.get("http://127.0.0.1:9/")
+        return retry.breaker._failures["127.0.0.1"]
+
+    assert asyncio.run(run()) == 3
@@ -1,11 +1,12 @@
 """Tests for Pydantic schema validation."""
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 import pytest
 from pydantic import ValidationError
 
-from web_scraper_project.schemas import ProductModel
+from web_scraper_project import schemas
+from web_scraper_project.schemas import ProductModel, validate_batch, validate_dict
 
 
 @pytest.fixture
@@ -27,7 +28,7 @@ def valid_product_data():
         "star_rating": 4,
         "image_url": "https://example.com/image.jpg",
         "url": "https://example.com/book",
-        "scrape_date": datetime.now()
+        "scrape_date": datetime.utcnow()
     }
 
 
@@ -56,7 +57,7 @@ class TestProductModel:
             "star_rating": 4,
             "image_url": "https://example.com/image.jpg",
             "url": "https://example.com/book",
-            "scrape_date": datetime.now()
+            "scrape_date": datetime.utcnow()
         }
 
         # Test each required field
@@ -172,4 +173,158 @@ class TestProductModel:
         product = ProductModel(**string_data)
         assert isinstance(product.price, Decimal)
         assert isinstance(product.availability, int)
-        assert isinstance(product.scrape_date, datetime)
\ No newline at end of file
+        assert isinstance(product.scrape_date, datetime)
+
+
+class TestUtcScrapeDates:
+    """Test suite for the UTC reference time of the future-date check."""
+
+    @pytest.fixture
+    def new_york(self, monkeypatch):
+        time = pytest.importorskip("time")
+        monkeypatch.setenv("TZ", "America/New_York")
+        time.tzset()
+        yield
+        monkeypatch.undo()
+        time.tzset()
+
+    def test_fresh_utc_timestamp_is_valid(self, valid_product_data, new_york):
+        """Test that extraction's utcnow() stamps pass west of UTC."""
+        data = dict(valid_product_data, scrape_date=datetime.utcnow().isoformat())
+        assert ProductModel(**data).scrape_date <= datetime.utcnow()
+        assert validate_dict(ProductModel, data)["scrape_date"] <= datetime.utcnow()
+
+    def test_aware_timestamps(self, valid_product_data):
+        """Test that timezone-aware dates are compared in UTC."""
+        past = dict(valid_product_data, scrape_date="2025-11-06T10:00:00+02:00")
+        assert ProductModel(**past).scrape_date.tzinfo is not None
+        future = datetime.now(timezone.utc) + timedelta(hours=1)
+        with pytest.raises(ValidationError):
+            ProductModel(**dict(valid_product_data, scrape_date=future))
+
+
+class TestFastPath:
+    """Test suite for the precompiled ProductModel fast path."""
+
+    @pytest.fixture
+    def extracted(self, valid_product_data):
+        """Product data in the shape the extraction code produces."""
+        return dict(
+            valid_product_data,
+            price=9.99,
+            price_excl_tax=8.99,
+            price_incl_tax=9.99,
+            tax=0,
+            isbn=None,
+            scrape_date="2025-11-06T10:00:00",
+            content_hash="abc",
+        )
+
+    @pytest.mark.parametrize(
+        "changes",
+        [
+            {},
+            {"price": "  9.99 "},
+            {"category": None, "description": None},
+            {"url": "http://127.0.0.1:8000/catalogue/book-1/index.html"},
+            {"url": "https://Example.com/Book?q=1#top"},
+            {"scrape_date": "2025-11-06T10:00:00Z"},
+            {"isbn": "9780306406157"},
+            {"availability": "5"},
+            {"number_of_reviews": "10"},
+        ],
+    )
+    def test_matches_model(self, extracted, changes):
+        """Test that the fast path returns what the model would."""
+        data = dict(extracted, **changes)
+        assert validate_dict(ProductModel, data) == ProductModel.parse_obj(data).dict()
+
+    @pytest.mark.parametrize(
+        "changes",
+        [
+            {"star_rating": 0},
+            {"price": -1},
+            {"price": "abc"},
+            {"url": "not a url"},
+            {"upc": ""},
+            {"scrape_date": "2999-01-01T00:00:00"},
+            {"scrape_date": "2025-13-45T10:00:00"},
+            {"number_of_reviews": "-1"},
+        ],
+    )
+    def test_invalid_data_raises_model_errors(self, extracted, changes):
+        """Test that invalid data is reported by the model."""
+        with pytest.raises(ValidationError):
+            validate_dict(ProductModel, dict(extracted, **changes))
+
+    def test_extracted_products_take_the_fast_path(self, monkeypatch):
+        """Test that extract_product output never needs the full model."""
+        from pathlib import Path
+
+        from web_scraper_project.extraction import extract_product
+
+        html = (Path(__file__).parent / "fixtures" / "product.html").read_bytes()
+        data = extract_product(
+            html, "http://books.toscrape.com/catalogue/book_1/index.html"
+        )
+        expected = ProductModel.parse_obj(data).dict()
+
+        def slow_path(data):
+            raise AssertionError("fell back to ProductModel.parse_obj")
+
+        monkeypatch.setattr(ProductModel, "parse_obj", slow_path)
+        assert validate_dict(ProductModel, data) == expected
+
+    def test_missing_required_field(self, extracted):
+        """Test that a missing field falls back to the model's error."""
+        del extracted["star_rating"]
+        with pytest.raises(ValidationError) as exc_info:
+            validate_dict(ProductModel, extracted)
+        assert "star_rating" in str(exc_info.value)
+
+
+class TestValidateBatch:
+    """Test suite for batch validation."""
+
+    def test_reads_clock_once_per_batch(self, valid_product_data, monkeypatch):
+        """Test that the reference time is shared by the whole batch."""
+        calls = []
+
+        class CountingDatetime(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                calls.append(1)
+                return super().now(tz)
+
+        monkeypatch.setattr(schemas, "datetime", CountingDatetime)
+        models, errors = validate_batch(ProductModel, [valid_product_data] * 50)
+
+        assert len(models) == 50
+        assert errors == []
+        assert len(calls) == 1
+
+    def test_strict_raises(self, valid_product_data):
+        """Test that strict mode raises on the first invalid item."""
+        invalid = dict(valid_product_data, star_rating=9)
+        with pytest.raises(ValidationError):
+            validate_batch(ProductModel, [valid_product_data, invalid])
+
+    def test_lenient_collects_errors(self, valid_product_data):
+        """Test that lenient mode skips and reports invalid items."""
+        invalid = dict(valid_product_data, star_rating=9)
+        models, errors = validate_batch(
+            ProductModel, [invalid, valid_product_data, invalid], strict=False
+        )
+
+        assert len(models) == 1
+        assert [index for index, _ in errors] == [0, 2]
+        assert "star_rating" in str(errors[0][1])
+
+    def test_future_date_rejected_in_batch(self, valid_product_data):
+        """Test that the pinned reference time still rejects future dates."""
+        future = dict(
+            valid_product_data, scrape_date=datetime.now() + timedelta(days=1)
+        )
+        with pytest.raises(ValidationError) as exc_info:
+            validate_batch(ProductModel, [future])
+        assert "scrape_date cannot be in the future" in str(exc_info.value)
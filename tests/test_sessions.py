@@ -0,0 +1,65 @@
+"""Tests for the shared aiohttp session pool."""
+
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from web_scraper_project.sessions import SessionPool
+
+
+def test_pool_configures_connector_and_reuses_session():
+    async def run():
+        pool = SessionPool(limit=10, limit_per_host=2, dns_cache_ttl=60)
+        session = await pool.start()
+        assert await pool.start() is session
+        assert pool.session is session
+
+        connector = session.connector
+        assert connector.limit == 10
+        assert connector.limit_per_host == 2
+        assert connector.use_dns_cache
+
+        await pool.close()
+        assert session.closed
+        assert not pool.started
+
+    asyncio.run(run())
+
+
+def test_session_requires_start():
+    pool = SessionPool()
+    with pytest.raises(RuntimeError):
+        pool.session
+
+
+def test_timeout_excludes_rate_limiter_waits():
+    async def slow_limiter(request, handler):
+        await asyncio.sleep(0.3)
+        return await handler(request)
+
+    async def handler(request):
+        if request.path == "/slow":
+            await asyncio.sleep(0.5)
+        return web.Response(text="ok")
+
+    async def run():
+        app = web.Application()
+        app.router.add_get("/{name}", handler)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+        try:
+            async with SessionPool(
+                timeout=0.2, rate_limiter=slow_limiter, retry=False
+            ) as session:
+                async with session.get(f"{base}/fast") as response:
+                    assert await response.text() == "ok"
+                with pytest.raises(asyncio.TimeoutError):
+                    await session.get(f"{base}/slow")
+        finally:
+            await runner.cleanup()
+
+    asyncio.run(run())
@@ -46,3 +46,25 @@ def test_book_spider_parses_listing():
     requests = [r for r in results if isinstance(r, Request)]
     assert len(requests) == 1
     assert "page-2.html" in requests[0].url
+
+
+def test_book_spider_reparses_not_modified_products(tmp_path, monkeypatch):
+    from pathlib import Path
+
+    from web_scraper_project.middlewares import HttpCacheMiddleware
+
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    body = (Path(__file__).parent / "fixtures" / "product.html").read_bytes()
+    url = "http://books.toscrape.com/catalogue/book_1/index.html"
+    response = TextResponse(
+        url=url, body=body, encoding="utf-8", flags=[HttpCacheMiddleware.FLAG]
+    )
+
+    items = list(BookSpider(incremental=False).parse_product(response))
+    assert len(items) == 1 and items[0]["url"] == url
+
+    spider = BookSpider(incremental=True)
+    try:
+        assert list(spider.parse_product(response)) == []
+    finally:
+        spider.closed("finished")
@@ -0,0 +1,84 @@
+"""Tests for the typed item store read side."""
+
+import pytest
+
+from web_scraper_project.items import ProductItem
+from web_scraper_project.pipelines import SQLitePipeline
+from web_scraper_project.store import ItemStore
+
+
+def make_product(i, **overrides):
+    price = 10 + i
+    fields = dict(
+        title=f"Book {i}",
+        price=price,
+        upc=f"UPC{i:04d}",
+        product_type="Books",
+        price_excl_tax=price,
+        price_incl_tax=price,
+        tax=0,
+        availability=i,
+        number_of_reviews=0,
+        category="Poetry" if i % 2 else "Travel",
+        star_rating=i % 5 + 1,
+        image_url="http://example.com/image.jpg",
+        url=f"http://example.com/book-{i}",
+        scrape_date="2025-11-06T10:00:00",
+    )
+    fields.update(overrides)
+    return ProductItem(**fields)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr("web_scraper_project.pipelines.DATA_DIR", str(tmp_path))
+    pipeline = SQLitePipeline()
+    pipeline.open_spider(None)
+    for i in range(25):
+        pipeline.process_item(make_product(i), None)
+    pipeline.close_spider(None)
+    return ItemStore()
+
+
+def test_keyset_pagination_visits_every_row_once(store):
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = store.page(after=cursor, limit=10)
+        seen.extend(row["upc"] for row in rows)
+        if cursor is None:
+            break
+    assert seen == [f"UPC{i:04d}" for i in range(25)]
+
+
+def test_filters_and_projection(store):
+    rows, cursor = store.page(
+        category="Poetry", min_price=15, max_price=25, fields=["title", "price"]
+    )
+    assert cursor is None
+    assert all(set(row) == {"id", "title", "price"} for row in rows)
+    assert [row["price"] for row in rows] == [15.0, 17.0, 19.0, 21.0, 23.0, 25.0]
+
+    rows, _ = store.page(min_rating=5, limit=100)
+    assert rows and all(row["star_rating"] == 5 for row in rows)
+
+
+def test_iter_rows_streams_in_chunks(store):
+    rows = list(store.iter_rows(category="Travel", chunk_size=4))
+    assert len(rows) == 13
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+
+def test_invalid_queries_raise(store):
+    with pytest.raises(ValueError):
+        store.page(table="nope")
+    with pytest.raises(ValueError):
+        store.page(fields=["password"])
+    with pytest.raises(ValueError):
+        store.iter_rows(table="items", min_price=1)
+
+
+def test_missing_database(tmp_path):
+    store = ItemStore(db_path=str(tmp_path / "missing.db"))
+    assert store.page() == ([], None)
+    assert list(store.iter_rows()) == []
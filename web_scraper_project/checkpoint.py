@@ -0,0 +1,143 @@
+"""Crawl checkpoints so an interrupted `AsyncBookSpider` crawl can resume.
+
+A checkpoint directory holds:
+
+- ``frontier.log``: an append-only JSON Lines log with one ``add`` entry
+  per scheduled URL and one ``done`` entry per finished URL.
+- ``snapshot.json``: the URLs pending (queued or in flight) at the last
+  snapshot, plus the crawl stats; the log only holds what happened since.
+- ``seen.db``: the crawl's `SQLiteSeenSet` (see `seen_path`).
+
+Every `interval` seconds the pending set is written to a new snapshot
+(atomically, via rename) and the log is truncated, so replay work stays
+bounded however long the crawl runs. Resuming loads the snapshot, replays
+the log and re-queues everything that was pending, including requests that
+were in flight when the process died.
+"""
+
+import json
+import os
+import time
+
+from . import settings as project_settings
+
+
+class CrawlCheckpoint:
+    """Persist a crawl's frontier to `path` as a log plus periodic snapshots."""
+
+    LOG = "frontier.log"
+    SNAPSHOT = "snapshot.json"
+    SEEN = "seen.db"
+
+    def __init__(self, path, interval=None):
+        self.path = path
+        self.interval = (
+            interval if interval is not None else project_settings.CHECKPOINT_INTERVAL
+        )
+        self.pending = {}
+        self.stats = {}
+        self.finished = False
+        self.resumed = False
+        self._log = None
+        self._last_snapshot = time.monotonic()
+
+    @property
+    def log_path(self):
+        return os.path.join(self.path, self.LOG)
+
+    @property
+    def snapshot_path(self):
+        return os.path.join(self.path, self.SNAPSHOT)
+
+    @property
+    def seen_path(self):
+        return os.path.join(self.path, self.SEEN)
+
+    def open(self, resume=False):
+        """Open the checkpoint, loading previous state when `resume` is set.
+
+        Without `resume` any previous checkpoint in `path` is discarded.
+        `resumed` tells whether there was a previous checkpoint to load.
+        """
+        os.makedirs(self.path, exist_ok=True)
+        if resume:
+            self._load()
+        else:
+            for name in (self.LOG, self.SNAPSHOT):
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+        self._log = open(self.log_path, "a", encoding="utf-8", buffering=1)
+        self._last_snapshot = time.monotonic()
+        return self
+
+    def _load(self):
+        self.resumed = os.path.exists(self.snapshot_path) or os.path.exists(
+            self.log_path
+        )
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+            self.pending = {
+                url: (priority, meta) for priority, url, meta in snapshot["pending"]
+            }
+            self.stats = snapshot.get("stats", {})
+            self.finished = snapshot.get("finished", False)
+        if os.path.exists(self.log_path):
+            with open(self.log_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # A torn final line from a crash; nothing after it.
+                        break
+                    if entry["op"] == "add":
+                        self.pending[entry["url"]] = (
+                            entry["priority"],
+                            entry.get("meta"),
+                        )
+                        self.finished = False
+                    else:
+                        self.pending.pop(entry["url"], None)
+
+    def add(self, priority, url, meta=None):
+        self.pending[url] = (priority, meta)
+        self._write({"op": "add", "priority": priority, "url": url, "meta": meta})
+
+    def done(self, url):
+        self.pending.pop(url, None)
+        self._write({"op": "done", "url": url})
+
+    def _write(self, entry):
+        self._log.write(json.dumps(entry) + "\n")
+
+    def maybe_snapshot(self, stats=None):
+        if time.monotonic() - self._last_snapshot >= self.interval:
+            self.snapshot(stats)
+
+    def snapshot(self, stats=None, finished=False):
+        """Write the pending set atomically and start a fresh log."""
+        if stats is not None:
+            self.stats = dict(stats)
+        snapshot = {
+            "pending": [
+                [priority, url, meta] for url, (priority, meta) in self.pending.items()
+            ],
+            "stats": self.stats,
+            "finished": finished,
+        }
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(snapshot, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        self._log.close()
+        self._log = open(self.log_path, "w", encoding="utf-8", buffering=1)
+        self._last_snapshot = time.monotonic()
+        self.finished = finished
+
+    def close(self, stats=None, finished=False):
+        if self._log is not None:
+            self.snapshot(stats, finished=finished)
+            self._log.close()
+            self._log = None
@@ -0,0 +1,260 @@
+"""Seen-sets for crawl frontier deduplication.
+
+A seen-set answers "has this URL (or request fingerprint) been scheduled
+before?" and records it in the same call. Keys are reduced to 128-bit
+fingerprints, so memory no longer depends on URL length:
+
+- `MemorySeenSet`: an exact in-memory set of fingerprints.
+- `BloomSeenSet`: a fixed-size Bloom filter sized from an expected
+  `capacity` and a target false-positive `error_rate`; ten million URLs at
+  0.1% take about 18 MB. A false positive makes the crawl skip a URL it
+  has not actually seen, never fetch one twice.
+- `SQLiteSeenSet`: an exact set on disk that survives restarts, for
+  resumable crawls. Without an explicit path each set gets its own
+  temporary file, so concurrent crawls never share (or clear) one.
+
+`make_seen_set` builds the kind configured by ``SEEN_SET``, and
+`SeenSetDupeFilter` plugs any of them into Scrapy as ``DUPEFILTER_CLASS``
+(always the SQLite set under ``JOBDIR``, so paused jobs resume).
+"""
+
+import hashlib
+import math
+import os
+import sqlite3
+import tempfile
+
+from scrapy.dupefilters import BaseDupeFilter
+
+from . import settings as project_settings
+
+
+def fingerprint(key):
+    """Reduce a URL or request fingerprint to 16 bytes."""
+    if isinstance(key, str):
+        key = key.encode("utf-8")
+    return hashlib.blake2b(key, digest_size=16).digest()
+
+
+class MemorySeenSet:
+    """Exact seen-set of fingerprints held in memory."""
+
+    def __init__(self):
+        self._fingerprints = set()
+
+    def add(self, key):
+        """Record `key`; return True if it was not seen before."""
+        fp = fingerprint(key)
+        if fp in self._fingerprints:
+            return False
+        self._fingerprints.add(fp)
+        return True
+
+    def __contains__(self, key):
+        return fingerprint(key) in self._fingerprints
+
+    def __len__(self):
+        return len(self._fingerprints)
+
+    def close(self):
+        pass
+
+
+class BloomSeenSet:
+    """Probabilistic seen-set with a fixed memory footprint.
+
+    Uses ``k`` bit positions per key derived by double hashing the two
+    halves of the key's fingerprint.
+    """
+
+    def __init__(self, capacity=None, error_rate=None):
+        self.capacity = capacity or project_settings.SEEN_SET_CAPACITY
+        self.error_rate = error_rate or project_settings.SEEN_SET_ERROR_RATE
+        if not 0 < self.error_rate < 1:
+            raise ValueError(
+                f"error_rate must be between 0 and 1, got {self.error_rate}"
+            )
+        self.num_bits = max(
+            8, int(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2)
+        )
+        self.num_hashes = max(1, round(self.num_bits / self.capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+        self._count = 0
+
+    def _positions(self, key):
+        fp = fingerprint(key)
+        h1 = int.from_bytes(fp[:8], "little")
+        h2 = int.from_bytes(fp[8:], "little") | 1
+        m = self.num_bits
+        return [(h1 + i * h2) % m for i in range(self.num_hashes)]
+
+    def add(self, key):
+        """Record `key`; return True if it was (probably) not seen before."""
+        bits = self._bits
+        new = False
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                new = True
+        if new:
+            self._count += 1
+        return new
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+    def __len__(self):
+        """Approximate number of distinct keys added."""
+        return self._count
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+    def close(self):
+        pass
+
+
+class SQLiteSeenSet:
+    """Exact seen-set persisted in an SQLite file.
+
+    Opening clears the set unless `resume` is set, in which case keys from
+    the previous run are kept. Inserts are committed every `batch_size`
+    keys and on `flush`/`close`. Without a `path` the set lives in a
+    temporary file of its own (see `default_seen_path`), removed on
+    `close`; only a set opened on an explicit path, such as a job
+    directory's, can be resumed.
+    """
+
+    def __init__(self, path=None, resume=False, batch_size=1000):
+        if path is None and resume:
+            raise ValueError("Resuming a seen-set needs the path it was stored at")
+        self.temporary = path is None
+        self.path = path or default_seen_path()
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS seen (fingerprint BLOB PRIMARY KEY) "
+            "WITHOUT ROWID"
+        )
+        if not resume:
+            self._conn.execute("DELETE FROM seen")
+        self._conn.commit()
+        self._count = self._conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0]
+        self._uncommitted = 0
+
+    def add(self, key):
+        """Record `key`; return True if it was not seen before."""
+        cursor = self._conn.execute(
+            "INSERT OR IGNORE INTO seen (fingerprint) VALUES (?)", (fingerprint(key),)
+        )
+        if not cursor.rowcount:
+            return False
+        self._count += 1
+        self._uncommitted += 1
+        if self._uncommitted >= self.batch_size:
+            self.flush()
+        return True
+
+    def __contains__(self, key):
+        row = self._conn.execute(
+            "SELECT 1 FROM seen WHERE fingerprint = ?", (fingerprint(key),)
+        ).fetchone()
+        return row is not None
+
+    def __len__(self):
+        return self._count
+
+    def flush(self):
+        self._conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+            if self.temporary:
+                for suffix in ("", "-wal", "-shm"):
+                    try:
+                        os.remove(self.path + suffix)
+                    except FileNotFoundError:
+                        pass
+
+
+SEEN_SETS = {
+    "memory": MemorySeenSet,
+    "bloom": BloomSeenSet,
+    "sqlite": SQLiteSeenSet,
+}
+
+
+def default_seen_path():
+    """A fresh, uniquely named seen-set file for one crawl under ``DATA_DIR``."""
+    # Resolved at call time so tests patching `pipelines.DATA_DIR` apply.
+    from . import pipelines
+
+    os.makedirs(pipelines.DATA_DIR, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="seen-", suffix=".db", dir=pipelines.DATA_DIR)
+    os.close(fd)
+    return path
+
+
+def make_seen_set(kind=None, **kwargs):
+    """Build a seen-set of `kind` ("memory", "bloom" or "sqlite")."""
+    kind = (kind or project_settings.SEEN_SET).lower()
+    if kind not in SEEN_SETS:
+        raise ValueError(f"Unknown seen-set kind: {kind}")
+    return SEEN_SETS[kind](**kwargs)
+
+
+class SeenSetDupeFilter(BaseDupeFilter):
+    """Scrapy dupefilter backed by a seen-set of request fingerprints."""
+
+    def __init__(self, seen=None, fingerprinter=None, debug=False):
+        self.seen = seen if seen is not None else make_seen_set()
+        self.fingerprinter = fingerprinter
+        self.debug = debug
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        kind = settings.get("SEEN_SET", project_settings.SEEN_SET)
+        kwargs = {}
+        jobdir = settings.get("JOBDIR")
+        if jobdir:
+            # Like Scrapy's own dupefilter, keep and reuse the seen-set of a
+            # persistent job so `-s JOBDIR=...` runs can be resumed.
+            kind = "sqlite"
+            kwargs = {"path": os.path.join(jobdir, "seen.db"), "resume": True}
+        elif kind == "bloom":
+            kwargs = {
+                "capacity": settings.getint(
+                    "SEEN_SET_CAPACITY", project_settings.SEEN_SET_CAPACITY
+                ),
+                "error_rate": settings.getfloat(
+                    "SEEN_SET_ERROR_RATE", project_settings.SEEN_SET_ERROR_RATE
+                ),
+            }
+        return cls(
+            seen=make_seen_set(kind, **kwargs),
+            fingerprinter=crawler.request_fingerprinter,
+            debug=settings.getbool("DUPEFILTER_DEBUG"),
+        )
+
+    def request_seen(self, request):
+        return not self.seen.add(self.fingerprinter.fingerprint(request))
+
+    def close(self, reason):
+        self.seen.close()
+
+    def log(self, request, spider):
+        if self.debug:
+            spider.logger.debug(
+                "Filtered duplicate request: %(request)s", {"request": request}
+            )
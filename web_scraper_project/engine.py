@@ -0,0 +1,249 @@
+"""In-process crawl engine used by the FastAPI app.
+
+The engine replaces spawning `scrapy crawl` per request: crawl jobs run as
+asyncio tasks on the application's event loop, driving `AsyncBookSpider`
+directly and feeding its items through the project's item pipelines. A
+semaphore caps how many crawls run at once; submitting a job only registers
+it and returns immediately, so the API can accept many submissions per
+second while crawls proceed in the background.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from scrapy.exceptions import DropItem, NotConfigured
+from scrapy.utils.misc import load_object
+
+from . import settings as project_settings
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+TERMINAL_STATES = (FINISHED, FAILED, CANCELLED)
+
+
+def _utcnow():
+    return datetime.utcnow().isoformat() + "Z"
+
+
+def default_spider_factory(url):
+    """Build an `AsyncBookSpider` starting at `url`."""
+    # Imported lazily so the engine module stays importable from Scrapy
+    # project code without pulling in the spider package.
+    from scraper.spiders.book_spider import AsyncBookSpider
+
+    return AsyncBookSpider(start_urls=[url])
+
+
+def load_pipelines(pipeline_paths=None, append=False):
+    """Instantiate item pipelines from an ``ITEM_PIPELINES``-style mapping.
+
+    Pipelines are returned in ascending priority order, matching Scrapy, and
+    pipelines raising `NotConfigured` are skipped. With `append`, pipelines
+    writing a single output file (those with an ``append`` attribute, like
+    `JsonLinesPipeline`) append to it instead of truncating it, for when
+    other processes write to the same file.
+    """
+    if pipeline_paths is None:
+        pipeline_paths = project_settings.ITEM_PIPELINES
+    ordered = sorted(pipeline_paths.items(), key=lambda kv: kv[1])
+    pipelines = []
+    for path, _priority in ordered:
+        try:
+            pipeline = load_object(path)()
+        except NotConfigured as e:
+            logger.info("Disabled item pipeline %s: %s", path, e)
+            continue
+        if append and hasattr(pipeline, "append"):
+            pipeline.append = True
+        pipelines.append(pipeline)
+    return pipelines
+
+
+def process_item(pipelines, item, spider):
+    """Run `item` through `pipelines`, returning it or None when it was lost.
+
+    As in Scrapy, a pipeline raising `DropItem` drops the item and any
+    other exception is logged; either way the crawl goes on. Lost items are
+    counted in the spider's ``items_dropped`` and ``item_errors`` stats.
+    """
+    stats = getattr(spider, "stats", None)
+    try:
+        for pipeline in pipelines:
+            item = pipeline.process_item(item, spider)
+    except DropItem as e:
+        logger.warning("Dropped: %s\n%r", e, item)
+        key = "items_dropped"
+    except Exception:
+        logger.exception("Error processing %r", item)
+        key = "item_errors"
+    else:
+        return item
+    if stats is not None:
+        stats[key] = stats.get(key, 0) + 1
+    return None
+
+
+class CrawlJob:
+    """State and counters for a single crawl submitted to the engine."""
+
+    def __init__(self, url):
+        self.id = uuid.uuid4().hex
+        self.url = url
+        self.state = PENDING
+        self.items_scraped = 0
+        self.error = None
+        self.created_at = _utcnow()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+        self.spider = None
+
+    @property
+    def done(self):
+        return self.state in TERMINAL_STATES
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "url": self.url,
+            "state": self.state,
+            "items_scraped": self.items_scraped,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "stats": dict(getattr(self.spider, "stats", None) or {}),
+        }
+
+
+class CrawlEngine:
+    """Run crawl jobs concurrently on the current event loop.
+
+    Pipelines are opened once in `start()` and shared by every job, so the
+    engine must be started from within the loop that will run the jobs and
+    stopped before that loop closes. When a started `SessionPool` is given,
+    every job fetches through its shared session.
+    """
+
+    def __init__(
+        self,
+        spider_factory=None,
+        pipelines=None,
+        max_concurrent_jobs=None,
+        max_retained_jobs=None,
+        session_pool=None,
+    ):
+        self.spider_factory = spider_factory or default_spider_factory
+        self.session_pool = session_pool
+        self.pipelines = pipelines
+        self.max_concurrent_jobs = (
+            max_concurrent_jobs or project_settings.CRAWL_ENGINE_MAX_JOBS
+        )
+        self.max_retained_jobs = (
+            max_retained_jobs or project_settings.CRAWL_ENGINE_RETAINED_JOBS
+        )
+        self.jobs = OrderedDict()
+        self._slots = None
+        self._started = False
+
+    async def start(self):
+        if self._started:
+            return
+        if self.pipelines is None:
+            # Queue workers write the same items.jl, so never truncate it.
+            self.pipelines = load_pipelines(append=True)
+        for pipeline in self.pipelines:
+            if hasattr(pipeline, "open_spider"):
+                pipeline.open_spider(None)
+        self._slots = asyncio.Semaphore(self.max_concurrent_jobs)
+        self._started = True
+
+    async def stop(self):
+        if not self._started:
+            return
+        running = [job.task for job in self.jobs.values() if not job.done]
+        for task in running:
+            task.cancel()
+        if running:
+            await asyncio.gather(*running, return_exceptions=True)
+        for pipeline in self.pipelines:
+            if hasattr(pipeline, "close_spider"):
+                pipeline.close_spider(None)
+        self._started = False
+
+    def submit(self, url):
+        """Register a crawl of `url` and schedule it; returns the `CrawlJob`."""
+        if not self._started:
+            raise RuntimeError("CrawlEngine.start() must be awaited before submit()")
+        job = CrawlJob(url)
+        self.jobs[job.id] = job
+        job.task = asyncio.get_running_loop().create_task(self._run(job))
+        job.task.add_done_callback(lambda _task: self._mark_cancelled(job))
+        self._evict_finished()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None or job.done:
+            return False
+        job.task.cancel()
+        return True
+
+    async def wait(self, job_id):
+        job = self.jobs[job_id]
+        await asyncio.gather(job.task, return_exceptions=True)
+        return job
+
+    def _flush_pipelines(self):
+        # Buffered pipelines only flush as items arrive; make a finished
+        # job's items visible without waiting for the next job.
+        for pipeline in self.pipelines:
+            if hasattr(pipeline, "flush"):
+                pipeline.flush()
+
+    @staticmethod
+    def _mark_cancelled(job):
+        # A task cancelled before its first step never enters `_run`.
+        if not job.done:
+            job.state = CANCELLED
+            job.finished_at = _utcnow()
+
+    def _evict_finished(self):
+        excess = len(self.jobs) - self.max_retained_jobs
+        if excess <= 0:
+            return
+        for job_id in [jid for jid, job in self.jobs.items() if job.done][:excess]:
+            del self.jobs[job_id]
+
+    async def _run(self, job):
+        try:
+            async with self._slots:
+                job.state = RUNNING
+                job.started_at = _utcnow()
+                spider = job.spider = self.spider_factory(job.url)
+                session = self.session_pool.session if self.session_pool else None
+                async for item in spider.crawl(session=session):
+                    if process_item(self.pipelines, item, spider) is not None:
+                        job.items_scraped += 1
+                self._flush_pipelines()
+            job.state = FINISHED
+        except asyncio.CancelledError:
+            job.state = CANCELLED
+        except Exception as e:
+            logger.exception("Crawl job %s for %s failed", job.id, job.url)
+            job.state = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = _utcnow()
@@ -0,0 +1,104 @@
+"""Streaming exporters for the scraped dataset.
+
+Each exporter turns an iterator of rows into an iterator of byte chunks of
+roughly `chunk_size` bytes, so a response can be streamed with constant
+memory however many rows are exported. `gzip_chunks` wraps any of them with
+incremental gzip compression.
+"""
+
+import csv
+import io
+import json
+import os
+import zlib
+
+CHUNK_SIZE = 1 << 16
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _dumps(row):
+    return json.dumps(row, ensure_ascii=False)
+
+
+def ndjson_chunks(rows, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(_dumps(row))
+        buffer.write("\n")
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def json_array_chunks(rows, chunk_size=CHUNK_SIZE, raw=False):
+    """Stream rows as one JSON array; with `raw`, rows are already JSON text."""
+    buffer = io.StringIO()
+    buffer.write("[")
+    separator = ""
+    for row in rows:
+        buffer.write(separator)
+        buffer.write(row if raw else _dumps(row))
+        separator = ","
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    buffer.write("]")
+    yield buffer.getvalue().encode("utf-8")
+
+
+def csv_chunks(rows, fieldnames, chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def default_jsonl_path():
+    # Resolved at call time so tests patching `pipelines.DATA_DIR` apply.
+    from . import pipelines
+
+    return os.path.join(pipelines.DATA_DIR, "items.jl")
+
+
+def jsonl_file_lines(path):
+    """Yield the JSON text of each line in a JSON Lines file."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield line
+
+
+def jsonl_file_chunks(path, chunk_size=CHUNK_SIZE):
+    """Pass a JSON Lines file through unchanged, `chunk_size` bytes at a time."""
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def gzip_chunks(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,160 @@
+"""Fast HTML extraction for books.toscrape.com pages.
+
+Pages are parsed once with lxml straight from the raw response bytes, and
+every XPath, regex and lookup table is compiled at import time rather than
+per page. Product pages are filled in a single pass over the tree: one
+`iter()` over the handful of tags that carry data, dispatching on tag and
+class. Both functions take and return plain data (bytes in, dicts out) so
+they can run in a worker process as well as in the spiders.
+"""
+
+import re
+from datetime import datetime
+from urllib.parse import urljoin
+
+from lxml import etree
+
+RATINGS_MAP = {"One": 1, "Two": 2, "Three": 3, "Four": 4, "Five": 5}
+
+INFO_MAP = {
+    "UPC": "upc",
+    "Product Type": "product_type",
+    "Price (excl. tax)": "price_excl_tax",
+    "Price (incl. tax)": "price_incl_tax",
+    "Tax": "tax",
+    "Availability": "availability",
+    "Number of reviews": "number_of_reviews",
+}
+
+PRICE_FIELDS = ("price", "price_excl_tax", "price_incl_tax", "tax")
+
+NUMBER_RE = re.compile(r"\d+")
+PRICE_RE = re.compile(r"[\d.]+")
+
+_CLASS = "contains(concat(' ', normalize-space(@class), ' '), ' {} ')"
+LISTING_ARTICLES = etree.XPath(f"//article[{_CLASS.format('product_pod')}]")
+ARTICLE_LINK = etree.XPath("(.//h3/a)[1]")
+ARTICLE_IMAGE = etree.XPath(
+    "string((.//div[{}]//img)[1]/@src)".format(_CLASS.format("image_container"))
+)
+ARTICLE_PRICE = etree.XPath(f"string((.//p[{_CLASS.format('price_color')}])[1])")
+NEXT_PAGES = etree.XPath(f"//li[{_CLASS.format('next')}]/a/@href")
+
+PRODUCT_TAGS = ("h1", "p", "ul", "th", "div")
+
+_parsers = {}
+
+
+def _parse(body, encoding):
+    if isinstance(body, str):
+        return etree.fromstring(body, etree.HTMLParser())
+    parser = _parsers.get(encoding)
+    if parser is None:
+        parser = _parsers[encoding] = etree.HTMLParser(encoding=encoding)
+    return etree.fromstring(body, parser)
+
+
+def _text(element):
+    return "".join(element.itertext()).strip() or None
+
+
+def _classes(element):
+    return (element.get("class") or "").split()
+
+
+def extract_listing(body, url, encoding="utf-8"):
+    """Extract product links and pagination from a listing page.
+
+    Returns ``{"products": [...], "next_pages": [...]}``. Each product is a
+    dict with the absolute product ``url`` (None when the listing has no
+    link) and the listing ``title``, ``listing_price`` and ``image_url``.
+    """
+    root = _parse(body, encoding)
+    if root is None:
+        return {"products": [], "next_pages": []}
+    products = []
+    for article in LISTING_ARTICLES(root):
+        links = ARTICLE_LINK(article)
+        link = links[0] if links else None
+        href = link.get("href") if link is not None else None
+        image = ARTICLE_IMAGE(article)
+        products.append(
+            {
+                "url": urljoin(url, href) if href else None,
+                "title": (
+                    (link.get("title") or _text(link)) if link is not None else None
+                ),
+                "listing_price": ARTICLE_PRICE(article).strip() or None,
+                "image_url": urljoin(url, image) if image else None,
+            }
+        )
+    return {
+        "products": products,
+        "next_pages": [urljoin(url, href) for href in NEXT_PAGES(root)],
+    }
+
+
+def extract_product(body, url, meta=None, encoding="utf-8"):
+    """Extract a product page into a dict of `ProductItem` fields."""
+    meta = meta or {}
+    root = _parse(body, encoding)
+    item = {"url": url, "scrape_date": datetime.utcnow().isoformat()}
+    if root is None:
+        return item
+
+    page_price = None
+    image = None
+    for element in root.iter(*PRODUCT_TAGS):
+        tag = element.tag
+        if tag == "th":
+            field = INFO_MAP.get(_text(element))
+            value = element.getnext()
+            if field and value is not None and value.tag == "td":
+                item[field] = _text(value)
+        elif tag == "p":
+            classes = _classes(element)
+            if "star-rating" in classes and "star_rating" not in item:
+                item["star_rating"] = RATINGS_MAP.get(classes[-1])
+            elif "price_color" in classes and page_price is None:
+                page_price = _text(element)
+        elif tag == "h1":
+            if "title" not in item:
+                item["title"] = _text(element)
+        elif tag == "div":
+            if element.get("id") == "product_description":
+                description = element.getnext()
+                if description is not None and description.tag == "p":
+                    item["description"] = _text(description)
+            elif image is None and {"item", "active"} <= set(_classes(element)):
+                for img in element.iter("img"):
+                    image = img.get("src")
+                    break
+        elif tag == "ul" and "breadcrumb" in _classes(element):
+            crumbs = [
+                _text(a)
+                for li in element.iterchildren("li")
+                for a in li.iterchildren("a")
+            ]
+            # The first crumb is "Home", the last one the product's category.
+            item["category"] = crumbs[-1] if len(crumbs) > 1 else None
+
+    item["price"] = meta.get("listing_price") or page_price
+    image = meta.get("image_url") or image
+    item["image_url"] = urljoin(url, image) if image else None
+    item.setdefault("description", None)
+    item.setdefault("category", None)
+
+    availability = item.get("availability")
+    if availability:
+        match = NUMBER_RE.search(availability)
+        if match:
+            item["availability"] = int(match.group())
+
+    for field in PRICE_FIELDS:
+        value = item.get(field)
+        if value:
+            match = PRICE_RE.search(value)
+            if match:
+                item[field] = float(match.group())
+
+    return item
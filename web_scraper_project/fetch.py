@@ -0,0 +1,161 @@
+"""Bounded-concurrency fetching helpers for the async code paths.
+
+`fetch_many` drives a fixed pool of worker tasks over an iterable of URLs
+instead of scheduling one task per URL, so a large batch never opens more
+than `concurrency` sockets (and no more than `per_host` to any one host) and
+only a bounded number of results is buffered at a time. Workers only take
+URLs whose host has a free slot, so a host at its `per_host` limit does not
+tie up workers other hosts could use. Results are yielded in completion
+order, as soon as each URL finishes.
+"""
+
+import asyncio
+from collections import deque
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from . import settings as project_settings
+from .httpcache import cached_get
+
+
+class HostScheduler:
+    """Hand out `urls` so that no host has more than `limit` in flight.
+
+    URLs read while their host is at its limit wait in a per-host queue
+    (at most `backlog` of them in all) rather than holding up a worker, so
+    other hosts' URLs are fetched in the meantime. A host's state is dropped
+    once it has nothing queued or in flight.
+    """
+
+    def __init__(self, urls, limit, backlog):
+        self.limit = limit
+        self.backlog = backlog
+        self._urls = iter(urls)
+        self._exhausted = False
+        self._waiting = {}
+        self._buffered = 0
+        self._active = {}
+        self._released = asyncio.Event()
+
+    def _free(self, host):
+        return self._active.get(host, 0) < self.limit
+
+    def _next(self):
+        for host, queue in self._waiting.items():
+            if self._free(host):
+                url = queue.popleft()
+                self._buffered -= 1
+                if not queue:
+                    del self._waiting[host]
+                return host, url
+        while not self._exhausted and self._buffered < self.backlog:
+            url = next(self._urls, None)
+            if url is None:
+                self._exhausted = True
+                break
+            host = urlsplit(url).netloc
+            if self._free(host) and host not in self._waiting:
+                return host, url
+            self._waiting.setdefault(host, deque()).append(url)
+            self._buffered += 1
+        return None
+
+    async def acquire(self):
+        """Return the next ``(host, url)`` to fetch, or None when all are handed out."""
+        while True:
+            picked = self._next()
+            if picked is not None:
+                host, _url = picked
+                self._active[host] = self._active.get(host, 0) + 1
+                return picked
+            if self._exhausted and not self._waiting:
+                return None
+            await self._released.wait()
+
+    def release(self, host):
+        self._active[host] -= 1
+        if not self._active[host]:
+            del self._active[host]
+        released, self._released = self._released, asyncio.Event()
+        released.set()
+
+    def __len__(self):
+        return len(self._active.keys() | self._waiting.keys())
+
+
+async def fetch_status(session, url, cache=None):
+    """GET `url` and summarise the outcome as a JSON-serialisable dict.
+
+    With a `ResponseCache`, cached URLs are revalidated and a 304 counts as
+    success with ``"not_modified": True``.
+    """
+    try:
+        response = await cached_get(session, url, cache)
+    except aiohttp.ClientResponseError as e:
+        return {"url": url, "status": "failed", "reason": e.status}
+    except aiohttp.ClientError as e:
+        return {"url": url, "status": "error", "reason": str(e)}
+    if response.status != 200:
+        return {"url": url, "status": "failed", "reason": response.status}
+    result = {"url": url, "status": "success"}
+    if response.not_modified:
+        result["not_modified"] = True
+    return result
+
+
+async def fetch_many(
+    urls,
+    fetch_one,
+    concurrency=None,
+    per_host=None,
+    timeout=None,
+):
+    """Yield ``await fetch_one(url)`` for every URL, in completion order.
+
+    `fetch_one` should return a result rather than raise; timeouts and
+    unexpected exceptions are converted to ``{"url", "status": "error",
+    "reason"}`` dicts so one bad URL never aborts the batch.
+    """
+    concurrency = concurrency or project_settings.FETCH_CONCURRENCY
+    per_host = per_host or project_settings.FETCH_CONCURRENCY_PER_HOST
+    timeout = timeout or project_settings.FETCH_TIMEOUT
+
+    hosts = HostScheduler(urls, per_host, backlog=4 * concurrency)
+    results = asyncio.Queue(maxsize=concurrency)
+    done = object()
+
+    async def run_one(url):
+        try:
+            return await asyncio.wait_for(fetch_one(url), timeout)
+        except asyncio.TimeoutError:
+            return {"url": url, "status": "error", "reason": "timeout"}
+        except Exception as e:
+            return {"url": url, "status": "error", "reason": str(e)}
+
+    async def worker():
+        while True:
+            picked = await hosts.acquire()
+            if picked is None:
+                break
+            host, url = picked
+            try:
+                result = await run_one(url)
+            finally:
+                hosts.release(host)
+            await results.put(result)
+        await results.put(done)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        remaining = len(workers)
+        while remaining:
+            result = await results.get()
+            if result is done:
+                remaining -= 1
+            else:
+                yield result
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
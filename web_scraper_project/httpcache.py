@@ -0,0 +1,288 @@
+"""On-disk HTTP response cache with conditional revalidation.
+
+`ResponseCache` keeps the last successful response for each URL in
+``httpcache.db`` together with its ``ETag``/``Last-Modified`` validators.
+Revisiting a cached URL sends ``If-None-Match``/``If-Modified-Since``; a
+``304 Not Modified`` answer is served from the cache and marked as
+unchanged, so callers can skip re-parsing it. The cache is bounded to
+`max_bytes` of bodies and evicts the least recently used entries first.
+
+The same cache backs `AsyncBookSpider.fetch`, the Scrapy downloader (via
+`HttpCacheMiddleware`) and the API's download endpoints; only responses
+carrying a validator are stored, since nothing else can be revalidated.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import settings as project_settings
+
+# Response headers kept with each entry: enough to rebuild the response.
+STORED_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+def default_cache_path():
+    # Resolved at call time so tests patching `pipelines.DATA_DIR` apply.
+    from . import pipelines
+
+    return os.path.join(pipelines.DATA_DIR, "httpcache.db")
+
+
+class CachedResponse:
+    """A response body and headers as stored in (or served from) the cache."""
+
+    __slots__ = ("url", "status", "headers", "body", "not_modified")
+
+    def __init__(self, url, status, headers, body, not_modified=False):
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.not_modified = not_modified
+
+    @property
+    def etag(self):
+        return self.headers.get("ETag")
+
+    @property
+    def last_modified(self):
+        return self.headers.get("Last-Modified")
+
+    def conditional_headers(self):
+        """Request headers revalidating this entry with the origin."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def stored_headers(headers):
+    """Pick the `STORED_HEADERS` out of any case-insensitive mapping."""
+    picked = {}
+    for name in STORED_HEADERS:
+        value = headers.get(name)
+        if isinstance(value, bytes):
+            value = value.decode("latin-1")
+        if value:
+            picked[name] = value
+    return picked
+
+
+class ResponseCache:
+    """SQLite-backed, size-bounded LRU cache of validated responses.
+
+    Several processes may share one cache file, so the total body size is
+    kept in the database (``cache_size``, maintained by triggers) rather
+    than per instance. Reads do not write: the access times `get` records
+    are written in batches of `touch_batch`, before any eviction and on
+    `close`.
+    """
+
+    def __init__(self, path=None, max_bytes=None, touch_batch=64):
+        self.path = path or default_cache_path()
+        self.max_bytes = (
+            max_bytes
+            if max_bytes is not None
+            else project_settings.HTTP_CACHE_MAX_BYTES
+        )
+        self.touch_batch = touch_batch
+        self._lock = threading.Lock()
+        self._conn = None
+        self._touched = {}
+
+    def open(self):
+        if self._conn is not None:
+            return self
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS responses (
+                    url TEXT PRIMARY KEY,
+                    status INTEGER,
+                    headers TEXT,
+                    body BLOB,
+                    size INTEGER,
+                    stored_at REAL,
+                    accessed_at REAL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS ix_responses_accessed_at "
+                "ON responses (accessed_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_size (bytes INTEGER NOT NULL)"
+            )
+            conn.execute(
+                "INSERT INTO cache_size SELECT COALESCE(SUM(size), 0) FROM responses "
+                "WHERE NOT EXISTS (SELECT 1 FROM cache_size)"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_insert "
+                "AFTER INSERT ON responses "
+                "BEGIN UPDATE cache_size SET bytes = bytes + new.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_delete "
+                "AFTER DELETE ON responses "
+                "BEGIN UPDATE cache_size SET bytes = bytes - old.size; END"
+            )
+            conn.execute(
+                "CREATE TRIGGER IF NOT EXISTS responses_resize "
+                "AFTER UPDATE OF size ON responses "
+                "BEGIN UPDATE cache_size SET bytes = bytes - old.size + new.size; END"
+            )
+        self._conn = conn
+        return self
+
+    def close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._write_touches()
+                self._conn.commit()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def size(self):
+        """Total bytes of cached bodies, across every process using the file."""
+        with self._lock:
+            return self._size()
+
+    def _size(self):
+        return self._conn.execute("SELECT bytes FROM cache_size").fetchone()[0]
+
+    def get(self, url):
+        """Return the `CachedResponse` for `url`, or None, marking it used."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT status, headers, body FROM responses WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touched[url] = time.time()
+            if len(self._touched) >= self.touch_batch:
+                self._write_touches()
+                self._conn.commit()
+        status, headers, body = row
+        return CachedResponse(url, status, json.loads(headers), bytes(body))
+
+    def store(self, url, status, headers, body):
+        """Cache a response if it carries a validator; returns whether it did."""
+        headers = stored_headers(headers)
+        if "ETag" not in headers and "Last-Modified" not in headers:
+            return False
+        size = len(body)
+        if size > self.max_bytes:
+            return False
+        now = time.time()
+        with self._lock:
+            self._touched.pop(url, None)
+            self._write_touches()
+            # An upsert rather than INSERT OR REPLACE, whose implicit delete
+            # would not fire the size trigger.
+            self._conn.execute(
+                """
+                INSERT INTO responses
+                    (url, status, headers, body, size, stored_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(url) DO UPDATE SET
+                    status = excluded.status, headers = excluded.headers,
+                    body = excluded.body, size = excluded.size,
+                    stored_at = excluded.stored_at, accessed_at = excluded.accessed_at
+                """,
+                (url, status, json.dumps(headers), body, size, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+        return True
+
+    def revalidated(self, entry, headers):
+        """Record a 304 for `entry`, taking any refreshed validators."""
+        refreshed = stored_headers(headers)
+        refreshed.pop("Content-Type", None)
+        entry.not_modified = True
+        if not refreshed or all(
+            entry.headers.get(k) == v for k, v in refreshed.items()
+        ):
+            # Only the access time changed, which `get` already recorded.
+            return entry
+        entry.headers.update(refreshed)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE responses SET headers = ?, accessed_at = ? WHERE url = ?",
+                (json.dumps(entry.headers), time.time(), entry.url),
+            )
+            self._touched.pop(entry.url, None)
+            self._conn.commit()
+        return entry
+
+    def _write_touches(self):
+        if self._touched:
+            touched, self._touched = self._touched, {}
+            self._conn.executemany(
+                "UPDATE responses SET accessed_at = ? WHERE url = ?",
+                [(accessed_at, url) for url, accessed_at in touched.items()],
+            )
+
+    def _evict(self):
+        # Drop least recently used entries until the bodies fit again.
+        excess = self._size() - self.max_bytes
+        while excess > 0:
+            rows = self._conn.execute(
+                "SELECT url, size FROM responses ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE url = ?", (url,))
+                excess -= size
+                if excess <= 0:
+                    break
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+async def cached_get(session, url, cache=None, **kwargs):
+    """GET `url` through `cache` with aiohttp and return a `CachedResponse`.
+
+    Cached URLs are revalidated with a conditional request; on ``304`` the
+    stored body is returned with ``not_modified`` set. Error statuses raise
+    `aiohttp.ClientResponseError` as ``raise_for_status()`` would. Cache
+    reads and writes run in a worker thread, off the event loop.
+    """
+    entry = await asyncio.to_thread(cache.get, url) if cache is not None else None
+    headers = dict(kwargs.pop("headers", None) or {})
+    if entry is not None:
+        headers.update(entry.conditional_headers())
+    async with session.get(url, headers=headers, **kwargs) as response:
+        if response.status == 304 and entry is not None:
+            return await asyncio.to_thread(cache.revalidated, entry, response.headers)
+        response.raise_for_status()
+        body = await response.read()
+        if cache is not None and response.status == 200:
+            await asyncio.to_thread(
+                cache.store, url, response.status, response.headers, body
+            )
+        return CachedResponse(
+            url, response.status, stored_headers(response.headers), body
+        )
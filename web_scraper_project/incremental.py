@@ -0,0 +1,82 @@
+"""Content hashes for incremental re-crawls.
+
+Every product page is hashed as it is fetched and the digest travels with
+the item as ``content_hash``; `SQLitePipeline` stores it per URL in the
+``crawl_pages`` table once the item is written. On an incremental crawl,
+`ContentIndex.unchanged` compares a freshly fetched page against that
+digest, and pages that match are neither parsed, validated nor written:
+only their ``last_seen`` time is updated. A refresh therefore costs a fetch
+and a hash per unchanged page, and full processing only for what changed.
+"""
+
+import hashlib
+import os
+import sqlite3
+from datetime import datetime
+
+from .store import PAGES_TABLE, create_tables, default_db_path
+
+
+def content_hash(body):
+    """Return a short hex digest of a page body."""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+class ContentIndex:
+    """Look up stored page hashes and record visits to unchanged pages.
+
+    Visits are buffered and written `batch_size` at a time, and on `close`.
+    """
+
+    def __init__(self, db_path=None, batch_size=500):
+        self.db_path = db_path or default_db_path()
+        self.batch_size = batch_size
+        self._conn = None
+        self._seen = []
+
+    def open(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(
+                self.db_path, timeout=30, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            create_tables(self._conn)
+            self._conn.commit()
+        return self
+
+    def close(self):
+        if self._conn is not None:
+            self.flush()
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stored_hash(self, url):
+        row = self._conn.execute(
+            f"SELECT content_hash FROM {PAGES_TABLE} WHERE url = ?", (url,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def unchanged(self, url, digest):
+        """Whether `digest` matches the hash stored for `url`."""
+        return self.stored_hash(url) == digest
+
+    def seen(self, url):
+        """Record a visit to `url` without touching its stored hash."""
+        self._seen.append((datetime.utcnow().isoformat() + "Z", url))
+        if len(self._seen) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self._seen:
+            seen, self._seen = self._seen, []
+            with self._conn:
+                self._conn.executemany(
+                    f"UPDATE {PAGES_TABLE} SET last_seen = ? WHERE url = ?", seen
+                )
@@ -27,6 +27,7 @@ class ProductItem(scrapy.Item):
     # Meta Information
     url = scrapy.Field()
     scrape_date = scrapy.Field()
+    content_hash = scrapy.Field()
 
 
 class ReviewItem(scrapy.Item):
@@ -0,0 +1,631 @@
+"""Persistent crawl job queue consumed by a pool of worker processes.
+
+`/start-scraping` only inserts a row into the ``jobs`` table of
+``data/jobs.db`` and returns; `WorkerPool` runs ``JOB_QUEUE_WORKERS``
+processes that each claim the highest-priority pending job (oldest first),
+crawl it with `AsyncBookSpider` through the item pipelines, and write
+progress counters back every ``JOB_QUEUE_PROGRESS_INTERVAL`` seconds.
+Claiming is a single ``UPDATE ... RETURNING`` statement, so two workers
+never run the same job. Crawl throughput scales by adding workers, and API
+latency no longer depends on how long crawls take.
+
+Every state change and progress report is also appended to the
+``job_events`` table, together with the items scraped since the previous
+report, so `/jobs/{id}/events` can stream a job's progress (as Server-Sent
+Events) to any number of clients without polling the dataset.
+
+Cancelling a pending job takes effect at once; a running job is flagged
+and its worker stops the crawl at the next progress report. A running job's
+progress reports also renew its lease: a job whose worker has not reported
+for ``JOB_QUEUE_LEASE`` seconds is taken to be orphaned by a crashed
+process and queued again, by the next pool to start or by any idle worker.
+Jobs that live workers are running, in this process or another, are left
+alone.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import time
+import uuid
+from datetime import datetime
+
+from scrapy.utils.misc import load_object
+
+from . import settings as project_settings
+from .engine import (
+    CANCELLED,
+    FAILED,
+    FINISHED,
+    PENDING,
+    RUNNING,
+    TERMINAL_STATES,
+    default_spider_factory,
+    load_pipelines,
+    process_item,
+)
+from .serialization import serialize_item
+
+logger = logging.getLogger(__name__)
+
+JOB_COLUMNS = (
+    "id",
+    "url",
+    "priority",
+    "state",
+    "worker",
+    "created_at",
+    "started_at",
+    "finished_at",
+    "pages_fetched",
+    "items_scraped",
+    "errors",
+    "error",
+    "cancel_requested",
+)
+
+CREATE_JOBS_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    state TEXT NOT NULL,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    pages_fetched INTEGER NOT NULL DEFAULT 0,
+    items_scraped INTEGER NOT NULL DEFAULT 0,
+    errors INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    cancel_requested INTEGER NOT NULL DEFAULT 0,
+    heartbeat_at REAL
+)
+"""
+
+CREATE_EVENTS_SQL = """
+CREATE TABLE IF NOT EXISTS job_events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    data TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+CLAIM_SQL = f"""
+UPDATE jobs SET state = '{RUNNING}', worker = ?, started_at = ?, heartbeat_at = ?
+WHERE id = (
+    SELECT id FROM jobs WHERE state = '{PENDING}'
+    ORDER BY priority DESC, seq LIMIT 1
+)
+RETURNING {", ".join(JOB_COLUMNS)}
+"""
+
+
+def default_jobs_path():
+    # Resolved at call time so tests patching `pipelines.DATA_DIR` apply.
+    from . import pipelines
+
+    return os.path.join(pipelines.DATA_DIR, "jobs.db")
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.utcfromtimestamp(timestamp).isoformat() + "Z"
+
+
+def job_to_dict(row, now=None):
+    """Render a job row for the API, with its throughput so far."""
+    job = dict(zip(JOB_COLUMNS, row))
+    elapsed = None
+    if job["started_at"] is not None:
+        end = job["finished_at"] or (now or time.time())
+        elapsed = max(end - job["started_at"], 0.0)
+    return {
+        "job_id": job["id"],
+        "url": job["url"],
+        "priority": job["priority"],
+        "state": job["state"],
+        "worker": job["worker"],
+        "pages_fetched": job["pages_fetched"],
+        "items_scraped": job["items_scraped"],
+        "errors": job["errors"],
+        "error": job["error"],
+        "cancel_requested": bool(job["cancel_requested"]),
+        "created_at": _isoformat(job["created_at"]),
+        "started_at": _isoformat(job["started_at"]),
+        "finished_at": _isoformat(job["finished_at"]),
+        "elapsed": round(elapsed, 3) if elapsed is not None else None,
+        "pages_per_second": (
+            round(job["pages_fetched"] / elapsed, 2) if elapsed else 0.0
+        ),
+        "items_per_second": (
+            round(job["items_scraped"] / elapsed, 2) if elapsed else 0.0
+        ),
+    }
+
+
+class JobQueue:
+    """SQLite-backed queue of crawl jobs shared between processes."""
+
+    def __init__(self, path=None):
+        self.path = path or default_jobs_path()
+        self._conn = None
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # Autocommit: every statement is its own transaction, and the busy
+        # timeout lets workers and the API wait out each other's writes.
+        self._conn = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(CREATE_JOBS_SQL)
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "heartbeat_at" not in columns:
+            # Queues created before job leases existed.
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at REAL")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_pending "
+            "ON jobs (state, priority DESC, seq)"
+        )
+        self._conn.execute(CREATE_EVENTS_SQL)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, seq)"
+        )
+        return self
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def submit(self, url, priority=0):
+        """Queue a crawl of `url`; higher `priority` jobs are claimed first."""
+        job_id = uuid.uuid4().hex
+        self._conn.execute(
+            "INSERT INTO jobs (id, url, priority, state, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (job_id, url, priority, PENDING, time.time()),
+        )
+        return self._emit_state(job_id)
+
+    def _row(self, job_id):
+        return self._conn.execute(
+            f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+
+    def get(self, job_id):
+        row = self._row(job_id)
+        return job_to_dict(row) if row is not None else None
+
+    def recent(self, state=None, limit=100):
+        """The most recently submitted jobs, optionally only in `state`."""
+        sql = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs"
+        params = []
+        if state is not None:
+            sql += " WHERE state = ?"
+            params.append(state)
+        sql += " ORDER BY seq DESC LIMIT ?"
+        params.append(limit)
+        now = time.time()
+        return [job_to_dict(row, now) for row in self._conn.execute(sql, params)]
+
+    def claim(self, worker):
+        """Mark the next pending job as run by `worker` and return it."""
+        now = time.time()
+        rows = self._conn.execute(CLAIM_SQL, (worker, now, now)).fetchall()
+        return self._emit_state(rows[0][0]) if rows else None
+
+    def progress(
+        self, job_id, pages_fetched, items_scraped, errors, items=(), dropped=0
+    ):
+        """Store a job's counters and publish them with its new `items`.
+
+        `items` are JSON-encoded items scraped since the last report;
+        `dropped` counts items left out of this report.
+        """
+        self._conn.execute(
+            "UPDATE jobs SET pages_fetched = ?, items_scraped = ?, errors = ?, "
+            "heartbeat_at = ? WHERE id = ?",
+            (pages_fetched, items_scraped, errors, time.time(), job_id),
+        )
+        events = [("progress", json.dumps(self.get(job_id)))]
+        if items or dropped:
+            events.append(
+                ("items", f'{{"items":[{",".join(items)}],"dropped":{dropped}}}')
+            )
+        self._emit(job_id, events)
+
+    def finish(self, job_id, state, error=None):
+        self._conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished_at = ? WHERE id = ?",
+            (state, error, time.time(), job_id),
+        )
+        self._emit_state(job_id)
+
+    def _emit(self, job_id, events):
+        now = time.time()
+        self._conn.executemany(
+            "INSERT INTO job_events (job_id, type, data, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(job_id, event_type, data, now) for event_type, data in events],
+        )
+
+    def _emit_state(self, job_id):
+        job = self.get(job_id)
+        self._emit(job_id, [("state", json.dumps(job))])
+        return job
+
+    def events(self, job_id, after=0, limit=500):
+        """A job's events after sequence number `after`, as (seq, type, data)."""
+        return self._conn.execute(
+            "SELECT seq, type, data FROM job_events WHERE job_id = ? AND seq > ? "
+            "ORDER BY seq LIMIT ?",
+            (job_id, after, limit),
+        ).fetchall()
+
+    def prune_events(self, retention=None):
+        """Drop the events of jobs that finished over `retention` seconds ago."""
+        retention = (
+            retention
+            if retention is not None
+            else project_settings.JOB_EVENTS_RETENTION
+        )
+        return self._conn.execute(
+            "DELETE FROM job_events WHERE job_id IN "
+            "(SELECT id FROM jobs WHERE finished_at < ?)",
+            (time.time() - retention,),
+        ).rowcount
+
+    def cancel(self, job_id):
+        """Cancel a job; returns False if it is unknown or already done."""
+        row = self._row(job_id)
+        if row is None or row[JOB_COLUMNS.index("state")] in TERMINAL_STATES:
+            return False
+        cursor = self._conn.execute(
+            f"UPDATE jobs SET state = '{CANCELLED}', finished_at = ? "
+            f"WHERE id = ? AND state = '{PENDING}'",
+            (time.time(), job_id),
+        )
+        if cursor.rowcount:
+            self._emit_state(job_id)
+        self._conn.execute(
+            "UPDATE jobs SET cancel_requested = 1 "
+            f"WHERE id = ? AND state = '{RUNNING}'",
+            (job_id,),
+        )
+        return True
+
+    def cancel_requested(self, job_id):
+        row = self._conn.execute(
+            "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return bool(row and row[0])
+
+    def requeue(self, job_id=None, stale_after=None):
+        """Put a running job (or every running job) back in the queue.
+
+        With `stale_after`, only jobs whose worker has not reported for that
+        many seconds are requeued: those orphaned by a dead process.
+        """
+        # The crawl restarts from scratch, so its counters do too.
+        sql = (
+            f"UPDATE jobs SET state = '{PENDING}', worker = NULL, started_at = NULL, "
+            f"heartbeat_at = NULL, pages_fetched = 0, items_scraped = 0, errors = 0 "
+            f"WHERE state = '{RUNNING}'"
+        )
+        params = []
+        if job_id is not None:
+            sql += " AND id = ?"
+            params.append(job_id)
+        if stale_after is not None:
+            sql += " AND (heartbeat_at IS NULL OR heartbeat_at < ?)"
+            params.append(time.time() - stale_after)
+        job_ids = [
+            row[0]
+            for row in self._conn.execute(sql + " RETURNING id", params).fetchall()
+        ]
+        for requeued in job_ids:
+            self._emit_state(requeued)
+        return len(job_ids)
+
+
+class Worker:
+    """Claim and run jobs from a `JobQueue` until `stop_event` is set."""
+
+    def __init__(
+        self,
+        queue,
+        name,
+        stop_event,
+        spider_factory=default_spider_factory,
+        pipelines=(),
+        poll_interval=None,
+        progress_interval=None,
+        max_event_items=None,
+        lease=None,
+    ):
+        self.queue = queue
+        self.name = name
+        self.stop_event = stop_event
+        self.spider_factory = spider_factory
+        self.pipelines = pipelines
+        self.poll_interval = (
+            poll_interval
+            if poll_interval is not None
+            else project_settings.JOB_QUEUE_POLL_INTERVAL
+        )
+        self.progress_interval = (
+            progress_interval
+            if progress_interval is not None
+            else project_settings.JOB_QUEUE_PROGRESS_INTERVAL
+        )
+        self.max_event_items = (
+            max_event_items
+            if max_event_items is not None
+            else project_settings.JOB_EVENTS_MAX_ITEMS
+        )
+        self.lease = lease if lease is not None else project_settings.JOB_QUEUE_LEASE
+
+    async def run(self, session=None):
+        next_reap = 0.0
+        while not self.stop_event.is_set():
+            job = self.queue.claim(self.name)
+            if job is None:
+                if time.monotonic() >= next_reap:
+                    # Pick up jobs orphaned by a worker that died meanwhile.
+                    if self.queue.requeue(stale_after=self.lease):
+                        continue
+                    next_reap = time.monotonic() + self.lease
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self.run_job(job, session)
+
+    async def run_job(self, job, session=None):
+        spider = self.spider_factory(job["url"])
+        counts = {"items_scraped": 0, "dropped": 0}
+        new_items = []
+
+        async def consume():
+            async for item in spider.crawl(session=session):
+                item = process_item(self.pipelines, item, spider)
+                if item is None:
+                    continue
+                counts["items_scraped"] += 1
+                if len(new_items) < self.max_event_items:
+                    # Usually the bytes SerializationPipeline cached already.
+                    new_items.append(serialize_item(item)[1].decode("utf-8"))
+                else:
+                    counts["dropped"] += 1
+
+        def report():
+            stats = getattr(spider, "stats", None) or {}
+            self.queue.progress(
+                job["job_id"],
+                stats.get("pages_fetched", 0),
+                counts["items_scraped"],
+                stats.get("errors", 0) + stats.get("item_errors", 0),
+                items=new_items,
+                dropped=counts["dropped"],
+            )
+            new_items.clear()
+            counts["dropped"] = 0
+
+        task = asyncio.ensure_future(consume())
+        stopping = False
+        while not task.done():
+            await asyncio.wait({task}, timeout=self.progress_interval)
+            if task.done():
+                break
+            report()
+            if self.stop_event.is_set():
+                stopping = True
+                task.cancel()
+            elif self.queue.cancel_requested(job["job_id"]):
+                task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        for pipeline in self.pipelines:
+            if hasattr(pipeline, "flush"):
+                pipeline.flush()
+        report()
+
+        if stopping:
+            # Shutting down mid-crawl: leave the job for the next pool.
+            self.queue.requeue(job["job_id"])
+        elif task.cancelled():
+            self.queue.finish(job["job_id"], CANCELLED)
+        elif task.exception() is not None:
+            exc = task.exception()
+            logger.error(
+                "Crawl job %s for %s failed: %s", job["job_id"], job["url"], exc
+            )
+            self.queue.finish(job["job_id"], FAILED, error=str(exc))
+        else:
+            self.queue.finish(job["job_id"], FINISHED)
+        self.queue.prune_events()
+
+
+def format_event(seq, event_type, data):
+    return f"id: {seq}\nevent: {event_type}\ndata: {data}\n\n"
+
+
+async def stream_events(queue, job_id, after=0, poll_interval=None, keepalive=15.0):
+    """Yield a job's events after `after` as Server-Sent Events.
+
+    The stream ends with the job's terminal ``state`` event; while nothing
+    happens a comment line is sent every `keepalive` seconds so proxies keep
+    the connection open. Each stream polls `queue`'s database through a
+    connection of its own, in a worker thread, so neither the event loop
+    nor other streams wait on its reads.
+    """
+    poll_interval = (
+        poll_interval
+        if poll_interval is not None
+        else project_settings.JOB_EVENTS_POLL_INTERVAL
+    )
+    reader = await asyncio.to_thread(JobQueue(queue.path).open)
+    try:
+        idle = 0.0
+        while True:
+            rows = await asyncio.to_thread(reader.events, job_id, after)
+            for seq, event_type, data in rows:
+                after = seq
+                yield format_event(seq, event_type, data)
+                if (
+                    event_type == "state"
+                    and json.loads(data)["state"] in TERMINAL_STATES
+                ):
+                    return
+            if rows:
+                idle = 0.0
+                continue
+            await asyncio.sleep(poll_interval)
+            idle += poll_interval
+            if idle >= keepalive:
+                idle = 0.0
+                yield ": keepalive\n\n"
+    finally:
+        reader.close()
+
+
+def run_worker(
+    path,
+    name,
+    stop_event,
+    spider_factory,
+    pipeline_paths,
+    poll_interval,
+    progress_interval,
+    lease,
+):
+    """Entry point of a worker process."""
+    from .sessions import SessionPool
+
+    # Workers share items.jl, so none of them may truncate it.
+    pipelines = load_pipelines(pipeline_paths, append=True)
+    for pipeline in pipelines:
+        if hasattr(pipeline, "open_spider"):
+            pipeline.open_spider(None)
+
+    async def main():
+        async with SessionPool() as session:
+            worker = Worker(
+                queue,
+                name,
+                stop_event,
+                spider_factory=load_object(spider_factory),
+                pipelines=pipelines,
+                poll_interval=poll_interval,
+                progress_interval=progress_interval,
+                lease=lease,
+            )
+            await worker.run(session)
+
+    queue = JobQueue(path).open()
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        queue.close()
+        for pipeline in pipelines:
+            if hasattr(pipeline, "close_spider"):
+                pipeline.close_spider(None)
+
+
+class WorkerPool:
+    """Run `workers` processes consuming the job queue at `path`.
+
+    `spider_factory` is the import path of a callable building a spider for
+    a URL, and `pipelines` an ``ITEM_PIPELINES``-style mapping; both are
+    loaded inside each worker process.
+    """
+
+    def __init__(
+        self,
+        path=None,
+        workers=None,
+        spider_factory="web_scraper_project.engine.default_spider_factory",
+        pipelines=None,
+        poll_interval=None,
+        progress_interval=None,
+        lease=None,
+    ):
+        self.path = path or default_jobs_path()
+        self.workers = (
+            workers if workers is not None else project_settings.JOB_QUEUE_WORKERS
+        )
+        self.spider_factory = spider_factory
+        self.pipelines = (
+            pipelines if pipelines is not None else project_settings.ITEM_PIPELINES
+        )
+        self.poll_interval = (
+            poll_interval
+            if poll_interval is not None
+            else project_settings.JOB_QUEUE_POLL_INTERVAL
+        )
+        self.progress_interval = (
+            progress_interval
+            if progress_interval is not None
+            else project_settings.JOB_QUEUE_PROGRESS_INTERVAL
+        )
+        self.lease = lease if lease is not None else project_settings.JOB_QUEUE_LEASE
+        # Spawned rather than forked: the API process runs an event loop and
+        # threads that a forked child must not inherit.
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = None
+        self.processes = []
+
+    def start(self):
+        if self.processes:
+            return self
+        with JobQueue(self.path) as queue:
+            requeued = queue.requeue(stale_after=self.lease)
+        if requeued:
+            logger.info("Requeued %d interrupted crawl job(s)", requeued)
+        self._stop_event = self._context.Event()
+        for i in range(self.workers):
+            process = self._context.Process(
+                target=run_worker,
+                args=(
+                    self.path,
+                    f"worker-{os.getpid()}-{i}",
+                    self._stop_event,
+                    self.spider_factory,
+                    dict(self.pipelines),
+                    self.poll_interval,
+                    self.progress_interval,
+                    self.lease,
+                ),
+                daemon=True,
+            )
+            process.start()
+            self.processes.append(process)
+        return self
+
+    def stop(self, timeout=10):
+        """Ask workers to stop, requeueing their jobs, and wait for them."""
+        if not self.processes:
+            return
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self.processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self.processes = []
@@ -1,7 +1,40 @@
 import os
-import json
 import sqlite3
+import time
+import uuid
 from datetime import datetime
+from decimal import Decimal
+
+from scrapy.exceptions import NotConfigured
+
+from . import settings as project_settings
+
+# Validation schemas and the shared serializer live in `serialization`;
+# SCHEMA_MAP is re-exported here for existing imports.
+from .serialization import (  # noqa: F401
+    SCHEMA_MAP,
+    get_json_encoder,
+    is_strict,
+    is_validated,
+    item_type_name,
+    serialize_item,
+    validate_item,
+    validate_items,
+)
+
+from .store import GENERIC_TABLE, PAGE_UPSERT_SQL, create_tables, table_specs
+
+GENERIC_INSERT_SQL = (
+    f"INSERT INTO {GENERIC_TABLE} (item_type, data, created_at) VALUES (?, ?, ?)"
+)
+
+# pyarrow is optional; ParquetPipeline disables itself when it is missing.
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
 
 DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
 
@@ -11,108 +44,391 @@ def _ensure_data_dir():
     return DATA_DIR
 
 
-# Try to import pydantic schemas for optional validation. Validation is
-# performed only when an appropriate schema exists for the incoming item
-# type (e.g. ProductItem -> ProductModel). If pydantic is not installed the
-# pipelines will continue to work without validation.
-try:
-    from .schemas import (
-        ProductModel,
-        ReviewModel,
-        CategoryModel,
-        SellerModel,
-        InventoryModel,
-        OrderModel,
-    )
-
-    SCHEMA_MAP = {
-        "ProductItem": ProductModel,
-        "ReviewItem": ReviewModel,
-        "CategoryItem": CategoryModel,
-        "SellerItem": SellerModel,
-        "InventoryItem": InventoryModel,
-        "OrderItem": OrderModel,
-    }
-except Exception:
-    SCHEMA_MAP = {}
+class SerializationPipeline:
+    """
+    Validates and serializes each item exactly once, caching the JSON bytes
+    on the item so the storage pipelines that follow reuse them.
+    """
+
+    def __init__(self, encoder=None):
+        self.encoder = get_json_encoder(encoder)
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(encoder=crawler.settings.get("JSON_ENCODER"))
+
+    def process_item(self, item, spider):
+        serialize_item(item, self.encoder)
+        return item
 
 
 class JsonLinesPipeline:
     """
     Writes each item as one JSON object per line into data/items.jl
+
+    Lines come from the shared serializer (cached by `SerializationPipeline`
+    when it runs first) and are written as bytes through a buffer of
+    `buffer_size` bytes. The file is rewritten on every run unless `append`
+    is set or the spider crawls incrementally, in which case new and
+    changed items are appended.
     """
 
+    def __init__(self, encoder=None, buffer_size=None, append=None):
+        self.encoder = get_json_encoder(encoder)
+        self.buffer_size = buffer_size or project_settings.JSONL_BUFFER_SIZE
+        self.append = (
+            append if append is not None else project_settings.INCREMENTAL_CRAWL
+        )
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            encoder=settings.get("JSON_ENCODER"),
+            buffer_size=settings.getint(
+                "JSONL_BUFFER_SIZE", project_settings.JSONL_BUFFER_SIZE
+            ),
+            append=settings.getbool(
+                "INCREMENTAL_CRAWL", project_settings.INCREMENTAL_CRAWL
+            ),
+        )
+
     def open_spider(self, spider):
         _ensure_data_dir()
         self.filepath = os.path.join(DATA_DIR, "items.jl")
-        self.file = open(self.filepath, "w", encoding="utf-8")
+        append = self.append or getattr(spider, "incremental", False)
+        self.file = open(
+            self.filepath, "ab" if append else "wb", buffering=self.buffer_size
+        )
 
     def close_spider(self, spider):
         if hasattr(self, "file") and not self.file.closed:
             self.file.close()
 
+    def flush(self):
+        self.file.flush()
+
     def process_item(self, item, spider):
-        # Attempt to validate/serialize using pydantic schema when available.
-        item_dict = dict(item)
-        item_type = getattr(item, "__class__", None)
-        item_type_name = item_type.__name__ if item_type else type(item).__name__
-
-        schema = SCHEMA_MAP.get(item_type_name)
-        if schema is not None:
-            # Validate and produce JSON using pydantic
-            obj = schema.parse_obj(item_dict)
-            line = obj.json(ensure_ascii=False)
-        else:
-            line = json.dumps(item_dict, ensure_ascii=False)
+        _type_name, line = serialize_item(item, self.encoder)
+        self.file.write(line + b"\n")
+        return item
+
+
+class ParquetPipeline:
+    """
+    Writes items into typed, columnar Parquet files under data/parquet/.
+
+    Each item type with a schema in SCHEMA_MAP gets its own Hive-style
+    partition directory (``item_type=ProductItem/``) holding part files.
+    A part file is written under an ``.inprogress`` name and renamed once
+    `flush` (called by the engine and job workers after every crawl) or
+    `close_spider` closes it, so readers never see a file without its
+    footer, even if the process is killed. Column types are derived from
+    the pydantic model fields (Decimal prices become float64 columns) and
+    rows are written in row groups of `row_group_size` with the configured
+    compression codec. Items without a schema are ignored. With lenient
+    validation, items that no earlier pipeline validated are validated in
+    batches of `validation_batch_size`.
+    """
+
+    def __init__(
+        self,
+        row_group_size=None,
+        compression=None,
+        enabled=None,
+        validation_mode=None,
+        validation_batch_size=None,
+    ):
+        if not (enabled if enabled is not None else project_settings.PARQUET_ENABLED):
+            raise NotConfigured("PARQUET_ENABLED is off")
+        if pa is None:
+            raise NotConfigured("ParquetPipeline requires pyarrow")
+        self.row_group_size = row_group_size or project_settings.PARQUET_ROW_GROUP_SIZE
+        self.compression = compression or project_settings.PARQUET_COMPRESSION
+        self.strict = is_strict(validation_mode)
+        self.validation_batch_size = (
+            validation_batch_size or project_settings.VALIDATION_BATCH_SIZE
+        )
+        self.writers = {}
+        self.buffers = {}
+        self._unvalidated = []
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            enabled=settings.getbool(
+                "PARQUET_ENABLED", project_settings.PARQUET_ENABLED
+            ),
+            row_group_size=settings.getint(
+                "PARQUET_ROW_GROUP_SIZE", project_settings.PARQUET_ROW_GROUP_SIZE
+            ),
+            compression=settings.get(
+                "PARQUET_COMPRESSION", project_settings.PARQUET_COMPRESSION
+            ),
+            validation_mode=settings.get(
+                "VALIDATION_MODE", project_settings.VALIDATION_MODE
+            ),
+            validation_batch_size=settings.getint(
+                "VALIDATION_BATCH_SIZE", project_settings.VALIDATION_BATCH_SIZE
+            ),
+        )
+
+    @staticmethod
+    def arrow_type(field):
+        """Map a pydantic model field to an Arrow type and value converter."""
+        type_ = field.type_
+        if isinstance(type_, type):
+            if issubclass(type_, bool):
+                return pa.bool_(), None
+            if issubclass(type_, int):
+                return pa.int64(), None
+            if issubclass(type_, (float, Decimal)):
+                return pa.float64(), float
+            if issubclass(type_, datetime):
+                return pa.timestamp("us"), None
+            if issubclass(type_, str):
+                return pa.string(), str
+        return pa.string(), str
+
+    @classmethod
+    def arrow_schema(cls, model):
+        fields = []
+        converters = {}
+        for name, field in model.__fields__.items():
+            arrow_type, converter = cls.arrow_type(field)
+            fields.append(pa.field(name, arrow_type, nullable=True))
+            if converter is not None:
+                converters[name] = converter
+        return pa.schema(fields), converters
 
-        self.file.write(line + "\n")
+    def open_spider(self, spider):
+        _ensure_data_dir()
+        self.root = os.path.join(DATA_DIR, "parquet")
+        self.run_id = (
+            datetime.utcnow().strftime("%Y%m%dT%H%M%S") + "-" + uuid.uuid4().hex[:8]
+        )
+        self.writers = {}
+        self.buffers = {}
+        self._unvalidated = []
+        self._parts = 0
+
+    def close_spider(self, spider):
+        self.flush()
+
+    def flush(self):
+        """Write out buffered rows and finish the open part files."""
+        self._validate_pending()
+        for type_name in list(self.buffers):
+            self._write_row_group(type_name)
+        writers, self.writers = self.writers, {}
+        for writer, path in writers.values():
+            writer.close()
+            os.replace(path + ".inprogress", path)
+
+    def process_item(self, item, spider):
+        type_name = item_type_name(item)
+        if type_name not in SCHEMA_MAP:
+            return item
+        if self.strict or is_validated(item):
+            self._append(type_name, validate_item(item, strict=self.strict)[1])
+        else:
+            self._unvalidated.append(item)
+            if len(self._unvalidated) >= self.validation_batch_size:
+                self._validate_pending()
         return item
 
+    def _validate_pending(self):
+        items, self._unvalidated = self._unvalidated, []
+        for index, item_dict in validate_items(items):
+            self._append(item_type_name(items[index]), item_dict)
+
+    def _append(self, type_name, item_dict):
+        buffer = self.buffers.get(type_name)
+        if buffer is None:
+            arrow_schema, converters = self.arrow_schema(SCHEMA_MAP[type_name])
+            buffer = self.buffers[type_name] = {
+                "schema": arrow_schema,
+                "converters": converters,
+                "columns": {name: [] for name in arrow_schema.names},
+                "rows": 0,
+            }
+        converters = buffer["converters"]
+        for name, column in buffer["columns"].items():
+            value = item_dict.get(name)
+            if value is not None and name in converters:
+                value = converters[name](value)
+            column.append(value)
+        buffer["rows"] += 1
+        if buffer["rows"] >= self.row_group_size:
+            self._write_row_group(type_name)
+
+    def _write_row_group(self, type_name):
+        buffer = self.buffers[type_name]
+        if not buffer["rows"]:
+            return
+        table = pa.Table.from_pydict(buffer["columns"], schema=buffer["schema"])
+        if type_name in self.writers:
+            writer, _path = self.writers[type_name]
+        else:
+            directory = os.path.join(self.root, f"item_type={type_name}")
+            os.makedirs(directory, exist_ok=True)
+            self._parts += 1
+            path = os.path.join(
+                directory, f"part-{self.run_id}-{self._parts:05d}.parquet"
+            )
+            writer = pq.ParquetWriter(
+                path + ".inprogress", buffer["schema"], compression=self.compression
+            )
+            self.writers[type_name] = (writer, path)
+        writer.write_table(table, row_group_size=self.row_group_size)
+        buffer["columns"] = {name: [] for name in buffer["schema"].names}
+        buffer["rows"] = 0
+
 
 class SQLitePipeline:
     """
-    Stores items in a simple SQLite table (id, item_type, data, created_at).
-    The data column contains the full item as a JSON string.
+    Stores items in typed SQLite tables, one per schema-backed item type
+    (see `store`), with indexed lookup columns and an upsert on natural keys
+    such as a product's UPC. Items without a schema go to the generic
+    ``items`` table (id, item_type, data, created_at), whose data column
+    contains the full item as a JSON string.
+
+    Rows are buffered and written with `executemany` in a single transaction
+    once `batch_size` items are pending or `flush_interval_ms` has elapsed
+    since the last flush (checked as items arrive); `close_spider` always
+    flushes what is left. A `batch_size` of 1 commits every item. Items
+    carrying a `content_hash` also update ``crawl_pages`` in the same
+    transaction, which incremental crawls compare new pages against. The
+    connection uses the configured `journal_mode` and `synchronous` pragmas
+    (WAL/NORMAL by default), which avoids an fsync per transaction. With
+    lenient validation, items no earlier pipeline validated are validated
+    as one batch when the rows are flushed.
     """
 
+    JOURNAL_MODES = ("DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF")
+    SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+    def __init__(
+        self,
+        batch_size=None,
+        flush_interval_ms=None,
+        journal_mode=None,
+        synchronous=None,
+        encoder=None,
+        validation_mode=None,
+    ):
+        self.batch_size = max(
+            1,
+            (
+                batch_size
+                if batch_size is not None
+                else project_settings.SQLITE_BATCH_SIZE
+            ),
+        )
+        self.flush_interval_ms = (
+            flush_interval_ms
+            if flush_interval_ms is not None
+            else project_settings.SQLITE_FLUSH_INTERVAL_MS
+        )
+        self.journal_mode = (
+            journal_mode or project_settings.SQLITE_JOURNAL_MODE
+        ).upper()
+        self.synchronous = (synchronous or project_settings.SQLITE_SYNCHRONOUS).upper()
+        if self.journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"Unsupported SQLite journal_mode: {self.journal_mode}")
+        if self.synchronous not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"Unsupported SQLite synchronous mode: {self.synchronous}")
+        self.encoder = get_json_encoder(encoder)
+        self.strict = is_strict(validation_mode)
+        self.specs = table_specs()
+        self._buffers = {}
+        self._unvalidated = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            encoder=settings.get("JSON_ENCODER"),
+            batch_size=settings.getint(
+                "SQLITE_BATCH_SIZE", project_settings.SQLITE_BATCH_SIZE
+            ),
+            flush_interval_ms=settings.getint(
+                "SQLITE_FLUSH_INTERVAL_MS", project_settings.SQLITE_FLUSH_INTERVAL_MS
+            ),
+            journal_mode=settings.get(
+                "SQLITE_JOURNAL_MODE", project_settings.SQLITE_JOURNAL_MODE
+            ),
+            synchronous=settings.get(
+                "SQLITE_SYNCHRONOUS", project_settings.SQLITE_SYNCHRONOUS
+            ),
+            validation_mode=settings.get(
+                "VALIDATION_MODE", project_settings.VALIDATION_MODE
+            ),
+        )
+
     def open_spider(self, spider):
         _ensure_data_dir()
         self.db_path = os.path.join(DATA_DIR, "items.db")
         self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.execute(
-            """
-            CREATE TABLE IF NOT EXISTS items (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                item_type TEXT,
-                data TEXT,
-                created_at TEXT
-            )
-            """
-        )
+        self.conn.execute(f"PRAGMA journal_mode={self.journal_mode}")
+        self.conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        create_tables(self.conn, self.specs)
         self.conn.commit()
+        self._buffers = {}
+        self._unvalidated = []
+        self._pending = 0
+        self._last_flush = time.monotonic()
 
     def close_spider(self, spider):
         if hasattr(self, "conn"):
+            self.flush()
             self.conn.commit()
             self.conn.close()
 
-    def process_item(self, item, spider):
-        item_type = getattr(item, "__class__", None)
-        item_type_name = item_type.__name__ if item_type else type(item).__name__
-
-        item_dict = dict(item)
-        schema = SCHEMA_MAP.get(item_type_name)
-        if schema is not None:
-            obj = schema.parse_obj(item_dict)
-            data_json = obj.json(ensure_ascii=False)
-        else:
-            data_json = json.dumps(item_dict, ensure_ascii=False)
+    def flush(self):
+        """Write all buffered rows in one transaction."""
+        if self._unvalidated:
+            pending, self._unvalidated = self._unvalidated, []
+            for index, item_dict in validate_items(
+                [item for _spec, item, _created in pending]
+            ):
+                spec, item, created_at = pending[index]
+                self._add_row(spec, item, item_dict, created_at)
+        if self._pending:
+            buffers, self._buffers, self._pending = self._buffers, {}, 0
+            with self.conn:
+                for sql, rows in buffers.items():
+                    self.conn.executemany(sql, rows)
+        self._last_flush = time.monotonic()
 
-        created_at = datetime.utcnow().isoformat() + "Z"
-        self.conn.execute(
-            "INSERT INTO items (item_type, data, created_at) VALUES (?, ?, ?)",
-            (item_type_name, data_json, created_at),
+    def _add_row(self, spec, item, item_dict, created_at):
+        if item.get("content_hash") and item.get("url"):
+            self._buffers.setdefault(PAGE_UPSERT_SQL, []).append(
+                (str(item["url"]), item["content_hash"], created_at)
+            )
+        self._buffers.setdefault(spec.insert_sql, []).append(
+            spec.row(item_dict, created_at)
         )
-        # commit periodically to avoid long transactions; keep simple here
-        self.conn.commit()
+
+    def process_item(self, item, spider):
+        created_at = datetime.utcnow().isoformat() + "Z"
+        spec = self.specs.get(item_type_name(item))
+        if spec is None:
+            type_name, data = serialize_item(item, self.encoder)
+            self._buffers.setdefault(GENERIC_INSERT_SQL, []).append(
+                (type_name, data.decode("utf-8"), created_at)
+            )
+        elif self.strict or is_validated(item):
+            self._add_row(
+                spec, item, validate_item(item, strict=self.strict)[1], created_at
+            )
+        else:
+            self._unvalidated.append((spec, item, created_at))
+        self._pending += 1
+        elapsed_ms = (time.monotonic() - self._last_flush) * 1000
+        if self._pending >= self.batch_size or elapsed_ms >= self.flush_interval_ms:
+            self.flush()
         return item
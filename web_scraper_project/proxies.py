@@ -0,0 +1,186 @@
+"""A scored pool of outgoing proxies shared by Scrapy and aiohttp fetches.
+
+Proxies come from ``SCRAPER_PROXIES`` (comma or whitespace separated),
+``SCRAPER_PROXY_FILE`` (one per line, ``#`` comments allowed) and the
+single ``SCRAPER_PROXY``. Every request picks a proxy at random, weighted
+by its score: the smoothed success rate squared over the smoothed latency,
+so fast healthy proxies carry most of the traffic while slower ones still
+get probed. ``PROXY_QUARANTINE_AFTER`` consecutive failures take a proxy
+out of rotation for ``PROXY_QUARANTINE_TIME`` seconds, doubling with each
+repeated quarantine; a success resets both.
+
+`ProxyMiddleware` (Scrapy) and `ProxyRotation` (aiohttp client middleware,
+installed by `SessionPool`) both draw from and report to a `ProxyPool`.
+"""
+
+import asyncio
+import random
+import re
+import time
+
+import aiohttp
+from yarl import URL
+
+from . import settings as project_settings
+
+# Latency assumed for proxies that have not answered yet, in seconds.
+DEFAULT_LATENCY = 1.0
+MAX_QUARANTINE_DOUBLINGS = 6
+
+
+class Proxy:
+    """One proxy URL and its health record."""
+
+    def __init__(self, url):
+        self.url = url
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.quarantines = 0
+        self.quarantined_until = 0.0
+
+    @property
+    def success_rate(self):
+        # Laplace-smoothed so new proxies start at 0.5 rather than 0 or 1.
+        return (self.successes + 1) / (self.successes + self.failures + 2)
+
+    @property
+    def score(self):
+        return self.success_rate**2 / (self.latency or DEFAULT_LATENCY)
+
+    def available(self, now):
+        return now >= self.quarantined_until
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "latency": self.latency,
+            "successes": self.successes,
+            "failures": self.failures,
+            "score": round(self.score, 4),
+            "quarantined": not self.available(time.monotonic()),
+        }
+
+
+def load_proxies(proxies=None, proxy_file=None, proxy=None):
+    """Collect proxy URLs from the proxy settings, without duplicates."""
+    urls = re.split(
+        r"[\s,]+", proxies if proxies is not None else project_settings.PROXIES
+    )
+    proxy_file = proxy_file if proxy_file is not None else project_settings.PROXY_FILE
+    if proxy_file:
+        with open(proxy_file, encoding="utf-8") as f:
+            urls.extend(line.split("#", 1)[0].strip() for line in f)
+    urls.append(proxy if proxy is not None else project_settings.PROXY)
+    return list(dict.fromkeys(url for url in urls if url))
+
+
+class ProxyPool:
+    """Weighted random selection over healthy proxies, with quarantine."""
+
+    def __init__(self, proxies=(), quarantine_after=None, quarantine_time=None):
+        self.proxies = {url: Proxy(url) for url in proxies}
+        self.quarantine_after = (
+            quarantine_after or project_settings.PROXY_QUARANTINE_AFTER
+        )
+        self.quarantine_time = (
+            quarantine_time
+            if quarantine_time is not None
+            else project_settings.PROXY_QUARANTINE_TIME
+        )
+
+    @classmethod
+    def from_settings(cls):
+        return cls(load_proxies())
+
+    def __len__(self):
+        return len(self.proxies)
+
+    def choose(self):
+        """Return the `Proxy` to use next, or None when the pool is empty."""
+        if not self.proxies:
+            return None
+        now = time.monotonic()
+        candidates = [proxy for proxy in self.proxies.values() if proxy.available(now)]
+        if not candidates:
+            # Everything is quarantined: use the proxy that comes back first.
+            return min(self.proxies.values(), key=lambda proxy: proxy.quarantined_until)
+        return random.choices(
+            candidates, weights=[proxy.score for proxy in candidates]
+        )[0]
+
+    def record(self, url, ok, latency=None):
+        """Report the outcome of a request sent through the proxy at `url`."""
+        proxy = self.proxies.get(url)
+        if proxy is None:
+            return
+        if ok:
+            proxy.successes += 1
+            proxy.consecutive_failures = 0
+            proxy.quarantines = 0
+            if latency is not None:
+                proxy.latency = (
+                    latency
+                    if proxy.latency is None
+                    else 0.8 * proxy.latency + 0.2 * latency
+                )
+            return
+        proxy.failures += 1
+        proxy.consecutive_failures += 1
+        if proxy.consecutive_failures >= self.quarantine_after:
+            doublings = min(proxy.quarantines, MAX_QUARANTINE_DOUBLINGS)
+            proxy.quarantined_until = (
+                time.monotonic() + self.quarantine_time * 2**doublings
+            )
+            proxy.quarantines += 1
+            proxy.consecutive_failures = 0
+
+    def stats(self):
+        return [proxy.to_dict() for proxy in self.proxies.values()]
+
+
+def proxy_ok(status):
+    """Whether a response status says the proxy itself worked."""
+    return status not in project_settings.PROXY_BAN_CODES
+
+
+class ProxyRotation:
+    """aiohttp client middleware sending each request through the pool.
+
+    Like `ProxyMiddleware`, every attempt (retries included, since
+    `RetryMiddleware` sits outside) picks a proxy by score and reports its
+    outcome. The proxy the pool assigned is remembered on the request, so
+    only a proxy the caller set explicitly is passed through untouched.
+    """
+
+    ATTR = "_pool_proxy"
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __call__(self, request, handler):
+        if request.proxy is not None and getattr(request, self.ATTR, None) is None:
+            return await handler(request)
+        proxy = self.pool.choose()
+        if proxy is None:
+            return await handler(request)
+        url = URL(proxy.url)
+        request.update_proxy(url.with_user(None), aiohttp.BasicAuth.from_url(url), None)
+        setattr(request, self.ATTR, proxy.url)
+        started = time.monotonic()
+        try:
+            response = await handler(request)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            self.pool.record(proxy.url, ok=False)
+            raise
+        self.pool.record(
+            proxy.url, ok=proxy_ok(response.status), latency=time.monotonic() - started
+        )
+        return response
+
+
+def default_pool():
+    """The proxy pool configured by the settings, or None without proxies."""
+    pool = ProxyPool.from_settings()
+    return pool if len(pool) else None
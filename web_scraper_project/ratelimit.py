@@ -0,0 +1,177 @@
+"""Adaptive per-host rate limiting for the aiohttp code paths.
+
+Scrapy's DOWNLOAD_DELAY and AutoThrottle only govern Scrapy crawls. The
+`RateLimiter` here does the same job for everything that goes through the
+shared `SessionPool` session (`AsyncBookSpider`, the API's download
+endpoints): it is installed as an aiohttp client middleware and gives every
+host its own token bucket and concurrency semaphore.
+
+Each host's rate adapts to what the host tells us (AIMD): every fast
+successful response raises it by `increase` requests/second up to
+`max_rate`, while a smoothed latency above `target_latency` shrinks it by
+10% and a 429 or 503 halves it. A ``Retry-After`` header pauses the host
+entirely for that long.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+from . import settings as project_settings
+
+THROTTLE_STATUSES = (429, 503)
+
+
+def parse_retry_after(value, now=None):
+    """Return the seconds a ``Retry-After`` header asks to wait, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class HostLimiter:
+    """Token bucket, concurrency slots and adaptive rate for one host."""
+
+    def __init__(
+        self, rate, burst, concurrency, min_rate, max_rate, increase, target_latency
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.target_latency = target_latency
+        self.tokens = float(burst)
+        self.latency = None
+        self.blocked_until = 0.0
+        self.in_flight = 0
+        self._updated = time.monotonic()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def _take_token(self):
+        # Waiters queue on the lock so tokens are handed out in FIFO order.
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def acquire(self):
+        await self._slots.acquire()
+        try:
+            await self._take_token()
+        except BaseException:
+            self._slots.release()
+            raise
+        self.in_flight += 1
+
+    def release(self):
+        self.in_flight -= 1
+        self._slots.release()
+
+    def observe(self, status, latency, retry_after=None):
+        """Adapt the rate to one response's status and latency."""
+        if status in THROTTLE_STATUSES:
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            pause = min(pause, project_settings.RATE_LIMIT_MAX_RETRY_AFTER)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = 0.0
+            return
+        if status >= 400:
+            return
+        self.latency = (
+            latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        )
+        if self.latency > self.target_latency:
+            self.rate = max(self.min_rate, self.rate * 0.9)
+        else:
+            self.rate = min(self.max_rate, self.rate + self.increase)
+
+
+class RateLimiter:
+    """Per-host adaptive rate limiter, usable as an aiohttp client middleware."""
+
+    def __init__(
+        self,
+        rate=None,
+        burst=None,
+        concurrency=None,
+        min_rate=None,
+        max_rate=None,
+        increase=None,
+        target_latency=None,
+    ):
+        self.rate = rate or project_settings.RATE_LIMIT_START_RATE
+        self.burst = burst or project_settings.RATE_LIMIT_BURST
+        self.concurrency = concurrency or project_settings.RATE_LIMIT_CONCURRENCY
+        self.min_rate = min_rate or project_settings.RATE_LIMIT_MIN_RATE
+        self.max_rate = max_rate or project_settings.RATE_LIMIT_MAX_RATE
+        self.increase = (
+            increase if increase is not None else project_settings.RATE_LIMIT_INCREASE
+        )
+        self.target_latency = (
+            target_latency or project_settings.RATE_LIMIT_TARGET_LATENCY
+        )
+        self.hosts = {}
+
+    def host(self, name):
+        limiter = self.hosts.get(name)
+        if limiter is None:
+            limiter = self.hosts[name] = HostLimiter(
+                self.rate,
+                self.burst,
+                self.concurrency,
+                self.min_rate,
+                self.max_rate,
+                self.increase,
+                self.target_latency,
+            )
+        return limiter
+
+    async def __call__(self, request, handler):
+        limiter = self.host(request.url.host)
+        await limiter.acquire()
+        started = time.monotonic()
+        try:
+            response = await handler(request)
+            limiter.observe(
+                response.status,
+                time.monotonic() - started,
+                parse_retry_after(response.headers.get("Retry-After")),
+            )
+            return response
+        finally:
+            limiter.release()
+
+    def stats(self):
+        return {
+            host: {
+                "rate": round(limiter.rate, 3),
+                "latency": limiter.latency,
+                "in_flight": limiter.in_flight,
+            }
+            for host, limiter in self.hosts.items()
+        }
@@ -0,0 +1,158 @@
+"""Retries and per-host circuit breaking for the aiohttp code paths.
+
+`RetryMiddleware` is installed on the shared `SessionPool` session, outside
+the rate limiter, so every attempt is paced like any other request. It
+retries connection errors, timeouts and the statuses in
+``RETRY_HTTP_CODES`` up to ``RETRY_TIMES`` times, sleeping a random
+("full jitter") delay of up to ``RETRY_BACKOFF_BASE * 2 ** attempt``
+seconds between attempts. ``RETRY_DEADLINE`` bounds the whole loop: an
+attempt still running when it passes is abandoned with `asyncio.TimeoutError`,
+and no retry is scheduled past it. Each attempt is bounded on its own by the
+session's per-attempt ``HTTP_TIMEOUT`` (see `SessionPool`), so retries and
+backoff never count against it.
+
+Its `CircuitBreaker` counts consecutive failures per host. After
+``CIRCUIT_BREAKER_THRESHOLD`` of them the host's circuit opens and requests
+to it fail immediately with `CircuitOpenError` for
+``CIRCUIT_BREAKER_RESET`` seconds; then a single probe request is let
+through, and its outcome closes the circuit or opens it again.
+"""
+
+import asyncio
+import random
+import time
+
+import aiohttp
+
+from . import settings as project_settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(aiohttp.ClientError):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host, retry_in):
+        super().__init__(f"Circuit open for {host}; retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker keyed by host."""
+
+    def __init__(self, threshold=None, reset_timeout=None):
+        self.threshold = threshold or project_settings.CIRCUIT_BREAKER_THRESHOLD
+        self.reset_timeout = (
+            reset_timeout
+            if reset_timeout is not None
+            else project_settings.CIRCUIT_BREAKER_RESET
+        )
+        self._failures = {}
+        self._opened_at = {}
+        self._probing = set()
+
+    def state(self, host):
+        opened_at = self._opened_at.get(host)
+        if opened_at is None:
+            return CLOSED
+        if time.monotonic() - opened_at < self.reset_timeout:
+            return OPEN
+        return HALF_OPEN
+
+    def check(self, host):
+        """Raise `CircuitOpenError` unless a request to `host` may be sent."""
+        state = self.state(host)
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and host not in self._probing:
+            self._probing.add(host)
+            return
+        retry_in = max(
+            0.0, self._opened_at[host] + self.reset_timeout - time.monotonic()
+        )
+        raise CircuitOpenError(host, retry_in)
+
+    def success(self, host):
+        self._failures.pop(host, None)
+        self._opened_at.pop(host, None)
+        self._probing.discard(host)
+
+    def abandon(self, host):
+        """Forget an unfinished probe so the next request may probe again."""
+        self._probing.discard(host)
+
+    def failure(self, host):
+        failures = self._failures[host] = self._failures.get(host, 0) + 1
+        if host in self._probing or failures >= self.threshold:
+            self._opened_at[host] = time.monotonic()
+            self._probing.discard(host)
+
+
+class RetryMiddleware:
+    """aiohttp client middleware retrying failed requests with backoff."""
+
+    def __init__(
+        self,
+        times=None,
+        http_codes=None,
+        backoff_base=None,
+        backoff_max=None,
+        deadline=None,
+        breaker=None,
+    ):
+        self.times = times if times is not None else project_settings.RETRY_TIMES
+        self.http_codes = frozenset(
+            http_codes if http_codes is not None else project_settings.RETRY_HTTP_CODES
+        )
+        self.backoff_base = backoff_base or project_settings.RETRY_BACKOFF_BASE
+        self.backoff_max = backoff_max or project_settings.RETRY_BACKOFF_MAX
+        self.deadline = deadline or project_settings.RETRY_DEADLINE
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def __call__(self, request, handler):
+        host = request.url.host
+        give_up_at = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            self.breaker.check(host)
+            try:
+                response = await asyncio.wait_for(
+                    handler(request), max(0.0, give_up_at - time.monotonic())
+                )
+            except asyncio.CancelledError:
+                self.breaker.abandon(host)
+                raise
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                self.breaker.failure(host)
+                delay = self._next_delay(attempt, give_up_at)
+                if delay is None:
+                    raise
+            else:
+                if response.status not in self.http_codes:
+                    if response.status < 500:
+                        self.breaker.success(host)
+                    else:
+                        self.breaker.failure(host)
+                    return response
+                self.breaker.failure(host)
+                delay = self._next_delay(attempt, give_up_at)
+                if delay is None:
+                    return response
+                response.release()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _next_delay(self, attempt, give_up_at):
+        # None once retries or the deadline are exhausted.
+        if attempt >= self.times:
+            return None
+        delay = self.backoff(attempt)
+        if time.monotonic() + delay >= give_up_at:
+            return None
+        return delay
@@ -9,9 +9,43 @@ books.toscrape.com. It uses Pydantic for runtime type checking and data validati
 ensuring that all scraped data meets our quality standards before storage.
 """
 
-from datetime import datetime
-from decimal import Decimal
-from pydantic import BaseModel, HttpUrl, validator, Field
+import re
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from pydantic import BaseModel, HttpUrl, ValidationError, validator, Field
+
+# Reference time for the "not in the future" check, in UTC like the
+# timestamps extraction stamps. `validation_batch` pins it so a batch reads
+# the clock once instead of once per item.
+_batch_now = ContextVar("_batch_now", default=None)
+
+
+def _now():
+    return _batch_now.get() or datetime.now(timezone.utc)
+
+
+def _in_future(value):
+    now = _now()
+    if value.tzinfo is None:
+        # Naive timestamps are UTC throughout the project.
+        now = now.replace(tzinfo=None)
+    return value > now
+
+
+@contextmanager
+def validation_batch(now=None):
+    """Pin the reference time used by validators for the enclosed block."""
+    now = now or datetime.now(timezone.utc)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=timezone.utc)
+    token = _batch_now.set(now)
+    try:
+        yield
+    finally:
+        _batch_now.reset(token)
 
 
 class ProductModel(BaseModel):
@@ -47,6 +81,7 @@ class ProductModel(BaseModel):
        
     7. Meta:
        - scrape_date: Datetime, cannot be in the future
+       - content_hash: Optional digest of the product page it was parsed from
     
     Examples:
         >>> data = {
@@ -103,6 +138,7 @@ class ProductModel(BaseModel):
     
     # Meta Information
     scrape_date: datetime
+    content_hash: Optional[str] = None
 
     @validator('isbn')
     def validate_isbn(cls, v):
@@ -125,7 +161,7 @@ class ProductModel(BaseModel):
 
     @validator('scrape_date')
     def validate_scrape_date(cls, v):
-        if v > datetime.now():
+        if _in_future(v):
             raise ValueError('scrape_date cannot be in the future')
         return v
 
@@ -160,3 +196,173 @@ class OrderModel(BaseModel):
     quantity: Optional[int]
     order_date: Optional[str]
     customer_name: Optional[str]
+
+
+class _Slow(Exception):
+    """Input the fast path leaves to the full model."""
+
+
+def _str(v):
+    if type(v) is not str:
+        raise _Slow
+    return v
+
+
+def _optional_str(v):
+    return v if v is None else _str(v)
+
+
+def _nonempty_str(v):
+    if not _str(v):
+        raise _Slow
+    return v
+
+
+def _none(v):
+    if v is not None:
+        raise _Slow
+    return v
+
+
+@lru_cache(maxsize=4096, typed=True)
+def _to_decimal(v):
+    # The same conversion as pydantic's decimal validator. Prices repeat a
+    # lot within a catalogue, and Decimals are immutable, so they are shared.
+    try:
+        value = Decimal(str(v).strip())
+    except InvalidOperation:
+        return None
+    return value if value.is_finite() and value >= 0 else None
+
+
+def _decimal(v):
+    if type(v) is Decimal:
+        value = v if v.is_finite() and v >= 0 else None
+    elif type(v) in (int, float, str):
+        value = _to_decimal(v)
+    else:
+        value = None
+    if value is None:
+        raise _Slow
+    return value
+
+
+def _count(v):
+    # Extraction leaves some counts as scraped digit strings ("10").
+    if type(v) is str and v.isascii() and v.isdigit():
+        return int(v)
+    if type(v) is not int or v < 0:
+        raise _Slow
+    return v
+
+
+def _rating(v):
+    if type(v) is not int or not 1 <= v <= 5:
+        raise _Slow
+    return v
+
+
+# Plain ASCII http(s) URLs with a lowercase domain name; HttpUrl accepts
+# all of them unchanged.
+_SIMPLE_URL = re.compile(
+    r"https?://(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+[a-z]{2,63}"
+    r"(?::\d{1,5})?(?:[/?#][!-~]*)?\Z"
+)
+
+
+def _url(v):
+    if type(v) is not str or len(v) > 2083 or not _SIMPLE_URL.match(v):
+        raise _Slow
+    return v
+
+
+_ISO_DATETIME = re.compile(
+    r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?"
+    r"(?:Z|[+-]\d{2}:?\d{2})?\Z"
+)
+
+
+def _scrape_date(v):
+    if type(v) is str and _ISO_DATETIME.match(v):
+        try:
+            v = datetime.fromisoformat(v)
+        except ValueError:
+            # Well-formed but impossible, like month 13: the model reports it.
+            raise _Slow
+    elif not isinstance(v, datetime):
+        raise _Slow
+    if _in_future(v):
+        raise _Slow
+    return v
+
+
+def _fast_product(data):
+    # ProductModel's fields in declaration order. Its price_incl_tax
+    # validator never sees `tax`, which is declared after it, so there is
+    # nothing to check across fields.
+    try:
+        return {
+            "title": _str(data["title"]),
+            "price": _decimal(data["price"]),
+            "description": _optional_str(data.get("description")),
+            "isbn": _none(data.get("isbn")),
+            "upc": _nonempty_str(data["upc"]),
+            "product_type": _str(data["product_type"]),
+            "price_excl_tax": _decimal(data["price_excl_tax"]),
+            "price_incl_tax": _decimal(data["price_incl_tax"]),
+            "tax": _decimal(data["tax"]),
+            "availability": _count(data["availability"]),
+            "number_of_reviews": _count(data["number_of_reviews"]),
+            "category": _optional_str(data.get("category")),
+            "star_rating": _rating(data["star_rating"]),
+            "image_url": _url(data["image_url"]),
+            "url": _url(data["url"]),
+            "scrape_date": _scrape_date(data["scrape_date"]),
+            "content_hash": _optional_str(data.get("content_hash")),
+        }
+    except KeyError:
+        raise _Slow
+
+
+_FAST_PATHS = {ProductModel: _fast_product}
+
+
+def validate_dict(model, data):
+    """Validate `data` against `model`, returning the field values as a dict.
+
+    Equivalent to ``model.parse_obj(data).dict()``, except that URLs may
+    come back as plain strings. Products in the shape extraction produces
+    are checked by a precompiled fast path that costs a few microseconds
+    instead of a full model validation; any other input, including every
+    invalid item, goes through the model, which reports errors as usual.
+    """
+    fast = _FAST_PATHS.get(model)
+    if fast is not None:
+        try:
+            return fast(data)
+        except _Slow:
+            pass
+    return model.parse_obj(data).dict()
+
+
+def validate_batch(model, items, strict=True):
+    """Validate many items against `model` in one pass.
+
+    The reference time for date checks is read once for the whole batch.
+    In strict mode the first invalid item raises `ValidationError`; in
+    lenient mode invalid items are skipped and reported. Returns
+    ``(models, errors)`` where `errors` is a list of ``(index, error)``.
+    Models validated by the fast path are built with ``construct``.
+    """
+    models = []
+    errors = []
+    construct = model.construct
+    with validation_batch():
+        for index, data in enumerate(items):
+            try:
+                models.append(construct(**validate_dict(model, data)))
+            except ValidationError as e:
+                if strict:
+                    raise
+                errors.append((index, e))
+    return models, errors
@@ -0,0 +1,170 @@
+"""Shared per-item validation and JSON serialization.
+
+Both storage pipelines need the same validated JSON for an item. Rather than
+each running `schema.parse_obj(...)` and `.json()` independently,
+`serialize_item` validates and encodes an item once and caches the resulting
+bytes on the item, so later pipelines (and `SerializationPipeline`, which
+runs ahead of them) reuse the cached payload.
+
+The JSON encoder is pluggable: `orjson` is used when installed (or when
+``JSON_ENCODER = "orjson"``), falling back to the standard library. Both
+encoders use pydantic's encoder for non-JSON types, so the output matches
+what `BaseModel.json()` produced.
+"""
+
+import json
+import logging
+
+from pydantic import ValidationError
+from pydantic.json import pydantic_encoder
+from scrapy.exceptions import DropItem
+
+from . import settings as project_settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+# Try to import pydantic schemas for optional validation. Validation is
+# performed only when an appropriate schema exists for the incoming item
+# type (e.g. ProductItem -> ProductModel). If pydantic is not installed the
+# pipelines will continue to work without validation.
+try:
+    from .schemas import (
+        CategoryModel,
+        InventoryModel,
+        OrderModel,
+        ProductModel,
+        ReviewModel,
+        SellerModel,
+        validate_dict,
+        validation_batch,
+    )
+
+    SCHEMA_MAP = {
+        "ProductItem": ProductModel,
+        "ReviewItem": ReviewModel,
+        "CategoryItem": CategoryModel,
+        "SellerItem": SellerModel,
+        "InventoryItem": InventoryModel,
+        "OrderItem": OrderModel,
+    }
+except Exception:
+    SCHEMA_MAP = {}
+
+logger = logging.getLogger(__name__)
+
+VALIDATION_MODES = ("strict", "lenient")
+
+CACHE_ATTR = "_serialized"
+VALIDATED_ATTR = "_validated"
+
+
+def _stdlib_dumps(obj):
+    return json.dumps(obj, ensure_ascii=False, default=pydantic_encoder).encode("utf-8")
+
+
+def _orjson_dumps(obj):
+    return orjson.dumps(obj, default=pydantic_encoder)
+
+
+def get_json_encoder(name=None):
+    """Return a callable encoding a dict to UTF-8 JSON bytes.
+
+    `name` is ``"auto"`` (orjson when available), ``"orjson"`` or ``"json"``.
+    """
+    name = (name or project_settings.JSON_ENCODER).lower()
+    if name == "json":
+        return _stdlib_dumps
+    if name == "orjson":
+        if orjson is None:
+            raise ImportError("JSON_ENCODER is 'orjson' but orjson is not installed")
+        return _orjson_dumps
+    if name == "auto":
+        return _orjson_dumps if orjson is not None else _stdlib_dumps
+    raise ValueError(f"Unknown JSON encoder: {name}")
+
+
+def item_type_name(item):
+    item_type = getattr(item, "__class__", None)
+    return item_type.__name__ if item_type else type(item).__name__
+
+
+def _cache(item, attr, value):
+    try:
+        setattr(item, attr, value)
+    except AttributeError:
+        pass
+    return value
+
+
+def is_strict(mode=None):
+    """Whether `mode` (default ``VALIDATION_MODE``) is strict validation."""
+    mode = (mode or project_settings.VALIDATION_MODE).lower()
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode: {mode}")
+    return mode == "strict"
+
+
+def is_validated(item):
+    return getattr(item, VALIDATED_ATTR, None) is not None
+
+
+def validate_item(item, strict=None):
+    """Validate `item` once, returning ``(item_type_name, dict)``.
+
+    The dict holds the schema's typed values (Decimal, datetime, ...) when a
+    schema exists for the item type, else the raw item fields. Like
+    `serialize_item`, the result is cached on the item. An invalid item
+    raises `ValidationError` in strict mode and `DropItem` in lenient mode
+    (`strict` defaults to ``VALIDATION_MODE``).
+    """
+    cached = getattr(item, VALIDATED_ATTR, None)
+    if cached is not None:
+        return cached
+
+    type_name = item_type_name(item)
+    item_dict = dict(item)
+    schema = SCHEMA_MAP.get(type_name)
+    if schema is not None:
+        try:
+            item_dict = validate_dict(schema, item_dict)
+        except ValidationError as e:
+            if strict if strict is not None else is_strict():
+                raise
+            raise DropItem(f"Invalid {type_name}: {e}")
+    return _cache(item, VALIDATED_ATTR, (type_name, item_dict))
+
+
+def validate_items(items):
+    """Validate a batch of items, returning ``[(index, item_dict), ...]``.
+
+    The clock is read once for the whole batch. Invalid items are logged
+    and left out, as lenient validation drops them.
+    """
+    validated = []
+    with validation_batch():
+        for index, item in enumerate(items):
+            try:
+                validated.append((index, validate_item(item, strict=False)[1]))
+            except DropItem as e:
+                logger.warning("Dropped: %s", e)
+    return validated
+
+
+def serialize_item(item, encoder=None):
+    """Validate and encode `item` once, returning ``(item_type_name, bytes)``.
+
+    The result is cached on the item (Scrapy items accept private
+    attributes); plain dicts cannot carry the cache and are re-encoded on
+    each call.
+    """
+    cached = getattr(item, CACHE_ATTR, None)
+    if cached is not None:
+        return cached
+
+    type_name, item_dict = validate_item(item)
+    return _cache(
+        item, CACHE_ATTR, (type_name, (encoder or get_json_encoder())(item_dict))
+    )
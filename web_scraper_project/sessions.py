@@ -0,0 +1,120 @@
+"""Application-lifetime pooled aiohttp sessions.
+
+Creating an `aiohttp.ClientSession` per request throws away pooled TCP/TLS
+connections and cached DNS results. `SessionPool` owns a single session
+backed by a `TCPConnector` configured from the project settings (total and
+per-host connection limits, keep-alive and DNS cache TTL) and is meant to be
+created once at startup and closed at shutdown. Unless disabled, requests
+through the session are retried with backoff behind a per-host circuit
+breaker (`RetryMiddleware`), each attempt goes out through a proxy from the
+configured `ProxyPool` (when there are any) and passes the adaptive per-host
+`RateLimiter`.
+
+``HTTP_TIMEOUT`` bounds each attempt's connect and each socket read rather
+than the whole request, so time spent queued in the rate limiter or backing
+off between retries does not count against it.
+"""
+
+import aiohttp
+
+from . import settings as project_settings
+from .proxies import ProxyRotation, default_pool
+from .ratelimit import RateLimiter
+from .retry import RetryMiddleware
+
+
+class SessionPool:
+    """Own a shared `aiohttp.ClientSession` with a tuned connector."""
+
+    def __init__(
+        self,
+        limit=None,
+        limit_per_host=None,
+        keepalive_timeout=None,
+        dns_cache_ttl=None,
+        timeout=None,
+        headers=None,
+        rate_limiter=None,
+        retry=None,
+        proxy_pool=None,
+    ):
+        self.limit = limit if limit is not None else project_settings.HTTP_POOL_LIMIT
+        self.limit_per_host = (
+            limit_per_host
+            if limit_per_host is not None
+            else project_settings.HTTP_POOL_LIMIT_PER_HOST
+        )
+        self.keepalive_timeout = (
+            keepalive_timeout
+            if keepalive_timeout is not None
+            else project_settings.HTTP_KEEPALIVE_TIMEOUT
+        )
+        self.dns_cache_ttl = (
+            dns_cache_ttl
+            if dns_cache_ttl is not None
+            else project_settings.HTTP_DNS_CACHE_TTL
+        )
+        self.timeout = timeout if timeout is not None else project_settings.HTTP_TIMEOUT
+        self.headers = headers or {
+            "User-Agent": project_settings.USER_AGENT,
+            **project_settings.DEFAULT_REQUEST_HEADERS,
+        }
+        if rate_limiter is None and project_settings.RATE_LIMIT_ENABLED:
+            rate_limiter = RateLimiter()
+        self.rate_limiter = rate_limiter or None
+        if retry is None and project_settings.RETRY_ENABLED:
+            retry = RetryMiddleware()
+        self.retry = retry or None
+        self.proxy_pool = proxy_pool if proxy_pool is not None else default_pool()
+        self.proxy_rotation = (
+            ProxyRotation(self.proxy_pool) if self.proxy_pool else None
+        )
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            raise RuntimeError("SessionPool.start() must be awaited first")
+        return self._session
+
+    @property
+    def middlewares(self):
+        # Outermost first: retries wrap proxy rotation and the rate limiter,
+        # so every attempt picks its own proxy and is paced.
+        middlewares = (self.retry, self.proxy_rotation, self.rate_limiter)
+        return tuple(m for m in middlewares if m is not None)
+
+    @property
+    def started(self):
+        return self._session is not None and not self._session.closed
+
+    async def start(self):
+        if self.started:
+            return self._session
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(
+                total=None, sock_connect=self.timeout, sock_read=self.timeout
+            ),
+            headers=self.headers,
+            middlewares=self.middlewares,
+        )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
@@ -10,15 +10,18 @@ import os
 BOT_NAME = os.getenv("SCRAPER_BOT_NAME", "web_scraper")
 USER_AGENT = os.getenv("SCRAPER_USER_AGENT", "web_scraper (+https://example.com)")
 
-# Tell Scrapy where to find spiders for this project. Spiders live in the
-# existing `books.spiders` package (we didn't move your spider files).
-SPIDER_MODULES = ["books.spiders"]
-NEWSPIDER_MODULE = "books.spiders"
+# Tell Scrapy where to find spiders for this project. Spiders live in
+# `scraper.spiders`; `books.spiders` only re-exports them, and Scrapy skips
+# re-exported classes when discovering spiders.
+SPIDER_MODULES = ["scraper.spiders"]
+NEWSPIDER_MODULE = "scraper.spiders"
 
 # Enable default item pipelines (can be adjusted in project settings)
 ITEM_PIPELINES = {
+    "web_scraper_project.pipelines.SerializationPipeline": 200,
     "web_scraper_project.pipelines.JsonLinesPipeline": 300,
     "web_scraper_project.pipelines.SQLitePipeline": 400,
+    "web_scraper_project.pipelines.ParquetPipeline": 500,
 }
 
 # Respect robots.txt
@@ -40,19 +43,188 @@ RETRY_ENABLED = True
 RETRY_TIMES = int(os.getenv("SCRAPER_RETRY_TIMES", "3"))
 RETRY_HTTP_CODES = [500, 502, 503, 504, 522, 524, 408]
 
+# Retries of the aiohttp session (AsyncBookSpider and the API's fetches) use
+# RETRY_ENABLED/RETRY_TIMES/RETRY_HTTP_CODES too, sleeping a random delay of
+# up to BACKOFF_BASE * 2**attempt (at most BACKOFF_MAX) seconds and giving up
+# DEADLINE seconds after the first attempt (each attempt is bounded by
+# HTTP_TIMEOUT on its own). A host failing THRESHOLD times
+# in a row fails fast for CIRCUIT_BREAKER_RESET seconds.
+RETRY_BACKOFF_BASE = float(os.getenv("SCRAPER_RETRY_BACKOFF_BASE", "0.5"))
+RETRY_BACKOFF_MAX = float(os.getenv("SCRAPER_RETRY_BACKOFF_MAX", "30"))
+RETRY_DEADLINE = float(os.getenv("SCRAPER_RETRY_DEADLINE", "60"))
+CIRCUIT_BREAKER_THRESHOLD = int(os.getenv("SCRAPER_CIRCUIT_BREAKER_THRESHOLD", "5"))
+CIRCUIT_BREAKER_RESET = float(os.getenv("SCRAPER_CIRCUIT_BREAKER_RESET", "30"))
+
 # Default request headers (helpful for some sites)
 DEFAULT_REQUEST_HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en",
 }
 
+# Outgoing proxies for Scrapy and the aiohttp session: PROXIES (comma or
+# whitespace separated), one per line in PROXY_FILE, and the single PROXY.
+# Requests are spread over them by latency and success rate; a proxy failing
+# QUARANTINE_AFTER requests in a row (errors or BAN_CODES) is skipped for
+# QUARANTINE_TIME seconds, doubling on each repeat.
+PROXY = os.getenv("SCRAPER_PROXY", "")
+PROXIES = os.getenv("SCRAPER_PROXIES", "")
+PROXY_FILE = os.getenv("SCRAPER_PROXY_FILE", "")
+PROXY_QUARANTINE_AFTER = int(os.getenv("SCRAPER_PROXY_QUARANTINE_AFTER", "3"))
+PROXY_QUARANTINE_TIME = float(os.getenv("SCRAPER_PROXY_QUARANTINE_TIME", "60"))
+PROXY_BAN_CODES = [403, 407, 429, 502, 503, 504]
+
 # Downloader middlewares: enable our lightweight ProxyMiddleware and
 # ensure HttpProxyMiddleware is available.
 DOWNLOADER_MIDDLEWARES = {
-    "web_scraper_project.middlewares.ProxyMiddleware": 350,
+    # Above RetryMiddleware (550) so it sees the failures that get retried
+    "web_scraper_project.middlewares.ProxyMiddleware": 560,
+    # Below HttpCompressionMiddleware (590) so cached bodies are decoded
+    "web_scraper_project.middlewares.HttpCacheMiddleware": 580,
     "scrapy.downloadermiddlewares.useragent.UserAgentMiddleware": 400,
     "scrapy.downloadermiddlewares.httpproxy.HttpProxyMiddleware": 750,
 }
 
 # Simple logging config override (can be tuned further)
 LOG_LEVEL = os.getenv("SCRAPER_LOG_LEVEL", "INFO")
+
+# In-process crawl engine used by the FastAPI `/scrape` endpoint
+CRAWL_ENGINE_MAX_JOBS = int(os.getenv("SCRAPER_CRAWL_ENGINE_MAX_JOBS", "4"))
+CRAWL_ENGINE_RETAINED_JOBS = int(
+    os.getenv("SCRAPER_CRAWL_ENGINE_RETAINED_JOBS", "1000")
+)
+
+# Background crawl jobs (`/start-scraping`): a persistent queue in
+# data/jobs.db consumed by WORKERS worker processes (0 runs none, leaving jobs
+# queued) that poll for work every POLL_INTERVAL seconds and report progress
+# and check for cancellation every PROGRESS_INTERVAL seconds. A running job
+# with no progress report for LEASE seconds is taken as orphaned and requeued
+JOB_QUEUE_WORKERS = int(os.getenv("SCRAPER_JOB_QUEUE_WORKERS", "2"))
+JOB_QUEUE_POLL_INTERVAL = float(os.getenv("SCRAPER_JOB_QUEUE_POLL_INTERVAL", "1.0"))
+JOB_QUEUE_PROGRESS_INTERVAL = float(
+    os.getenv("SCRAPER_JOB_QUEUE_PROGRESS_INTERVAL", "1.0")
+)
+JOB_QUEUE_LEASE = float(os.getenv("SCRAPER_JOB_QUEUE_LEASE", "30"))
+
+# Job progress events (`/jobs/{id}/events`): each progress report carries at
+# most MAX_ITEMS of the items scraped since the previous one; events of jobs
+# finished over RETENTION seconds ago are deleted, and streams check for new
+# events every POLL_INTERVAL seconds
+JOB_EVENTS_MAX_ITEMS = int(os.getenv("SCRAPER_JOB_EVENTS_MAX_ITEMS", "500"))
+JOB_EVENTS_RETENTION = float(os.getenv("SCRAPER_JOB_EVENTS_RETENTION", "3600"))
+JOB_EVENTS_POLL_INTERVAL = float(os.getenv("SCRAPER_JOB_EVENTS_POLL_INTERVAL", "0.5"))
+
+# Shared aiohttp session pool used by the async spider and the API fetchers
+HTTP_POOL_LIMIT = int(os.getenv("SCRAPER_HTTP_POOL_LIMIT", "100"))
+HTTP_POOL_LIMIT_PER_HOST = int(
+    os.getenv("SCRAPER_HTTP_POOL_LIMIT_PER_HOST", str(CONCURRENT_REQUESTS_PER_DOMAIN))
+)
+HTTP_KEEPALIVE_TIMEOUT = float(os.getenv("SCRAPER_HTTP_KEEPALIVE_TIMEOUT", "30"))
+HTTP_DNS_CACHE_TTL = int(os.getenv("SCRAPER_HTTP_DNS_CACHE_TTL", "300"))
+# Per attempt: seconds to connect and between reads, not counting rate
+# limiter waits or retry backoff
+HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "30"))
+
+# Adaptive per-host rate limiting of the aiohttp session (AsyncBookSpider and
+# the API's fetches): token buckets start at START_RATE requests/second with
+# BURST tokens, grow by INCREASE per fast response up to MAX_RATE and shrink
+# on latency above TARGET_LATENCY seconds or 429/503 (honoring Retry-After,
+# capped at MAX_RETRY_AFTER seconds); at most CONCURRENCY requests per host
+RATE_LIMIT_ENABLED = os.getenv("SCRAPER_RATE_LIMIT_ENABLED", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+RATE_LIMIT_START_RATE = float(
+    os.getenv(
+        "SCRAPER_RATE_LIMIT_START_RATE",
+        str(1 / DOWNLOAD_DELAY if DOWNLOAD_DELAY else 1.0),
+    )
+)
+RATE_LIMIT_MIN_RATE = float(os.getenv("SCRAPER_RATE_LIMIT_MIN_RATE", "0.1"))
+RATE_LIMIT_MAX_RATE = float(os.getenv("SCRAPER_RATE_LIMIT_MAX_RATE", "50"))
+RATE_LIMIT_INCREASE = float(os.getenv("SCRAPER_RATE_LIMIT_INCREASE", "0.25"))
+RATE_LIMIT_BURST = int(os.getenv("SCRAPER_RATE_LIMIT_BURST", "4"))
+RATE_LIMIT_CONCURRENCY = int(
+    os.getenv("SCRAPER_RATE_LIMIT_CONCURRENCY", str(CONCURRENT_REQUESTS_PER_DOMAIN))
+)
+RATE_LIMIT_TARGET_LATENCY = float(os.getenv("SCRAPER_RATE_LIMIT_TARGET_LATENCY", "2.0"))
+RATE_LIMIT_MAX_RETRY_AFTER = float(
+    os.getenv("SCRAPER_RATE_LIMIT_MAX_RETRY_AFTER", "300")
+)
+
+# On-disk response cache (data/httpcache.db) revalidated with ETag /
+# Last-Modified; least recently used entries are evicted past MAX_BYTES
+HTTP_CACHE_ENABLED = os.getenv("SCRAPER_HTTP_CACHE_ENABLED", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+HTTP_CACHE_MAX_BYTES = int(os.getenv("SCRAPER_HTTP_CACHE_MAX_BYTES", str(512 << 20)))
+
+# Batch fetching (/download-multiple): global and per-host concurrency caps
+# and a per-URL timeout in seconds
+FETCH_CONCURRENCY = int(os.getenv("SCRAPER_FETCH_CONCURRENCY", "32"))
+FETCH_CONCURRENCY_PER_HOST = int(
+    os.getenv("SCRAPER_FETCH_CONCURRENCY_PER_HOST", str(CONCURRENT_REQUESTS_PER_DOMAIN))
+)
+FETCH_TIMEOUT = float(os.getenv("SCRAPER_FETCH_TIMEOUT", "30"))
+
+# SQLitePipeline write batching: rows are flushed in one transaction every
+# SQLITE_BATCH_SIZE items or SQLITE_FLUSH_INTERVAL_MS milliseconds
+SQLITE_BATCH_SIZE = int(os.getenv("SCRAPER_SQLITE_BATCH_SIZE", "500"))
+SQLITE_FLUSH_INTERVAL_MS = int(os.getenv("SCRAPER_SQLITE_FLUSH_INTERVAL_MS", "1000"))
+SQLITE_JOURNAL_MODE = os.getenv("SCRAPER_SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SCRAPER_SQLITE_SYNCHRONOUS", "NORMAL")
+
+# Item serialization: "auto" uses orjson when installed, else the stdlib
+# json module; JsonLinesPipeline writes through a buffer of this many bytes
+JSON_ENCODER = os.getenv("SCRAPER_JSON_ENCODER", "auto")
+JSONL_BUFFER_SIZE = int(os.getenv("SCRAPER_JSONL_BUFFER_SIZE", str(1 << 16)))
+
+# Item validation: "strict" rejects an invalid item with a ValidationError
+# as it reaches the pipelines; "lenient" drops it with a warning, which lets
+# SQLitePipeline and ParquetPipeline validate the items they buffer in
+# batches (of up to VALIDATION_BATCH_SIZE for ParquetPipeline)
+VALIDATION_MODE = os.getenv("SCRAPER_VALIDATION_MODE", "strict").lower()
+VALIDATION_BATCH_SIZE = int(os.getenv("SCRAPER_VALIDATION_BATCH_SIZE", "500"))
+
+# Columnar export (ParquetPipeline); disabled automatically without pyarrow
+PARQUET_ENABLED = os.getenv("SCRAPER_PARQUET_ENABLED", "1").lower() not in (
+    "0",
+    "false",
+    "no",
+)
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("SCRAPER_PARQUET_ROW_GROUP_SIZE", "50000"))
+PARQUET_COMPRESSION = os.getenv("SCRAPER_PARQUET_COMPRESSION", "zstd")
+
+# AsyncBookSpider: number of concurrent fetch workers and how many scraped
+# items may wait for the consumer before workers block
+ASYNC_SPIDER_CONCURRENCY = int(os.getenv("SCRAPER_ASYNC_SPIDER_CONCURRENCY", "16"))
+ASYNC_SPIDER_ITEM_BUFFER = int(os.getenv("SCRAPER_ASYNC_SPIDER_ITEM_BUFFER", "100"))
+
+# Frontier deduplication (AsyncBookSpider and Scrapy's dupefilter): "memory"
+# (exact), "bloom" (fixed size, sized for CAPACITY keys at ERROR_RATE false
+# positives) or "sqlite" (exact, on disk: a per-crawl temporary file in
+# data/, or seen.db in the job directory of a resumable crawl)
+SEEN_SET = os.getenv("SCRAPER_SEEN_SET", "memory")
+SEEN_SET_CAPACITY = int(os.getenv("SCRAPER_SEEN_SET_CAPACITY", "10000000"))
+SEEN_SET_ERROR_RATE = float(os.getenv("SCRAPER_SEEN_SET_ERROR_RATE", "0.001"))
+DUPEFILTER_CLASS = "web_scraper_project.dedup.SeenSetDupeFilter"
+
+# Resumable AsyncBookSpider crawls: seconds between frontier snapshots in
+# the job directory (the append-only log covers the time in between)
+CHECKPOINT_INTERVAL = float(os.getenv("SCRAPER_CHECKPOINT_INTERVAL", "30"))
+
+# Incremental crawls skip product pages whose content hash matches the one
+# stored for their URL (only recording the visit) and append to items.jl
+INCREMENTAL_CRAWL = os.getenv("SCRAPER_INCREMENTAL_CRAWL", "0").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# AsyncBookSpider: parse pages in this many worker processes (0 parses on the
+# event loop) with at most PARSE_BACKLOG pages queued for them; 0 means twice
+# the worker count
+ASYNC_SPIDER_PARSE_WORKERS = int(os.getenv("SCRAPER_ASYNC_SPIDER_PARSE_WORKERS", "0"))
+ASYNC_SPIDER_PARSE_BACKLOG = int(os.getenv("SCRAPER_ASYNC_SPIDER_PARSE_BACKLOG", "0"))
@@ -0,0 +1,289 @@
+"""Typed SQLite tables for scraped items.
+
+Each item type with a pydantic schema gets its own table in ``items.db``
+whose columns are derived from the model fields, instead of a single JSON
+blob column. Lookup keys are indexed, and item types with a natural key
+(products by UPC) are upserted so a re-crawl updates rows in place.
+Items without a schema keep using the generic ``items`` JSON table, and
+``crawl_pages`` records the content hash and last visit of every page an
+item was parsed from (see `incremental`).
+
+`ItemStore` is the read side used by the API: it serves keyset-paginated,
+filtered and projected pages straight from these tables.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from decimal import Decimal
+
+from .serialization import SCHEMA_MAP
+
+TABLE_MAP = {
+    "ProductItem": "products",
+    "ReviewItem": "reviews",
+    "CategoryItem": "categories",
+    "SellerItem": "sellers",
+    "InventoryItem": "inventory",
+    "OrderItem": "orders",
+}
+
+# Natural keys used for upserts; item types without one are appended.
+UNIQUE_KEYS = {
+    "ProductItem": "upc",
+}
+
+# Secondary indexes on the columns `/data` filters and joins on.
+INDEXED_COLUMNS = {
+    "ProductItem": ("category", "price", "star_rating", "url"),
+    "ReviewItem": ("product_id",),
+    "InventoryItem": ("product_id",),
+    "OrderItem": ("product_id",),
+}
+
+GENERIC_TABLE = "items"
+PAGES_TABLE = "crawl_pages"
+
+PAGE_UPSERT_SQL = (
+    f"INSERT INTO {PAGES_TABLE} (url, content_hash, last_seen) VALUES (?, ?, ?) "
+    "ON CONFLICT(url) DO UPDATE SET content_hash = excluded.content_hash, "
+    "last_seen = excluded.last_seen"
+)
+
+
+def sqlite_type(field):
+    """Map a pydantic model field to an SQLite column type."""
+    type_ = field.type_
+    if isinstance(type_, type):
+        if issubclass(type_, (bool, int)):
+            return "INTEGER"
+        if issubclass(type_, (float, Decimal)):
+            return "REAL"
+    return "TEXT"
+
+
+def sqlite_value(value):
+    """Convert a validated field value to something sqlite3 can bind."""
+    if value is None or type(value) in (int, float, str):
+        return value
+    if isinstance(value, (bool, int)):
+        return int(value)
+    if isinstance(value, (float, Decimal)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class TableSpec:
+    """Column layout and SQL statements for one item type's table."""
+
+    def __init__(self, item_type, model):
+        self.item_type = item_type
+        self.name = TABLE_MAP.get(item_type, item_type.lower())
+        self.columns = [
+            (name, sqlite_type(field)) for name, field in model.__fields__.items()
+        ]
+        self.column_names = [name for name, _ in self.columns]
+        self.key = UNIQUE_KEYS.get(item_type)
+        self.indexed = INDEXED_COLUMNS.get(item_type, ())
+
+        names = self.column_names + ["created_at", "updated_at"]
+        placeholders = ", ".join("?" for _ in names)
+        self.insert_sql = (
+            f"INSERT INTO {self.name} ({', '.join(names)}) VALUES ({placeholders})"
+        )
+        if self.key:
+            updates = ", ".join(
+                f"{name} = excluded.{name}"
+                for name in self.column_names + ["updated_at"]
+            )
+            self.insert_sql += f" ON CONFLICT({self.key}) DO UPDATE SET {updates}"
+
+    def create_statements(self):
+        column_defs = ",\n    ".join(f"{name} {type_}" for name, type_ in self.columns)
+        statements = [
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.name} (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {column_defs},
+                created_at TEXT,
+                updated_at TEXT
+            )
+            """
+        ]
+        if self.key:
+            statements.append(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS ux_{self.name}_{self.key} "
+                f"ON {self.name} ({self.key})"
+            )
+        for column in self.indexed:
+            statements.append(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.name}_{column} "
+                f"ON {self.name} ({column})"
+            )
+        return statements
+
+    def row(self, item_dict, timestamp):
+        values = [sqlite_value(item_dict.get(name)) for name in self.column_names]
+        return values + [timestamp, timestamp]
+
+
+def table_specs():
+    """Return a `TableSpec` for every schema-backed item type."""
+    return {
+        item_type: TableSpec(item_type, model)
+        for item_type, model in SCHEMA_MAP.items()
+    }
+
+
+def create_tables(conn, specs=None):
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {GENERIC_TABLE} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            item_type TEXT,
+            data TEXT,
+            created_at TEXT
+        )
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {PAGES_TABLE} (
+            url TEXT PRIMARY KEY,
+            content_hash TEXT,
+            last_seen TEXT
+        )
+        """
+    )
+    for spec in (specs or table_specs()).values():
+        existing = {row[1] for row in conn.execute(f"PRAGMA table_info({spec.name})")}
+        if existing:
+            # Tables created before a model gained fields get the new columns.
+            for name, type_ in spec.columns + [
+                ("created_at", "TEXT"),
+                ("updated_at", "TEXT"),
+            ]:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {spec.name} ADD COLUMN {name} {type_}")
+        for statement in spec.create_statements():
+            conn.execute(statement)
+
+
+# Query filters accepted by `ItemStore`: name -> (column, operator).
+FILTERS = {
+    "category": ("category", "="),
+    "min_price": ("price", ">="),
+    "max_price": ("price", "<="),
+    "min_rating": ("star_rating", ">="),
+    "max_rating": ("star_rating", "<="),
+}
+
+
+def default_db_path():
+    # Resolved at call time so tests patching `pipelines.DATA_DIR` apply.
+    from . import pipelines
+
+    return os.path.join(pipelines.DATA_DIR, "items.db")
+
+
+class ItemStore:
+    """Read-only, keyset-paginated access to the tables in ``items.db``.
+
+    Pages are ordered by the table's integer primary key and continue after
+    the last id seen (the cursor), so fetching any page costs an index seek
+    rather than an OFFSET scan, whatever the total row count.
+    """
+
+    def __init__(self, db_path=None, specs=None):
+        self.db_path = db_path or default_db_path()
+        specs = specs or table_specs()
+        self.columns = {
+            spec.name: ["id"] + spec.column_names + ["created_at", "updated_at"]
+            for spec in specs.values()
+        }
+        self.columns[GENERIC_TABLE] = ["id", "item_type", "data", "created_at"]
+
+    def connect(self):
+        conn = sqlite3.connect(
+            f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def selected_columns(self, table, fields=None):
+        """Return the columns a query for `fields` of `table` will produce."""
+        columns = self.columns.get(table)
+        if columns is None:
+            raise ValueError(f"Unknown table: {table}")
+        if not fields:
+            return columns
+        unknown = [name for name in fields if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown fields for {table}: {', '.join(unknown)}")
+        # The id is always returned since it is the pagination cursor.
+        return ["id"] + [name for name in fields if name != "id"]
+
+    def _select(self, table, after, fields, filters):
+        columns = self.columns.get(table)
+        selected = self.selected_columns(table, fields)
+
+        clauses = ["id > ?"]
+        params = [after or 0]
+        for name, value in filters.items():
+            if value is None:
+                continue
+            if name not in FILTERS:
+                raise ValueError(f"Unknown filter: {name}")
+            column, op = FILTERS[name]
+            if column not in columns:
+                raise ValueError(f"Filter {name} does not apply to {table}")
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+
+        sql = (
+            f"SELECT {', '.join(selected)} FROM {table} "
+            f"WHERE {' AND '.join(clauses)} ORDER BY id LIMIT ?"
+        )
+        return sql, params
+
+    def page(self, table="products", after=None, limit=50, fields=None, **filters):
+        """Return ``(rows, next_cursor)``; `next_cursor` is None on the last page."""
+        sql, params = self._select(table, after, fields, filters)
+        if not os.path.exists(self.db_path):
+            return [], None
+        conn = self.connect()
+        try:
+            rows = conn.execute(sql, params + [limit + 1]).fetchall()
+        finally:
+            conn.close()
+        has_more = len(rows) > limit
+        rows = [dict(row) for row in rows[:limit]]
+        return rows, (rows[-1]["id"] if has_more else None)
+
+    def iter_rows(
+        self, table="products", after=None, fields=None, chunk_size=1000, **filters
+    ):
+        """Yield every matching row as a dict, reading `chunk_size` rows at a time.
+
+        The query is validated eagerly, so bad arguments raise `ValueError`
+        here rather than on first iteration.
+        """
+        sql, params = self._select(table, after, fields, filters)
+        return self._iter(sql, params, chunk_size)
+
+    def _iter(self, sql, params, chunk_size):
+        if not os.path.exists(self.db_path):
+            return
+        conn = self.connect()
+        try:
+            while True:
+                rows = conn.execute(sql, params + [chunk_size]).fetchall()
+                for row in rows:
+                    yield dict(row)
+                if len(rows) < chunk_size:
+                    break
+                params[0] = rows[-1]["id"]
+        finally:
+            conn.close()